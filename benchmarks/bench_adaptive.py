@@ -0,0 +1,93 @@
+"""
+Simulate adaptive vs fixed-30 question selection on synthetic respondents.
+
+Reports the average number of questions (one Streamlit rerun per answer) and
+how often each mode lands in the same sector as the respondent's noise-free
+answers to the whole item bank.
+
+    python benchmarks/bench_adaptive.py --respondents 1000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import disc_adaptive  # noqa: E402
+import disc_scoring  # noqa: E402
+import disc_session  # noqa: E402
+import disc_synthetic  # noqa: E402
+
+
+def run_adaptive(full_answers, rng, mapping, min_items, threshold, pool):
+    # One session driven as the app drives it: disc_adaptive.outlook() before each
+    # answer, then record it and disc_adaptive.advance() with that decision
+    item_indices = disc_adaptive.new_adaptive_items(rng=rng, mapping=mapping)
+    answers = disc_session.new_answers(len(item_indices))
+    raw_score = disc_session.new_raw_score()
+    bound_score = disc_session.new_bound_score()
+    position = 0
+    while True:
+        _, ends = disc_adaptive.outlook(item_indices, answers, rng, min_items, threshold, mapping)
+        disc_session.record_answer(
+            item_indices, answers, raw_score, bound_score, position, int(full_answers[item_indices[position]])
+        )
+        if not disc_adaptive.advance(item_indices, raw_score, bound_score, position, ends, rng, mapping, pool):
+            break
+        position += 1
+    _, _, _, code = disc_session.provisional_profile(raw_score, bound_score)
+    return position + 1, int(code)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--respondents", type=int, default=1000)
+    parser.add_argument("--min-items", type=int, default=disc_adaptive.MIN_ITEMS)
+    parser.add_argument("--threshold", type=float, default=disc_adaptive.CONFIDENCE_THRESHOLD)
+    parser.add_argument(
+        "--pool", type=int, default=disc_adaptive.CANDIDATE_POOL, help="Candidate items per pick (default: all unasked)"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    mapping = disc_scoring.load_mapping_matrix()
+    latent = disc_synthetic.latent_traits(args.respondents, rng)
+    noisy = disc_synthetic.simulate_answers(latent, mapping, rng)
+    reference = disc_scoring.score_answers(disc_synthetic.simulate_answers(latent, mapping, rng, noise=0), mapping).style
+
+    # Fixed mode: a random 30 of the bank, as the app draws them
+    fixed_answers = noisy.copy()
+    fixed_answers[~disc_synthetic.random_subsets(args.respondents, len(mapping), 30, rng)] = 0
+    fixed = disc_scoring.score_answers(fixed_answers, mapping).style
+
+    started = time.perf_counter()
+    lengths = np.empty(args.respondents, dtype=int)
+    adaptive = np.empty(args.respondents, dtype=np.uint8)
+    for n in range(args.respondents):
+        lengths[n], adaptive[n] = run_adaptive(
+            noisy[n], rng, mapping, args.min_items, args.threshold, args.pool
+        )
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"{args.respondents} simulated respondents "
+        f"(min items {args.min_items}, confidence {args.threshold}, pool {args.pool or 'all'})"
+    )
+    print(f"fixed-30 : 30.0 questions/respondent, sector agreement with full bank {np.mean(fixed == reference):6.1%}")
+    print(
+        f"adaptive : {lengths.mean():4.1f} questions/respondent, sector agreement with full bank "
+        f"{np.mean(adaptive == reference):6.1%}, agreement with fixed-30 {np.mean(adaptive == fixed):6.1%}"
+    )
+    print(
+        f"saved    : {30 - lengths.mean():4.1f} reruns/respondent ({1 - lengths.mean() / 30:.0%}) for "
+        f"{np.mean(adaptive == reference) - np.mean(fixed == reference):+.1%} sector agreement with full bank, "
+        f"{np.mean(lengths < 30):.0%} stopped early; selection cost {elapsed / lengths.sum() * 1000:.2f} ms/question"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark aggregate scans of the columnar archive against the same results as JSONL.
+
+Writes seeded synthetic results to an archive and to a JSONL file (the
+format of `disc_cli.py export`), then times style counts and mean scores
+over each.
+
+    python benchmarks/bench_archive.py --rows 1000000 --jsonl-rows 200000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import disc_archive  # noqa: E402
+import disc_scoring  # noqa: E402
+import disc_store  # noqa: E402
+import disc_synthetic  # noqa: E402
+
+DAY_MS = 86_400_000
+
+
+def build(archive, jsonl_path, rows, jsonl_rows, chunk_size, seed):
+    rng = np.random.default_rng(seed)
+    mapping = disc_scoring.load_mapping_matrix()
+    started_ms = disc_store.now_ms() - 365 * DAY_MS
+    with open(jsonl_path, "w") as f:
+        for start in range(0, rows, chunk_size):
+            count = min(chunk_size, rows - start)
+            answers = disc_synthetic.synthetic_answers(count, rng, mapping=mapping)
+            created_at = started_ms + (start + np.arange(count)) * 365 * DAY_MS // rows
+            archive.append(answers, disc_scoring.score_answers(answers, mapping), created_at=created_at)
+            if start < jsonl_rows:
+                for result in archive.iter_json(start, min(start + count, jsonl_rows)):
+                    f.write(json.dumps(result) + "\n")
+
+
+def scan_jsonl(path):
+    counts = np.zeros(len(disc_scoring.STYLE_KEYS), dtype=np.int64)
+    total = np.zeros(len(disc_scoring.STYLES))
+    with open(path, "r") as f:
+        for line in f:
+            result = json.loads(line)
+            counts[disc_scoring.STYLE_KEYS.index(result["style"])] += 1
+            total += [result["normalized_score"][style] for style in disc_scoring.STYLES]
+    return counts, total / counts.sum()
+
+
+def timed(name, rows, query, repeats=3):
+    query()  # warm the page cache
+    elapsed = min(_time(query) for _ in range(repeats))
+    print(f"{name:<40} {rows:>10} rows {elapsed * 1000:10.1f} ms {rows / elapsed / 1e6:10.2f} M rows/s")
+    return rows / elapsed
+
+
+def _time(query):
+    started = time.perf_counter()
+    query()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000, help="Rows in the archive")
+    parser.add_argument("--jsonl-rows", type=int, default=200000, help="Rows in the JSONL file (the first of the archive)")
+    parser.add_argument("--chunk-size", type=int, default=100000, help="Rows appended at a time")
+    parser.add_argument("--dir", help="Directory for the files (default: a temporary one, removed afterwards)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    args.jsonl_rows = min(args.jsonl_rows, args.rows)
+
+    directory = None
+    if args.dir is None:
+        directory = tempfile.TemporaryDirectory()
+        args.dir = directory.name
+    archive_path = os.path.join(args.dir, "archive")
+    jsonl_path = os.path.join(args.dir, "results.jsonl")
+
+    started = time.perf_counter()
+    archive = disc_archive.ColumnArchive(archive_path)
+    build(archive, jsonl_path, args.rows, args.jsonl_rows, args.chunk_size, args.seed)
+    archive_size = sum(os.path.getsize(os.path.join(archive_path, name)) for name in os.listdir(archive_path))
+    print(f"wrote {args.rows} archive rows and {args.jsonl_rows} JSONL rows in {time.perf_counter() - started:.1f} s")
+    print(f"archive {archive_size / args.rows:.0f} bytes/row, JSONL {os.path.getsize(jsonl_path) / args.jsonl_rows:.0f} bytes/row")
+
+    # The JSONL file holds the first rows of the archive: check both scans agree on them
+    jsonl_counts, jsonl_means = scan_jsonl(jsonl_path)
+    head = slice(0, args.jsonl_rows)
+    assert (jsonl_counts == np.bincount(archive.column("style")[head], minlength=len(jsonl_counts))).all()
+    assert np.allclose(jsonl_means, archive.column("normalized")[head].mean(axis=0, dtype=np.float64))
+
+    last_month = disc_store.now_ms() - 30 * DAY_MS
+    jsonl = timed("JSONL style counts + mean scores", args.jsonl_rows, lambda: scan_jsonl(jsonl_path), repeats=1)
+    mapped = timed("archive style counts + mean scores", args.rows,
+                   lambda: (archive.style_counts(), archive.mean_scores()))
+    timed("archive, last month", args.rows,
+          lambda: (archive.style_counts(since=last_month), archive.mean_scores(since=last_month)))
+    print(f"archive scan is {mapped / jsonl:,.0f}x faster per row")
+
+    if directory is not None:
+        directory.cleanup()
+
+
+if __name__ == "__main__":
+    main()
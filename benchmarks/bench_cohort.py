@@ -0,0 +1,59 @@
+"""
+Benchmark cohort analytics at 10k and 100k members: summary, pairwise similarity and top matches.
+
+    python benchmarks/bench_cohort.py --sizes 10000 100000 --tile-size 2048
+"""
+import argparse
+import os
+import resource
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import disc_cohort  # noqa: E402
+import disc_scoring  # noqa: E402
+import disc_synthetic  # noqa: E402
+
+# Largest cohort whose full similarity matrix is materialized (10k members = 400 MB)
+FULL_MATRIX_LIMIT = 10000
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def timed(name, size, run):
+    started = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - started
+    print(f"{name:<22} {size:>7} members  {elapsed:9.3f} s  "
+          f"{size * size / elapsed / 1e6:10.1f} M pairs/s  peak RSS {peak_rss_mb():7.0f} MB", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--tile-size", type=int, default=disc_cohort.DEFAULT_TILE_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    answers = disc_synthetic.synthetic_answers(max(args.sizes), rng)
+    normalized = disc_scoring.score_answers(answers).normalized
+
+    for size in args.sizes:
+        cohort = normalized[:size]
+        started = time.perf_counter()
+        disc_cohort.summarize(cohort)
+        print(f"{'summary':<22} {size:>7} members  {time.perf_counter() - started:9.3f} s")
+        if size <= FULL_MATRIX_LIMIT:
+            timed("similarity matrix", size, lambda: disc_cohort.similarity_matrix(cohort, args.tile_size))
+        timed("mean similarity", size, lambda: disc_cohort.mean_similarity(cohort, args.tile_size))
+        timed("top 5 matches", size, lambda: disc_cohort.top_matches(cohort, 5, args.tile_size))
+
+
+if __name__ == "__main__":
+    main()
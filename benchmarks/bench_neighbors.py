@@ -0,0 +1,112 @@
+"""
+Benchmark the nearest-neighbour index against a brute-force scan: latency and recall.
+
+    python benchmarks/bench_neighbors.py --profiles 1000000 --queries 1000 --k 10
+"""
+import argparse
+import itertools
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import disc_neighbors  # noqa: E402
+import disc_scoring  # noqa: E402
+import disc_synthetic  # noqa: E402
+
+
+def latencies(query, points, k):
+    results = []
+    times = np.empty(len(points))
+    for n, point in enumerate(points):
+        started = time.perf_counter()
+        results.append(query(point, k))
+        times[n] = time.perf_counter() - started
+    return results, times
+
+
+def report(name, times):
+    print(f"{name:<28} p50 {np.percentile(times, 50) * 1000:8.3f} ms  p99 {np.percentile(times, 99) * 1000:8.3f} ms")
+
+
+def recall(results, expected):
+    # Ties make the id sets ambiguous, so a hit is any result within the true k-th distance
+    hits = sum(
+        np.count_nonzero(distances <= true_distances[-1] + 1e-4)
+        for (_, distances), (_, true_distances) in zip(results, expected)
+    )
+    return hits / sum(len(true_distances) for _, true_distances in expected)
+
+
+def run(name, index, points, queries, k, insert_batch):
+    started = time.perf_counter()
+    for start in range(0, len(points), insert_batch):
+        index.insert(np.arange(start, min(start + insert_batch, len(points))), points[start:start + insert_batch])
+    elapsed = time.perf_counter() - started
+    print(f"{name}: inserted {len(points)} profiles {insert_batch} at a time in {elapsed:.2f} s "
+          f"({len(points) / elapsed:,.0f} profiles/s)")
+
+    results, index_times = latencies(index.query, queries, k)
+    expected, brute_times = latencies(index.brute_force, queries, k)
+    report(f"{name} index k={k}", index_times)
+    report(f"{name} brute force k={k}", brute_times)
+    print(f"{name} recall@{k}: {recall(results, expected):.4f}")
+
+    # Far from the data: the corners of the box, where queries fall back to a full scan
+    corners = np.array(list(itertools.product(*zip(index.low, index.high))))
+    results, corner_times = latencies(index.query, corners, k)
+    expected, _ = latencies(index.brute_force, corners, k)
+    report(f"{name} corners k={k}", corner_times)
+    print(f"{name} corners recall@{k}: {recall(results, expected):.4f}")
+    empty = disc_neighbors.GridIndex(index.dim, index.low, index.high, index.cell_size)
+    _, empty_times = latencies(empty.query, queries[:100], k)
+    report(f"{name} empty index k={k}", empty_times)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "index.npz")
+        started = time.perf_counter()
+        index.save(path)
+        saved = time.perf_counter() - started
+        started = time.perf_counter()
+        disc_neighbors.GridIndex.load(path)
+        print(f"{name} save {saved * 1000:.0f} ms, load {(time.perf_counter() - started) * 1000:.0f} ms, "
+              f"{os.path.getsize(path) / 2**20:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--profiles", type=int, default=1000000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--insert-batch", type=int, default=10000, help="Profiles per insert() call")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    mapping = disc_scoring.load_mapping_matrix()
+    normalized = np.concatenate([
+        disc_scoring.score_answers(disc_synthetic.synthetic_answers(min(100000, args.profiles - start), rng), mapping).normalized
+        for start in range(0, args.profiles, 100000)
+    ])
+    # Query with other synthetic respondents, not copies of indexed ones
+    query_scores = disc_scoring.score_answers(disc_synthetic.synthetic_answers(args.queries, rng), mapping)
+
+    run("profile", disc_neighbors.profile_index(), normalized, query_scores.normalized, args.k, args.insert_batch)
+
+    angle, magnitude = disc_scoring.resultant(normalized)
+    run(
+        "resultant",
+        disc_neighbors.resultant_index(),
+        disc_neighbors.resultant_points(angle, magnitude),
+        disc_neighbors.resultant_points(query_scores.angle, query_scores.magnitude),
+        args.k,
+        args.insert_batch,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Benchmark PDF reports with the vector DISC wheel against the 300 dpi PNG wheel they used to embed.
+
+Times the report build, wheel included, and compares the PDF sizes; then
+checks the vector wheel against disc_plot.create_disc_plot(): the layout
+constants of disc_report against the figure's tight bounding box, axes,
+labels and title, and the marker position of every profile against
+matplotlib's own transform.
+
+    python benchmarks/bench_pdf_wheel.py --reports 100
+"""
+import argparse
+import os
+import sys
+import time
+from io import BytesIO
+
+import numpy as np
+from reportlab.platypus import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import disc_plot  # noqa: E402
+import disc_report  # noqa: E402
+import disc_scoring  # noqa: E402
+
+RASTER_DPI = 300
+
+
+def raster_wheel(angle, magnitude):
+    # The wheel as reports embedded it before the vector version
+    png = disc_plot.render_disc_png(angle, magnitude, dpi=RASTER_DPI, tight=True)
+    return Image(BytesIO(png), width=disc_report.WHEEL_SIZE, height=disc_report.WHEEL_SIZE)
+
+
+def build_reports(profiles, make_wheel):
+    sizes = []
+    started = time.perf_counter()
+    for normalized, relative, angle, magnitude, description in profiles:
+        pdf = disc_report.create_pdf_report(
+            normalized_score=normalized,
+            relative_percentages=relative,
+            wheel=make_wheel(angle, magnitude),
+            style_description=description,
+        )
+        sizes.append(len(pdf.getvalue()))
+    return time.perf_counter() - started, np.array(sizes)
+
+
+def figure_layout():
+    """Positions in create_disc_plot(), in points from the corner of its tight bounding box."""
+    fig = disc_plot.create_disc_plot(0, 0)
+    fig.canvas.draw()
+    renderer = fig.canvas.get_renderer()
+    points = 72 / fig.dpi  # display units are pixels
+    ax = fig.axes[0]
+    tight = fig.get_tightbbox(renderer).padded(0.1)
+    origin = np.array([tight.x0, tight.y0]) * 72
+
+    def to_points(xy):
+        return np.asarray(xy) * points - origin
+
+    def center(text):
+        extent = text.get_window_extent(renderer)
+        return to_points([(extent.x0 + extent.x1) / 2, (extent.y0 + extent.y1) / 2])
+
+    return {
+        "size": np.array([tight.width, tight.height]) * 72,
+        "center": to_points(ax.transData.transform((0, 0))),
+        "radius": np.linalg.norm(to_points(ax.transData.transform((0, disc_report.WHEEL_LIMIT))) -
+                                 to_points(ax.transData.transform((0, 0)))),
+        "labels": {text.get_text(): center(text) for text in ax.get_xticklabels()},
+        "title": center(ax.title),
+        "marker": lambda angle, magnitude: to_points(ax.transData.transform((angle, magnitude))),
+    }
+
+
+def check_parity(angles, magnitudes):
+    """Largest deviations (points of the 10x10 inch figure) of the vector wheel from create_disc_plot()."""
+    layout = figure_layout()
+    background = disc_report._wheel_background()
+    strings = {string.text: string for string in background.contents if hasattr(string, "text")}
+    deviations = {
+        "bounding box": np.abs(layout["size"] - [disc_report.WHEEL_WIDTH, disc_report.WHEEL_HEIGHT]).max(),
+        "wheel center": np.abs(layout["center"] - disc_report.WHEEL_CENTER).max(),
+        "wheel radius": abs(layout["radius"] - disc_report.WHEEL_RADIUS),
+        # Text is compared by its anchor (horizontal center) and the center of a capital letter
+        "labels": max(
+            np.abs(layout["labels"][label] - [strings[label].x, strings[label].y + 0.36 * 14]).max()
+            for label in disc_plot.CATEGORIES
+        ),
+        "title": abs(layout["title"][0] - strings["Your DISC Style Profile"].x),
+    }
+    marker_error = 0
+    for angle, magnitude in zip(angles, magnitudes):
+        marker = disc_report.wheel_drawing(angle, magnitude).contents[0].contents[-1].contents[-1]
+        marker_error = max(marker_error, np.abs(layout["marker"](angle, magnitude) - [marker.cx, marker.cy]).max())
+    deviations["markers"] = marker_error
+    return deviations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--reports", type=int, default=100, help="Reports built per wheel")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    normalized = rng.uniform(0, 100, (args.reports, len(disc_scoring.STYLES)))
+    angles, magnitudes = disc_scoring.resultant(normalized)
+    relative = disc_scoring.relative_percentages(normalized)
+    styles = disc_scoring.classify(normalized, angles)
+    descriptions = disc_report.disc_data.load_descriptions()
+    profiles = [
+        (
+            disc_scoring.to_score_dict(row),
+            disc_scoring.to_score_dict(rel),
+            angle,
+            magnitude,
+            disc_scoring.format_style_description(disc_scoring.STYLE_KEYS[style], descriptions),
+        )
+        for row, rel, angle, magnitude, style in zip(normalized, relative, angles, magnitudes, styles)
+    ]
+
+    # Per-process setup (stylesheet, cached wheel backgrounds) is timed apart, once
+    for name, make_wheel in (("raster", raster_wheel), ("vector", disc_report.wheel_drawing)):
+        started = time.perf_counter()
+        build_reports(profiles[:1], make_wheel)
+        first = time.perf_counter() - started
+        elapsed, sizes = build_reports(profiles, make_wheel)
+        print(f"{name} wheel: first report {first * 1000:7.1f} ms, then {elapsed / args.reports * 1000:6.2f} ms/report "
+              f"({args.reports / elapsed:6.1f} reports/s), {sizes.mean() / 1024:7.1f} KiB/report")
+
+    print("largest deviation of the vector wheel from create_disc_plot(), in points of the 720 pt figure:")
+    for name, deviation in check_parity(angles, magnitudes).items():
+        print(f"  {name:<14} {deviation:6.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark DISC wheel rendering: per-render latency and steady-state memory.
+
+Compares the old pyplot path (a new figure per render, never closed) with
+disc_plot.create_disc_plot() and the cached-background disc_plot.render_disc_png().
+
+    python benchmarks/bench_plot.py --renders 10000
+"""
+import argparse
+import os
+import resource
+import sys
+import time
+from io import BytesIO
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib
+
+matplotlib.use("Agg")
+matplotlib.rcParams["figure.max_open_warning"] = 0
+import matplotlib.pyplot as plt  # noqa: E402
+
+import disc_plot  # noqa: E402
+
+
+def rss_mb():
+    # Current resident set size, falling back to the peak where /proc is missing
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def legacy_plot(resultant_angle, resultant_magnitude):
+    # The pre-disc_plot implementation: pyplot-managed figure, never closed
+    fig, ax = plt.subplots(figsize=(10, 10), subplot_kw={"projection": "polar"})
+    ax.set_theta_offset(np.pi / 2)
+    ax.set_theta_direction(-1)
+    ax.set_ylim(0, 1.01)
+    ax.plot(resultant_angle, resultant_magnitude, "o", markersize=24, color="#4CAF50")
+    ax.set_xticks(disc_plot.CATEGORY_ANGLES)
+    ax.set_xticklabels(disc_plot.CATEGORIES, fontsize=14, fontweight="bold")
+    for x in (0, np.pi, np.pi / 2, 3 * np.pi / 2):
+        ax.axvline(x=x, color="gray", linestyle="--", alpha=0.7)
+    ax.set_yticklabels([])
+    ax.grid(True, alpha=0.3)
+    ax.spines["polar"].set_visible(False)
+    ax.set_facecolor("#f0f2f6")
+    plt.title("Your DISC Style Profile", fontsize=16, fontweight="bold", pad=20)
+    return fig
+
+
+def figure_png(make_figure):
+    def render(angle, magnitude):
+        buffer = BytesIO()
+        # As st.pyplot() saved figures, the image render_disc_png() reproduces
+        make_figure(angle, magnitude).savefig(buffer, format="png", dpi=200, bbox_inches="tight")
+        return buffer.getvalue()
+
+    return render
+
+
+def run(name, render, renders, rng):
+    angles = rng.uniform(-np.pi, np.pi, renders)
+    magnitudes = rng.uniform(0, 1, renders)
+    render(angles[0], magnitudes[0])  # warm-up (fonts, cached wheel)
+
+    latencies = np.empty(renders)
+    rss_start = rss_mb()
+    rss_warm = None
+    for i in range(renders):
+        started = time.perf_counter()
+        render(angles[i], magnitudes[i])
+        latencies[i] = time.perf_counter() - started
+        if i == renders // 10:
+            rss_warm = rss_mb()
+    rss_end = rss_mb()
+
+    print(
+        f"{name:<24} {renders:>7} renders  "
+        f"p50 {np.percentile(latencies, 50) * 1000:7.2f} ms  "
+        f"p99 {np.percentile(latencies, 99) * 1000:7.2f} ms  "
+        f"RSS {rss_start:7.1f} -> {rss_end:7.1f} MB "
+        f"(growth after warm-up {rss_end - (rss_warm or rss_start):+.1f} MB)  "
+        f"live pyplot figures {len(plt.get_fignums())}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--renders", type=int, default=10000, help="Renders for the disc_plot paths")
+    parser.add_argument(
+        "--legacy-renders",
+        type=int,
+        default=300,
+        help="Renders for the old pyplot path (it leaks every figure, so keep this small)",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    run("render_disc_png", disc_plot.render_disc_png, args.renders, rng)
+    run("create_disc_plot", figure_png(disc_plot.create_disc_plot), args.renders, rng)
+    if args.legacy_renders:
+        run("legacy pyplot", figure_png(legacy_plot), args.legacy_renders, rng)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Per-click script CPU time and script reruns of the question pages, driven headless with AppTest.
+
+Completes assessments click by click like a browser would: a click inside
+the question page fragment reruns only that fragment, any other click the
+whole script. To compare before/after a change, point --app at a checkout
+of the other commit:
+
+    python benchmarks/bench_question_page.py --assessments 5
+    python benchmarks/bench_question_page.py --assessments 5 --multi-question-pages
+    git worktree add /tmp/before HEAD~1
+    python benchmarks/bench_question_page.py --app /tmp/before/disc_style.py
+"""
+import argparse
+import dataclasses
+import os
+import random
+import sys
+import threading
+import time
+
+import numpy as np
+from streamlit.runtime.scriptrunner import ScriptRunnerEvent
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.runtime.scriptrunner_utils.script_requests import ScriptRequests
+from streamlit.testing.v1 import AppTest, app_test
+from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+STOPPED = (
+    ScriptRunnerEvent.SCRIPT_STOPPED_WITH_SUCCESS,
+    ScriptRunnerEvent.SCRIPT_STOPPED_WITH_COMPILE_ERROR,
+    ScriptRunnerEvent.SCRIPT_STOPPED_FOR_RERUN,
+    ScriptRunnerEvent.FRAGMENT_STOPPED_WITH_SUCCESS,
+)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class FragmentAwareRunner(LocalScriptRunner):
+    """
+    AppTest's script runner, plus browser-like fragment reruns and a log of script runs.
+
+    AppTest reruns the whole script on every interaction; a browser sends
+    the fragment id along when the widget lives in a fragment. AppTest also
+    compiles the script on every run, which a server does once: runners
+    share one script cache here, like a server's runtime does.
+
+    AppTest creates a runner per run, on the thread driving the app, so the
+    interaction state lives per driving thread (see driver()).
+    """
+
+    script_cache = ScriptCache()
+    _drivers = threading.local()
+
+    @classmethod
+    def driver(cls):
+        """
+        State of the calling thread's app: `fragment_ids`, the fragments the
+        next interaction belongs to, and `runs`, (fragment-only run?, CPU
+        seconds of the script thread) per script run.
+        """
+        if not hasattr(cls._drivers, "runs"):
+            cls._drivers.fragment_ids = []
+            cls._drivers.runs = []
+        return cls._drivers
+
+    def request_rerun(self, rerun_data):
+        if self._fragment_ids:
+            rerun_data = dataclasses.replace(rerun_data, fragment_id_queue=list(self._fragment_ids))
+        return super().request_rerun(rerun_data)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._script_cache = FragmentAwareRunner.script_cache
+        driver = FragmentAwareRunner.driver()
+        self._fragment_ids = list(driver.fragment_ids)
+        runs = driver.runs
+        if self._fragment_ids:
+            # Every runner starts with a pending full-script rerun, which
+            # would absorb the fragment rerun requested by run()
+            self._requests = ScriptRequests()
+
+        started = {}
+
+        # Events are sent from the script thread, so thread_time() is the script's own CPU time
+        def record_run(sender, event, **kwargs):
+            if event == ScriptRunnerEvent.SCRIPT_STARTED:
+                started.update(fragment=bool(kwargs.get("fragment_ids_this_run")), cpu=time.thread_time())
+            elif event in STOPPED and started:
+                runs.append((started["fragment"], time.thread_time() - started["cpu"]))
+                started.clear()
+
+        self.on_event.connect(record_run, weak=False)
+
+
+def click(at, button, fragment_ids=()):
+    """Click a button and run the app; returns the script CPU seconds of the runs it caused."""
+    driver = FragmentAwareRunner.driver()
+    driver.fragment_ids = list(fragment_ids)
+    first_run = len(driver.runs)
+    try:
+        button.click().run()
+    finally:
+        driver.fragment_ids = []
+    return sum(cpu for _, cpu in driver.runs[first_run:])
+
+
+def complete_assessment(app, multi_question_pages, rng, timeout):
+    at = AppTest.from_file(app, default_timeout=timeout).run()
+    if multi_question_pages:
+        for checkbox in at.checkbox:
+            if "questions per page" in checkbox.label:
+                checkbox.check()
+    begin = next(button for button in at.button if button.label == "Let's Begin")
+    click(at, begin)
+
+    page_clicks = []
+    while not at.session_state["show_results"]:
+        # Private, but the only place AppTest keeps the fragments the app registered
+        fragment_ids = list(at._fragment_storage._fragments)
+        for radio in at.radio:
+            radio.set_value(radio.options[rng.randint(1, 5)])
+        page_clicks.append(click(at, at.button[0], fragment_ids))
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+    return page_clicks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--app", default=os.path.join(ROOT, "disc_style.py"), help="Streamlit script to drive")
+    parser.add_argument("--assessments", type=int, default=5)
+    parser.add_argument("--multi-question-pages", action="store_true", help="Tick the multi-question page option")
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds allowed per script run")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    args.app = os.path.abspath(args.app)
+    # The app imports its sibling modules, from the checkout it lives in
+    sys.path.insert(0, os.path.dirname(args.app))
+    app_test.LocalScriptRunner = FragmentAwareRunner
+    rng = random.Random(args.seed)
+
+    # The first assessment pays for imports and caches; only the rest are measured
+    complete_assessment(args.app, args.multi_question_pages, rng, args.timeout)
+    runs = FragmentAwareRunner.driver().runs
+    runs.clear()
+    clicks, pages = [], []
+    for _ in range(args.assessments):
+        page_clicks = complete_assessment(args.app, args.multi_question_pages, rng, args.timeout)
+        clicks.extend(page_clicks)
+        pages.append(len(page_clicks))
+
+    fragment_runs = np.array([fragment for fragment, _ in runs])
+    # The last click of every assessment also renders the results page; report it apart
+    clicks = np.array(clicks) * 1000
+    last = np.zeros(len(clicks), dtype=bool)
+    last[np.cumsum(pages) - 1] = True
+    print(f"{args.app}: {args.assessments} assessments, {len(clicks) / args.assessments:.0f} page clicks each")
+    print(f"full script runs per assessment:   {(~fragment_runs).sum() / args.assessments:6.1f}")
+    print(f"fragment runs per assessment:      {fragment_runs.sum() / args.assessments:6.1f}")
+    print(f"script CPU per page click:         mean {clicks[~last].mean():.2f} ms, "
+          f"p50 {np.percentile(clicks[~last], 50):.2f} ms, p90 {np.percentile(clicks[~last], 90):.2f} ms")
+    print(f"script CPU of the last click:      mean {clicks[last].mean():.1f} ms (includes the results page)")
+    print(f"script CPU per assessment:         {clicks[~last].sum() / args.assessments:.0f} ms on question pages")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark batch PDF report generation: reports/s for 1..N worker processes.
+
+    python benchmarks/bench_reports.py --reports 200 --workers 1 2 4 8
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import disc_report  # noqa: E402
+import disc_scoring  # noqa: E402
+
+
+class NullWriter:
+    # Keeps only the byte count, so disk speed does not skew the numbers
+    def __init__(self):
+        self.bytes = 0
+
+    def write(self, name, pdf_bytes):
+        self.bytes += len(pdf_bytes)
+
+
+def synthetic_profiles(count, seed):
+    rng = np.random.default_rng(seed)
+    for n, row in enumerate(rng.uniform(0, 100, (count, 4))):
+        yield str(n), disc_scoring.to_score_dict(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--reports", type=int, default=200, help="Reports rendered per run")
+    parser.add_argument("--workers", type=int, nargs="+", default=None, help="Worker counts to compare")
+    parser.add_argument("--chunk-size", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    worker_counts = args.workers or sorted({1, 2, cores // 2 or 1, cores})
+
+    baseline = None
+    for workers in worker_counts:
+        writer = NullWriter()
+        started = time.perf_counter()
+        count = disc_report.generate_reports(
+            synthetic_profiles(args.reports, args.seed),
+            writer,
+            workers=workers,
+            chunk_size=args.chunk_size,
+            progress=False,
+        )
+        elapsed = time.perf_counter() - started
+        rate = count / elapsed
+        baseline = baseline or rate
+        print(
+            f"workers {workers:>3}: {count} reports in {elapsed:6.2f} s  "
+            f"{rate:7.2f} reports/s  speedup x{rate / baseline:4.2f} "
+            f"(ideal x{workers / worker_counts[0]:.0f})  avg {writer.bytes / count / 1024:.0f} KiB/report"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Measure per-session memory of the app's session state, before and after the
+compact representation (item indices + answer bytearray + score array).
+
+    python benchmarks/bench_session_memory.py --sessions 10000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import disc_data  # noqa: E402
+import disc_session  # noqa: E402
+
+
+def legacy_session(rng):
+    # What every session used to hold: its own parsed copy of 30 question
+    # dicts, a dict of answers and several score dicts
+    with open(disc_data.QUESTIONS_PATH, "r") as f:
+        questions = json.load(f)
+    rng.shuffle(questions)
+    return {
+        "questions": questions[:30],
+        "answers": {i: rng.randint(1, 5) for i in range(30)},
+        "score": {"D": 0, "I": 0, "S": 0, "C": 0},
+        "raw_score": {"D": rng.randint(-60, 60), "I": rng.randint(-60, 60), "S": 0, "C": 0},
+    }
+
+
+def compact_session(rng):
+    answers = disc_session.new_answers()
+    for i in range(len(answers)):
+        answers[i] = rng.randint(1, 5)
+    return {
+        "item_indices": disc_session.draw_items(rng=rng),
+        "answers": answers,
+        "raw_score": disc_session.new_raw_score(),
+    }
+
+
+def measure(make_session, sessions, seed):
+    rng = random.Random(seed)
+    make_session(rng)  # warm-up: shared caches are not per-session memory
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = [make_session(rng) for _ in range(sessions)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return (after - before) / sessions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    legacy = measure(legacy_session, args.sessions, args.seed)
+    compact = measure(compact_session, args.sessions, args.seed)
+    print(f"{args.sessions} simulated sessions")
+    print(f"legacy  : {legacy:10,.0f} bytes/session  ({legacy * args.sessions / 2**20:8.1f} MiB total)")
+    print(f"compact : {compact:10,.0f} bytes/session  ({compact * args.sessions / 2**20:8.1f} MiB total)")
+    print(f"reduction: x{legacy / compact:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark the SQLite results store: bulk ingest rows/s and indexed query latency.
+
+    python benchmarks/bench_store.py --rows 1000000 --db /tmp/bench_results.db
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import disc_scoring  # noqa: E402
+import disc_store  # noqa: E402
+import disc_synthetic  # noqa: E402
+
+COHORTS = 50
+DAY_MS = 86_400_000
+
+
+def ingest(store, rows, chunk_size, seed):
+    rng = np.random.default_rng(seed)
+    mapping = disc_scoring.load_mapping_matrix()
+    started_ms = disc_store.now_ms() - 365 * DAY_MS
+    started = time.perf_counter()
+    for start in range(0, rows, chunk_size):
+        count = min(chunk_size, rows - start)
+        answers = disc_synthetic.synthetic_answers(count, rng, mapping=mapping)
+        # Spread the chunks over a year and the cohorts, as a real history would be
+        store.insert(
+            range(start, start + count),
+            answers,
+            disc_scoring.score_answers(answers, mapping),
+            cohort=f"cohort-{start // chunk_size % COHORTS}",
+            created_at=started_ms + start * 365 * DAY_MS // rows,
+        )
+    return time.perf_counter() - started
+
+
+def timed(name, query, repeats=5):
+    query()  # warm the page cache
+    latencies = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        query()
+        latencies.append(time.perf_counter() - started)
+    print(f"{name:<40} {min(latencies) * 1000:9.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--chunk-size", type=int, default=10000, help="Rows inserted per transaction")
+    parser.add_argument("--db", help="Database file (default: a temporary file, removed afterwards)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    directory = None
+    if args.db is None:
+        directory = tempfile.TemporaryDirectory()
+        args.db = os.path.join(directory.name, "results.db")
+
+    with disc_store.ResultStore(args.db) as store:
+        elapsed = ingest(store, args.rows, args.chunk_size, args.seed)
+        store.analyze()
+    print(f"ingested {args.rows} rows in {elapsed:.1f} s ({args.rows / elapsed:,.0f} rows/s), "
+          f"{os.path.getsize(args.db) / 2**20:.0f} MB")
+
+    with disc_store.ResultStore(args.db) as store:
+        last_week = disc_store.now_ms() - 7 * DAY_MS
+        timed("count, one style", lambda: store.count(style="DI"))
+        timed("count, one cohort", lambda: store.count(cohort="cohort-7"))
+        timed("style counts, one cohort", lambda: store.style_counts(cohort="cohort-7"))
+        timed("style counts, last week", lambda: store.style_counts(since=last_week))
+        timed("mean scores, one cohort", lambda: store.mean_scores(cohort="cohort-7"))
+        timed("results of one style, last week", lambda: list(store.iter_results(style="DI", since=last_week)))
+        timed("style counts, all rows", lambda: store.style_counts(), repeats=2)
+
+    if directory is not None:
+        directory.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Measure forced-choice strengths scoring throughput: walking the alignment
+string lists per answer versus the compiled incidence matrix.
+
+    python benchmarks/bench_strengths.py --sheets 100000
+"""
+import argparse
+import ast
+import os
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import disc_strengths  # noqa: E402
+
+
+def legacy_strengths(questions, sheet, k=5):
+    # Re-parse-free baseline: walk the trait lists of every chosen option
+    counts = Counter()
+    for question, choice in zip(questions, sheet):
+        if choice != disc_strengths.UNANSWERED:
+            counts.update(question["alignment"][disc_strengths.OPTIONS[choice]])
+    return counts.most_common(k)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sheets", type=int, default=100000, help="Answer sheets to score")
+    parser.add_argument("--legacy-sheets", type=int, default=5000, help="Answer sheets for the legacy path")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="Answer sheets tallied per call, like the CLI")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with open(disc_strengths.STRENGTHS_PATH, "r") as f:
+        source = f.read()
+    questions = ast.literal_eval(source[source.index("=") + 1:].strip())
+
+    started = time.perf_counter()
+    bank = disc_strengths.load_strengths_bank()
+    print(f"compiled {len(bank.questions)} questions, {len(bank.traits)} traits, "
+          f"{int(bank.incidence.sum())} incidences in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    rng = np.random.default_rng(args.seed)
+    choices = rng.integers(0, 2, (args.sheets, len(bank.questions)), dtype=np.int8)
+
+    sheets = choices[:args.legacy_sheets].tolist()
+    started = time.perf_counter()
+    for sheet in sheets:
+        legacy_strengths(questions, sheet)
+    legacy_rate = len(sheets) / (time.perf_counter() - started)
+    print(f"legacy:   {legacy_rate:>12,.0f} sheets/s")
+
+    disc_strengths.top_strengths(disc_strengths.tally(choices[:args.chunk_size], bank))  # warm-up
+    started = time.perf_counter()
+    for start in range(0, args.sheets, args.chunk_size):
+        counts = disc_strengths.tally(choices[start:start + args.chunk_size], bank)
+        disc_strengths.top_strengths(counts)
+    compiled_rate = args.sheets / (time.perf_counter() - started)
+    print(f"compiled: {compiled_rate:>12,.0f} sheets/s ({compiled_rate / legacy_rate:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
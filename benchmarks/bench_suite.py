@@ -0,0 +1,231 @@
+"""
+Benchmark every stage of the assessment pipeline and check for regressions.
+
+Stages are timed at 1, 1k and 100k synthetic respondents (disc_synthetic,
+seeded, over the real questions.json):
+
+- scoring: raw D, I, S, C scores of the answer matrix
+- normalization: 0-100 scores over each respondent's asked questions
+- classification: resultant vector and style code
+- plot: drawing the DISC wheel figure (disc_plot.create_disc_plot)
+- png: the app's cached-background PNG render (disc_plot.render_disc_png)
+- pdf: building the PDF report, its vector DISC wheel included
+
+Rendering is one profile at a time, so at the larger sizes the render stages
+time a sample of --render-sample profiles and extrapolate ("extrapolated" in
+the results).
+
+    python benchmarks/bench_suite.py -o results.json
+    python benchmarks/bench_suite.py --save-baseline           # store benchmarks/baseline.json
+    python benchmarks/bench_suite.py --threshold 0.2 --case-threshold pdf=0.5
+
+With a stored baseline, every case slower than the baseline by more than its
+threshold (a fraction, 0.2 = 20% slower) is reported and the exit status is 1.
+Baselines are machine-specific: store one on the machine you compare on.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib  # noqa: E402
+
+matplotlib.use("Agg")
+from matplotlib.backends.backend_agg import FigureCanvasAgg  # noqa: E402
+
+import disc_data  # noqa: E402
+import disc_plot  # noqa: E402
+import disc_report  # noqa: E402
+import disc_scoring  # noqa: E402
+import disc_synthetic  # noqa: E402
+
+DEFAULT_SIZES = (1, 1000, 100000)
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+STAGES = ("scoring", "normalization", "classification", "plot", "png", "pdf")
+RENDER_STAGES = ("plot", "png", "pdf")
+
+
+def best_time(run, repeats, min_time=0.05):
+    """Best of `repeats` timings of run(), looping fast cases until they take `min_time`."""
+    run()  # warm-up (caches, fonts, BLAS threads)
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            run()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or loops >= 1 << 16:
+            break
+        loops *= 2
+    timings = [elapsed]
+    for _ in range(repeats - 1):
+        started = time.perf_counter()
+        for _ in range(loops):
+            run()
+        timings.append(time.perf_counter() - started)
+    return min(timings) / loops
+
+
+def stage_runs(answers, mapping):
+    """A run() for every stage over the given answer matrix."""
+    raw = disc_scoring.raw_scores(answers, mapping)
+    asked = answers > 0
+    normalized = disc_scoring.normalize_batch(raw, asked, mapping)
+    angle, magnitude = disc_scoring.resultant(normalized)
+    relative = disc_scoring.relative_percentages(normalized)
+    styles = disc_scoring.classify(normalized, angle)
+    descriptions = disc_data.load_descriptions()
+
+    def plot():
+        for a, m in zip(angle, magnitude):
+            FigureCanvasAgg(disc_plot.create_disc_plot(a, m)).draw()
+
+    def png():
+        for a, m in zip(angle, magnitude):
+            disc_plot.render_disc_png(a, m)
+
+    def pdf():
+        for row, rel, style, a, m in zip(normalized, relative, styles, angle, magnitude):
+            disc_report.create_pdf_report(
+                normalized_score=disc_scoring.to_score_dict(row),
+                relative_percentages=disc_scoring.to_score_dict(rel),
+                wheel=disc_report.wheel_drawing(a, m),
+                style_description=disc_scoring.format_style_description(
+                    disc_scoring.STYLE_KEYS[style], descriptions
+                ),
+            )
+
+    def classification():
+        a, _ = disc_scoring.resultant(normalized)
+        disc_scoring.classify(normalized, a)
+
+    return {
+        "scoring": lambda: disc_scoring.raw_scores(answers, mapping),
+        "normalization": lambda: disc_scoring.normalize_batch(raw, asked, mapping),
+        "classification": classification,
+        "plot": plot,
+        "png": png,
+        "pdf": pdf,
+    }
+
+
+def run_suite(sizes, stages, seed, repeats, render_sample):
+    mapping = disc_scoring.load_mapping_matrix()
+    answers = disc_synthetic.synthetic_answers(max(sizes), np.random.default_rng(seed), mapping=mapping)
+    cases = {}
+    for size in sizes:
+        batch_runs = stage_runs(answers[:size], mapping)
+        sample = min(size, render_sample)
+        sample_runs = stage_runs(answers[:sample], mapping) if sample < size else batch_runs
+        for stage in stages:
+            extrapolated = stage in RENDER_STAGES and sample < size
+            run = sample_runs[stage] if extrapolated else batch_runs[stage]
+            # Render stages are slow enough that one timing per repeat is plenty
+            seconds = best_time(run, 1 if stage in RENDER_STAGES else repeats)
+            if extrapolated:
+                seconds *= size / sample
+            cases[f"{stage}/{size}"] = {
+                "stage": stage,
+                "profiles": size,
+                "seconds": seconds,
+                "us_per_profile": seconds / size * 1e6,
+                "extrapolated": extrapolated,
+            }
+            print(
+                f"{stage:<15} {size:>7} profiles  {seconds * 1000:12.3f} ms  "
+                f"{seconds / size * 1e6:12.2f} us/profile{'  (extrapolated)' if extrapolated else ''}",
+                flush=True,
+            )
+    return cases
+
+
+def compare(cases, baseline, threshold, case_thresholds):
+    """Print each case against the baseline and return the names of those over their threshold."""
+    regressions = []
+    for name, case in cases.items():
+        base = baseline["cases"].get(name)
+        if base is None:
+            continue
+        limit = case_thresholds.get(name, case_thresholds.get(case["stage"], threshold))
+        change = case["seconds"] / base["seconds"] - 1
+        status = "REGRESSION" if change > limit else "ok"
+        print(f"{name:<24} {change:+8.1%} vs baseline (limit {limit:+.0%})  {status}")
+        if change > limit:
+            regressions.append(name)
+    return regressions
+
+
+def parse_case_threshold(value):
+    """A (case or stage, limit) pair from CASE=LIMIT, as an argparse type."""
+    name, _, limit = value.partition("=")
+    try:
+        if not name:
+            raise ValueError
+        limit = float(limit)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected CASE=LIMIT with a number as LIMIT, got {value!r}")
+    if not math.isfinite(limit):
+        raise argparse.ArgumentTypeError(f"limit of {value!r} is not a finite number")
+    return name, limit
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Profiles per case")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--render-sample", type=int, default=50, help="Max profiles actually rendered per render case")
+    parser.add_argument("--repeats", type=int, default=5, help="Timings per case (the best is kept)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="JSON file to write the results to")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline results to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown vs the baseline (0.2 = 20%%)")
+    parser.add_argument(
+        "--case-threshold",
+        action="append",
+        type=parse_case_threshold,
+        default=[],
+        metavar="CASE=LIMIT",
+        help="Allowed slowdown for one stage (e.g. pdf=0.5) or case (e.g. png/1000=0.3); repeatable",
+    )
+    args = parser.parse_args()
+
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.platform(),
+        "cpus": os.cpu_count(),
+        "seed": args.seed,
+        "cases": run_suite(args.sizes, args.stages, args.seed, args.repeats, args.render_sample),
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"baseline stored in {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}, run with --save-baseline to store one")
+        return
+    with open(args.baseline, "r") as f:
+        baseline = json.load(f)
+    regressions = compare(results["cases"], baseline, args.threshold, dict(args.case_threshold))
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,388 @@
+"""
+Headless load test of the Streamlit app: concurrent simulated users driven through disc_style.py with AppTest.
+
+Every simulated user is an AppTest session on a thread of its own, clicking
+through the app back to back like a browser would (a click in the question
+page fragment reruns only the fragment). Users take one of two flows:
+
+- assessment: the welcome page, "Let's Begin", the 30 answered question
+  pages, the results page, and the "Download PDF Report" click (the PDF is
+  fetched from the media file manager and checked)
+- upload: the welcome page, "Upload Previous Results", a JSON upload of
+  normalized scores and the results page it leads to
+
+All sessions share one runtime (media files, caches) in one process, like
+the sessions of one Streamlit server, so each concurrency level shows what
+one pod sees: the latency of every interaction (the script reruns a click
+causes, as the user waits for them) by step, script runs/s, peak RSS and
+live matplotlib figures. Levels run in increasing order in one process, each
+with its own users; a user's session is dropped once their flow is done.
+
+Write the results with -o and compare two of them, e.g. across commits:
+
+    python benchmarks/load_app.py --concurrency 1 2 4 8 -o after.json
+    git worktree add /tmp/before HEAD~1
+    python benchmarks/load_app.py --app /tmp/before/disc_style.py -o before.json
+    python benchmarks/load_app.py --compare before.json after.json
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import numpy as np
+import streamlit
+from streamlit.components.v2.component_manager import BidiComponentManager
+from streamlit.runtime import Runtime
+from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+from streamlit.runtime.dataframe_source_manager import DataframeSourceManager
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+from streamlit.testing.v1 import AppTest, app_test
+from streamlit.testing.v1.util import patch_config_options
+
+from bench_question_page import ROOT, FragmentAwareRunner, click
+
+STEPS = ("welcome", "begin", "question", "results", "pdf_download", "upload_open", "upload")
+PERCENTILES = (50, 90, 99)
+
+
+class SessionRunner(FragmentAwareRunner):
+    """FragmentAwareRunner under the session id of the simulated user driving it."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # AppTest runs every app as "test session id"; sessions sharing a
+        # runtime need ids of their own, or they drop each other's media files
+        self._session_id = FragmentAwareRunner.driver().session_id
+
+
+def share_runtime():
+    """
+    One runtime for every session, in place of the one AppTest creates per run.
+
+    AppTest sets the Runtime singleton and patches the config for the length
+    of a run, so concurrent runs would unset them under each other.
+    """
+    storage = MemoryMediaFileStorage("/mock/media")
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(storage)
+    runtime.dataframe_source_mgr = DataframeSourceManager()
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    runtime.bidi_component_registry = BidiComponentManager()
+    runtime.bidi_component_registry.discover_and_register_components(start_file_watching=False)
+    Runtime.instance = classmethod(lambda cls: runtime)
+    Runtime.exists = classmethod(lambda cls: True)
+    app_test.patch_config_options = lambda overrides: contextlib.nullcontext()
+    app_test.LocalScriptRunner = SessionRunner
+    return runtime, storage
+
+
+def rss_mb():
+    # Current resident set size, falling back to the peak where /proc is missing
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def live_figures():
+    """Live matplotlib Figure objects (disc_plot never uses pyplot, so pyplot's figure count says nothing)."""
+    figure = sys.modules.get("matplotlib.figure")
+    if figure is None:
+        return 0
+    return sum(isinstance(obj, figure.Figure) for obj in gc.get_objects())
+
+
+class Sampler(threading.Thread):
+    """Peak RSS every `interval` seconds and peak live figures every `figure_interval` seconds."""
+
+    def __init__(self, interval=0.05, figure_interval=2.0):
+        super().__init__(name="load-sampler", daemon=True)
+        self.interval = interval
+        self.figure_interval = figure_interval
+        self.stopped = threading.Event()
+        self.peak_rss = rss_mb()
+        self.peak_figures = live_figures()
+
+    def run(self):
+        next_figures = time.perf_counter() + self.figure_interval
+        while not self.stopped.wait(self.interval):
+            self.peak_rss = max(self.peak_rss, rss_mb())
+            # Walking every object holds the GIL, so figures are counted sparingly
+            if time.perf_counter() >= next_figures:
+                self.peak_figures = max(self.peak_figures, live_figures())
+                next_figures = time.perf_counter() + self.figure_interval
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+class SimulatedUser:
+    """One user's session, timing every interaction into `latencies` {step: [seconds]}."""
+
+    def __init__(self, app, user, latencies, runtime, storage, think_time, timeout):
+        self.rng = random.Random(user)
+        self.at = AppTest.from_file(app, default_timeout=timeout)
+        # AppTest scans the installed components once per session otherwise
+        # (about 0.1 s), which would be counted as the welcome page's latency
+        self.at._bidi_component_manager = runtime.bidi_component_registry
+        self.latencies = latencies
+        self.storage = storage
+        self.think_time = think_time
+
+    def interact(self, step, action):
+        if self.think_time:
+            time.sleep(self.rng.uniform(0, 2 * self.think_time))
+        started = time.perf_counter()
+        action()
+        elapsed = time.perf_counter() - started
+        if self.at.exception:
+            raise RuntimeError(f"{step}: {self.at.exception[0].message}")
+        # The last question page also renders the results page
+        if step == "question" and self.at.session_state["show_results"]:
+            step = "results"
+        self.latencies[step].append(elapsed)
+
+    def assessment(self):
+        at = self.at
+        self.interact("welcome", at.run)
+        begin = next(button for button in at.button if button.label == "Let's Begin")
+        self.interact("begin", lambda: click(at, begin))
+        while not at.session_state["show_results"]:
+            # Private, but the only place AppTest keeps the fragments the app registered
+            fragment_ids = list(at._fragment_storage._fragments)
+            for radio in at.radio:
+                radio.set_value(radio.options[self.rng.randint(1, 5)])
+            self.interact("question", lambda: click(at, at.button[0], fragment_ids))
+
+        download = next(button for button in at.download_button if button.label == "Download PDF Report")
+        # What the browser fetches: the file behind the button's media URL
+        pdf = self.storage.get_file(download.proto.url.rsplit("/", 1)[-1]).content
+        if not pdf.startswith(b"%PDF"):
+            raise RuntimeError("pdf_download: not a PDF")
+        self.interact("pdf_download", lambda: click(at, download))
+
+    def upload(self):
+        at = self.at
+        self.interact("welcome", at.run)
+        upload = next(checkbox for checkbox in at.checkbox if checkbox.label == "Upload Previous Results")
+        self.interact("upload_open", lambda: upload.check().run())
+        scores = {style: round(self.rng.uniform(0, 100), 2) for style in "DISC"}
+        at.file_uploader[0].upload("disc_results.json", json.dumps(scores).encode(), "application/json")
+        self.interact("upload", at.run)
+        if not at.session_state["show_results"]:
+            raise RuntimeError("upload: results page not shown")
+
+
+def run_user(app, user, flow, latencies, runtime, storage, think_time, timeout):
+    """Run one simulated user's flow on the calling thread; returns the number of script runs it caused."""
+    driver = FragmentAwareRunner.driver()
+    driver.session_id = f"user-{user}"
+    driver.runs.clear()
+    try:
+        getattr(SimulatedUser(app, user, latencies, runtime, storage, think_time, timeout), flow)()
+    finally:
+        # Like a server when the browser tab closes: the session's media files go
+        runtime.media_file_mgr.clear_session_refs(driver.session_id)
+        runtime.media_file_mgr.remove_orphaned_files()
+    return len(driver.runs)
+
+
+def percentiles(seconds):
+    if not seconds:
+        return None
+    ms = np.array(seconds) * 1000
+    summary = {"count": len(ms)}
+    summary.update({f"p{q}": float(np.percentile(ms, q)) for q in PERCENTILES})
+    summary["max"] = float(ms.max())
+    return summary
+
+
+def run_level(app, concurrency, first_user, users, upload_share, runtime, storage, think_time, timeout):
+    latencies = {step: [] for step in STEPS}
+    flows = ["upload" if random.Random(user).random() < upload_share else "assessment"
+             for user in range(first_user, first_user + users)]
+    gc.collect()
+    rss_start = rss_mb()
+    sampler = Sampler()
+    sampler.start()
+    started = time.perf_counter()
+    errors = []
+    script_runs = 0
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="user") as pool:
+        futures = [
+            pool.submit(run_user, app, user, flow, latencies, runtime, storage, think_time, timeout)
+            for user, flow in zip(range(first_user, first_user + users), flows)
+        ]
+        for future in futures:
+            try:
+                script_runs += future.result()
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+    elapsed = time.perf_counter() - started
+    sampler.stop()
+    gc.collect()
+
+    return {
+        "concurrency": concurrency,
+        "users": users,
+        "uploads": flows.count("upload"),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "seconds": elapsed,
+        "users_per_minute": users / elapsed * 60,
+        "script_runs_per_second": script_runs / elapsed,
+        "latency_ms": {
+            "all": percentiles([seconds for step in STEPS for seconds in latencies[step]]),
+            **{step: percentiles(latencies[step]) for step in STEPS if latencies[step]},
+        },
+        "rss_start_mb": rss_start,
+        "peak_rss_mb": sampler.peak_rss,
+        "rss_end_mb": rss_mb(),
+        "peak_live_figures": sampler.peak_figures,
+        "live_figures_end": live_figures(),
+    }
+
+
+def format_level(level):
+    lines = [
+        f"concurrency {level['concurrency']}: {level['users']} users ({level['uploads']} uploads) in "
+        f"{level['seconds']:.1f} s, {level['users_per_minute']:.0f} users/min, "
+        f"{level['script_runs_per_second']:.0f} script runs/s, {level['errors']} errors",
+        f"  {'step':<13} {'count':>6} " + " ".join(f"{f'p{q} ms':>9}" for q in PERCENTILES) + f" {'max ms':>9}",
+    ]
+    for step, summary in level["latency_ms"].items():
+        lines.append(
+            f"  {step:<13} {summary['count']:>6} "
+            + " ".join(f"{summary[f'p{q}']:>9.1f}" for q in PERCENTILES)
+            + f" {summary['max']:>9.1f}"
+        )
+    lines.append(
+        f"  RSS {level['rss_start_mb']:.0f} -> peak {level['peak_rss_mb']:.0f} MB (end {level['rss_end_mb']:.0f} MB), "
+        f"live figures peak {level['peak_live_figures']} (end {level['live_figures_end']})"
+    )
+    if level["first_error"]:
+        lines.append(f"  first error: {level['first_error']}")
+    return "\n".join(lines)
+
+
+# Compared per concurrency level: (label, value of a level)
+COMPARED = (
+    ("users/min", lambda level: level["users_per_minute"]),
+    ("all p50 ms", lambda level: level["latency_ms"]["all"]["p50"]),
+    ("all p99 ms", lambda level: level["latency_ms"]["all"]["p99"]),
+    ("question p99 ms", lambda level: level["latency_ms"]["question"]["p99"]),
+    ("results p50 ms", lambda level: level["latency_ms"]["results"]["p50"]),
+    ("pdf_download p50 ms", lambda level: level["latency_ms"]["pdf_download"]["p50"]),
+    ("upload p50 ms", lambda level: level["latency_ms"]["upload"]["p50"]),
+    ("peak RSS MB", lambda level: level["peak_rss_mb"]),
+    ("peak live figures", lambda level: level["peak_live_figures"]),
+)
+
+
+def compare(before, after):
+    """Print the metrics of two result files side by side, per concurrency level they share."""
+    print(f"before: {before['app']} ({before['commit'] or 'unknown commit'})")
+    print(f"after:  {after['app']} ({after['commit'] or 'unknown commit'})")
+    levels = {level["concurrency"]: level for level in before["levels"]}
+    for level in after["levels"]:
+        base = levels.get(level["concurrency"])
+        if base is None:
+            continue
+        print(f"concurrency {level['concurrency']}:")
+        for label, value in COMPARED:
+            try:
+                old, new = value(base), value(level)
+            except KeyError:
+                continue  # a step neither run reached, e.g. no upload users
+            change = f"{new / old - 1:+8.1%}" if old else ""
+            print(f"  {label:<20} {old:>10.1f} -> {new:>10.1f} {change}")
+
+
+def git_commit(path):
+    try:
+        return subprocess.run(
+            ["git", "-C", path, "describe", "--always", "--dirty"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--app", default=os.path.join(ROOT, "disc_style.py"), help="Streamlit script to drive")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8], help="Concurrent users per level")
+    parser.add_argument("--rounds", type=int, default=2, help="Users per level, per concurrent user")
+    parser.add_argument("--upload-share", type=float, default=0.25, help="Share of users taking the upload flow")
+    parser.add_argument("--think-time", type=float, default=0, help="Mean seconds between a user's interactions")
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds allowed per script run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="JSON file to write the results to")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="Compare two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        results = []
+        for path in args.compare:
+            with open(path, "r") as f:
+                results.append(json.load(f))
+        compare(*results)
+        return
+
+    args.app = os.path.abspath(args.app)
+    # The app imports its sibling modules, from the checkout it lives in
+    sys.path.insert(0, os.path.dirname(args.app))
+    runtime, storage = share_runtime()
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "app": args.app,
+        "commit": git_commit(os.path.dirname(args.app)),
+        "python": platform.python_version(),
+        "streamlit": streamlit.__version__,
+        "machine": platform.platform(),
+        "cpus": os.cpu_count(),
+        "seed": args.seed,
+        "rounds": args.rounds,
+        "upload_share": args.upload_share,
+        "think_time": args.think_time,
+        "levels": [],
+    }
+
+    # Users are numbered across levels from the seed, so no level meets the
+    # profiles (and cached reports) of another
+    first_user = args.seed * 1_000_000
+    with patch_config_options({"global.appTest": True}):
+        # One user of each flow pays for imports and first-use caches first
+        warm_up = {step: [] for step in STEPS}
+        for flow in ("assessment", "upload"):
+            run_user(args.app, first_user, flow, warm_up, runtime, storage, 0, args.timeout)
+            first_user += 1
+        for concurrency in args.concurrency:
+            users = concurrency * args.rounds
+            level = run_level(args.app, concurrency, first_user, users, args.upload_share, runtime, storage,
+                              args.think_time, args.timeout)
+            first_user += users
+            results["levels"].append(level)
+            print(format_level(level), flush=True)
+    print(f"process peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Load generator for disc_service.py: p50/p99 latency and requests/s per endpoint.
+
+    python disc_service.py --port 8000 &
+    python benchmarks/load_service.py --port 8000 --endpoint score --concurrency 64 --requests 20000
+
+or let it start (and stop) a service of its own:
+
+    python benchmarks/load_service.py --spawn --endpoint report --concurrency 8 --requests 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import disc_scoring  # noqa: E402
+import disc_synthetic  # noqa: E402
+
+
+def payloads(endpoint, count, seed):
+    """Request bodies for `endpoint`, from seeded synthetic respondents."""
+    rng = np.random.default_rng(seed)
+    answers = disc_synthetic.synthetic_answers(count, rng)
+    if endpoint == "score":
+        return [
+            json.dumps({"answers": {str(q): int(row[q]) for q in np.flatnonzero(row)}}).encode()
+            for row in answers
+        ]
+    normalized = disc_scoring.score_answers(answers).normalized
+    return [json.dumps({"normalized_score": disc_scoring.to_score_dict(row)}).encode() for row in normalized]
+
+
+async def client(host, port, path, bodies, latencies, errors):
+    # One keep-alive connection sending its requests back to back
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for body in bodies:
+            started = time.perf_counter()
+            writer.write(
+                f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+            )
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.decode("latin-1").split("\r\n")[1:]:
+                name, _, value = line.partition(":")
+                if name.strip().lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - started)
+            if not head.startswith(b"HTTP/1.1 200"):
+                errors.append(head.split(b"\r\n", 1)[0].decode())
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, endpoint, bodies, concurrency):
+    latencies = []
+    errors = []
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        client(host, port, f"/{endpoint}", bodies[i::concurrency], latencies, errors)
+        for i in range(concurrency)
+    ))
+    return np.array(latencies), errors, time.perf_counter() - started
+
+
+def spawn_service(workers):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "disc_service.py"), "--port", str(port), "--workers", str(workers)],
+        stdout=subprocess.PIPE,
+    )
+    process.stdout.readline()  # "listening on ..." once the socket is bound
+    return process, port
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--endpoint", choices=("score", "classify", "report"), default="score")
+    parser.add_argument("--concurrency", type=int, default=64, help="Concurrent keep-alive connections")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--spawn", action="store_true", help="Start a disc_service.py of its own on a free port")
+    parser.add_argument("--workers", type=int, default=1, help="Render workers of the spawned service")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    bodies = payloads(args.endpoint, args.requests, args.seed)
+    process = None
+    if args.spawn:
+        process, args.port = spawn_service(args.workers)
+    try:
+        # A short warm-up so connection setup and first-use costs are not measured
+        asyncio.run(run_load(args.host, args.port, args.endpoint, bodies[:args.concurrency], args.concurrency))
+        latencies, errors, elapsed = asyncio.run(
+            run_load(args.host, args.port, args.endpoint, bodies, args.concurrency)
+        )
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    print(
+        f"{args.endpoint}: {len(latencies)} requests, {args.concurrency} connections  "
+        f"{len(latencies) / elapsed:,.0f} req/s  "
+        f"p50 {np.percentile(latencies, 50) * 1000:.2f} ms  "
+        f"p99 {np.percentile(latencies, 99) * 1000:.2f} ms  "
+        f"errors {len(errors)}"
+    )
+    if errors:
+        print(f"first error: {errors[0]}")
+
+
+if __name__ == "__main__":
+    main()
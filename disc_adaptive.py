@@ -0,0 +1,140 @@
+"""
+Adaptive question selection.
+
+Instead of a fixed random 30 of the item bank, the next question is the
+unasked one whose possible answers are most likely to move the respondent's
+provisional profile out of its current sector (see next_item()). The first
+question is drawn at random.
+
+The test stops early once the style classification is stable: at least
+`min_items` answers have been given, and at least `threshold` of bootstrap
+resamples of the answers agree with the current sector. The decision is made
+once, before each answer (see outlook()), so the page asking for an answer
+already knows whether it is the last one.
+"""
+import numpy as np
+
+import disc_scoring
+import disc_session
+
+MIN_ITEMS = 8
+# Candidate items scored per pick (None: every unasked item of the bank)
+CANDIDATE_POOL = None
+CONFIDENCE_THRESHOLD = 0.9
+BOOTSTRAP_SAMPLES = 200
+
+
+def _profiles(raw, bound):
+    # Style codes and resultant angles for arrays of running raw scores and bounds
+    normalized = disc_scoring.normalize(raw, -bound, bound)
+    angle, _ = disc_scoring.resultant(normalized)
+    return disc_scoring.classify(normalized, angle), angle
+
+
+def next_item(asked, raw_score, bound_score, rng, mapping=None, pool=CANDIDATE_POOL):
+    """
+    Item bank row of the next question to ask.
+
+    `asked` is a boolean mask over the item bank. Each candidate is scored by
+    looking one answer ahead: the provisional style is recomputed for each of
+    its five possible answers, normalized over the asked questions as the
+    final score is, and the item with the most answers that would change the
+    current style is chosen. Scores are normalized over the asked questions
+    only, so ties go to the item that keeps the styles' share of the asked
+    bounds closest to the whole bank's, then at random. `pool` limits the
+    candidates to that many random unasked items.
+    """
+    if mapping is None:
+        mapping = disc_scoring.load_mapping_matrix()
+    unasked = np.flatnonzero(~np.asarray(asked, dtype=bool))
+    # Random order, so that the sort below breaks the remaining ties at random
+    candidates = rng.permutation(unasked) if pool is None else rng.choice(unasked, min(pool, len(unasked)), replace=False)
+    rows = mapping[candidates].astype(np.int32)
+
+    weights = disc_scoring.ANSWER_WEIGHTS[1:].astype(np.int32)
+    raw = raw_score + rows[:, None, :] * weights[None, :, None]  # (candidates x 5 answers x 4)
+    bound = np.broadcast_to((bound_score + 2 * np.abs(rows))[:, None, :], raw.shape)
+    codes, _ = _profiles(raw.reshape(-1, len(disc_scoring.STYLES)), bound.reshape(-1, len(disc_scoring.STYLES)))
+    current, _ = _profiles(raw_score, bound_score)
+    changes = np.count_nonzero(codes.reshape(len(candidates), len(weights)) != current, axis=1)
+
+    bank_share = np.abs(mapping).sum(axis=0) / np.abs(mapping).sum()
+    new_bound = bound_score + 2 * np.abs(rows)
+    skew = np.abs(new_bound / new_bound.sum(axis=1, keepdims=True) - bank_share).sum(axis=1)
+    return int(candidates[np.lexsort((skew, -changes))[0]])
+
+
+def classification_confidence(item_indices, answers, rng, samples=BOOTSTRAP_SAMPLES, mapping=None):
+    """
+    Fraction of bootstrap resamples of the given answers classified like the answers themselves.
+
+    `item_indices` and `answers` are the item bank rows and 1-5 answers of the
+    questions answered so far.
+    """
+    if mapping is None:
+        mapping = disc_scoring.load_mapping_matrix()
+    rows = mapping[np.asarray(item_indices)].astype(np.int32)
+    weights = disc_scoring.ANSWER_WEIGHTS[np.asarray(answers)].astype(np.int32)
+    contributions = rows * weights[:, None]
+    bounds = 2 * np.abs(rows)
+
+    code, _ = _profiles(contributions.sum(axis=0), bounds.sum(axis=0))
+    picks = rng.integers(0, len(rows), (samples, len(rows)))
+    codes, _ = _profiles(contributions[picks].sum(axis=1), bounds[picks].sum(axis=1))
+    return float(np.mean(codes == code))
+
+
+def outlook(item_indices, answers, rng, min_items=MIN_ITEMS, threshold=CONFIDENCE_THRESHOLD, mapping=None):
+    """
+    (progress, ends) of an adaptive test before its next answer.
+
+    `progress` (0-1) is the share of questions answered, plus the rest scaled by
+    how close the answers are to stopping: enough of them and a stable enough
+    classification. `ends` is the stop decision for the next answer, to pass
+    on to advance(): True when it is the last question, or when the
+    classification is already stable and that answer reaches `min_items`.
+    """
+    answered = np.frombuffer(bytes(answers), dtype=np.uint8)
+    count = int(np.count_nonzero(answered))
+    if count + 1 >= len(answers):
+        return count / len(answers), True
+    if not count:
+        return 0.0, False
+    confidence = classification_confidence(
+        np.asarray(item_indices)[answered > 0], answered[answered > 0], rng, mapping=mapping
+    )
+    answered_share = count / len(answers)
+    stability = min(count / min_items, 1) * min(confidence / threshold, 1)
+    progress = answered_share + (1 - answered_share) * stability
+    return progress, count + 1 >= min_items and confidence >= threshold
+
+
+def new_adaptive_items(count=disc_session.QUESTIONS_PER_SESSION, rng=None, mapping=None):
+    """
+    Item indices for an adaptive session: the first question is drawn at random, the
+    rest are -1 until the answers so far decide them.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    if mapping is None:
+        mapping = disc_scoring.load_mapping_matrix()
+    item_indices = np.full(count, -1, dtype=np.int16)
+    item_indices[0] = rng.integers(len(mapping))
+    return item_indices
+
+
+def advance(item_indices, raw_score, bound_score, position, ends, rng, mapping=None, pool=CANDIDATE_POOL):
+    """
+    After the answer at `position`, pick the next question in place.
+
+    `ends` is the decision outlook() made before that answer; when it is True
+    the test ends instead and False is returned. `pool` is passed to next_item().
+    """
+    if mapping is None:
+        mapping = disc_scoring.load_mapping_matrix()
+    if ends or position + 1 >= len(item_indices):
+        return False
+    asked = np.zeros(len(mapping), dtype=bool)
+    asked[item_indices[item_indices >= 0]] = True
+    item_indices[position + 1] = next_item(asked, raw_score, bound_score, rng, mapping, pool)
+    return True
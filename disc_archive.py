@@ -0,0 +1,324 @@
+"""
+Append-only columnar archive of scored profiles, read zero-copy with np.memmap.
+
+An archive is a directory with one fixed-width binary file per column and
+an archive.json header holding the committed row count:
+
+    normalized.f32   (rows x 4) float32 normalized D, I, S, C scores
+    angle.f32        (rows,) float32 resultant angle, radians
+    magnitude.f32    (rows,) float32 resultant magnitude
+    style.u1         (rows,) uint8 style code, see disc_scoring.STYLE_KEYS
+    created_at.i8    (rows,) int64 unix milliseconds
+    answers.i1       (rows x questions) int8 answers, one column per question
+                     of questions.json (0 = not asked)
+    id_end.i8        (rows,) int64 end offset of each row's id in ids.json
+    ids.json         respondent ids, JSON-encoded back to back (empty for
+                     rows appended without an id)
+
+Aggregates over the whole history are NumPy reductions over the mapped
+columns, in chunks, so no JSON is parsed and memory stays bounded:
+
+    archive = ColumnArchive("history")
+    archive.append(answers, disc_scoring.score_answers(answers))
+    archive.style_counts(since=disc_store.now_ms() - 7 * 86_400_000)
+    archive.column("normalized")[:1000]
+
+Appends write the column files past the committed rows first and then
+replace archive.json, so readers never see a partially written row and an
+interrupted append is simply overwritten by the next one. One writer at a
+time; any number of readers.
+"""
+import json
+import math
+import os
+
+import numpy as np
+
+import disc_data
+import disc_scoring
+import disc_store
+
+ARCHIVE_VERSION = 2
+HEADER = "archive.json"
+IDS_FILE = "ids.json"
+SCAN_CHUNK_SIZE = 1_000_000
+# Fields of a JSON result that columns_from_json() keeps as stored, all or none of them
+STORED_FIELDS = ("resultant_angle", "resultant_magnitude", "style")
+
+
+def _layout(n_questions):
+    # Column name -> (file, dtype, shape of one row)
+    return {
+        "normalized": ("normalized.f32", np.dtype("<f4"), (len(disc_scoring.STYLES),)),
+        "angle": ("angle.f32", np.dtype("<f4"), ()),
+        "magnitude": ("magnitude.f32", np.dtype("<f4"), ()),
+        "style": ("style.u1", np.dtype("u1"), ()),
+        "created_at": ("created_at.i8", np.dtype("<i8"), ()),
+        "answers": ("answers.i1", np.dtype("i1"), (n_questions,)),
+        "id_end": ("id_end.i8", np.dtype("<i8"), ()),
+    }
+
+
+class ColumnArchive:
+    """
+    A columnar archive directory; created (for the current item bank) if it does not exist.
+
+    Raises ValueError if the archive was written for a different questions.json,
+    whose answer columns would no longer line up with the questions.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        header_path = os.path.join(path, HEADER)
+        if os.path.exists(header_path):
+            with open(header_path, "r") as f:
+                header = json.load(f)
+            if header["version"] != ARCHIVE_VERSION:
+                raise ValueError(f"Unsupported archive version {header['version']}")
+        else:
+            bank = disc_data.load_item_bank()
+            header = {"version": ARCHIVE_VERSION, "rows": 0, "questions": len(bank.mapping), "item_bank": bank.digest}
+            os.makedirs(path, exist_ok=True)
+            for file_name in [file_name for file_name, _, _ in _layout(header["questions"]).values()] + [IDS_FILE]:
+                open(os.path.join(path, file_name), "ab").close()
+            self._write_header(header)
+        self.header = header
+        self.layout = _layout(header["questions"])
+        self._check_item_bank()
+
+    def __len__(self):
+        return self.header["rows"]
+
+    def _check_item_bank(self):
+        digest = disc_data.load_item_bank().digest
+        if self.header["item_bank"] != digest:
+            raise ValueError(
+                f"Archive {self.path} was written for item bank {self.header['item_bank'][:12]}, "
+                f"but questions.json is now {digest[:12]}"
+            )
+
+    def _write_header(self, header):
+        # Atomic replace: this is the commit point of an append
+        tmp_path = os.path.join(self.path, HEADER + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(header, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, os.path.join(self.path, HEADER))
+
+    def _write_past_committed(self, file_name, offset, data):
+        with open(os.path.join(self.path, file_name), "r+b") as f:
+            # Anything past the committed rows is left over from an interrupted append
+            f.seek(offset)
+            f.write(data)
+            f.truncate()
+            f.flush()
+            os.fsync(f.fileno())
+
+    def append_columns(self, normalized, angle, magnitude, style, created_at, answers, ids=None):
+        """
+        Append rows given as one array per column; returns the number of rows appended.
+
+        `ids` are the respondent ids (any JSON value, None for none) of the rows.
+        """
+        self._check_item_bank()
+        rows = len(np.atleast_1d(angle))
+        committed = self.header["rows"]
+        encoded = [b"" if id_ is None else json.dumps(id_).encode() for id_ in ids] if ids is not None else [b""] * rows
+        if len(encoded) != rows:
+            raise ValueError(f"{len(encoded)} ids for {rows} rows")
+        ids_start = int(self.column("id_end")[-1]) if committed else 0
+        values = {
+            "normalized": normalized,
+            "angle": angle,
+            "magnitude": magnitude,
+            "style": style,
+            "created_at": created_at,
+            "answers": answers,
+            "id_end": ids_start + np.cumsum([len(id_) for id_ in encoded], dtype=np.int64),
+        }
+        self._write_past_committed(IDS_FILE, ids_start, b"".join(encoded))
+        for name, (file_name, dtype, shape) in self.layout.items():
+            column = np.ascontiguousarray(np.broadcast_to(np.asarray(values[name], dtype=dtype), (rows,) + shape))
+            self._write_past_committed(file_name, committed * dtype.itemsize * int(np.prod(shape)), column.tobytes())
+        self.header = dict(self.header, rows=committed + rows)
+        self._write_header(self.header)
+        return rows
+
+    def append(self, answers, scores, created_at=None, ids=None):
+        """
+        Append a batch of scored respondents.
+
+        `answers` is the (N x questions) answer matrix that was scored into
+        `scores` (disc_scoring.BatchScores); `created_at` defaults to now and
+        `ids` to no ids.
+        """
+        return self.append_columns(
+            scores.normalized,
+            scores.angle,
+            scores.magnitude,
+            scores.style,
+            disc_store.now_ms() if created_at is None else created_at,
+            np.atleast_2d(answers),
+            ids,
+        )
+
+    def append_json(self, records, created_at=None, line_numbers=None):
+        """Append JSON results (see columns_from_json()); returns the number of rows appended."""
+        return self.append_columns(**columns_from_json(records, self.header["questions"], created_at, line_numbers))
+
+    def column(self, name):
+        """A read-only np.memmap of one column over the committed rows."""
+        file_name, dtype, shape = self.layout[name]
+        rows = self.header["rows"]
+        if not rows:
+            return np.empty((0,) + shape, dtype=dtype)
+        return np.memmap(os.path.join(self.path, file_name), dtype=dtype, mode="r", shape=(rows,) + shape)
+
+    def ids(self, start=0, stop=None):
+        """Respondent ids of the rows [start, stop), None where a row was appended without one."""
+        stop = len(self) if stop is None else min(stop, len(self))
+        if start >= stop:
+            return []
+        ends = self.column("id_end")[start:stop].tolist()
+        first = int(self.column("id_end")[start - 1]) if start else 0
+        with open(os.path.join(self.path, IDS_FILE), "rb") as f:
+            f.seek(first)
+            data = f.read(ends[-1] - first)
+        starts = [0] + [end - first for end in ends[:-1]]
+        return [json.loads(data[a:end - first]) if end - first > a else None for a, end in zip(starts, ends)]
+
+    def _selected(self, since, until, chunk_size):
+        # Yield (slice, boolean mask or None) over the committed rows, chunk by chunk
+        created_at = self.column("created_at") if since is not None or until is not None else None
+        for start in range(0, len(self), chunk_size):
+            rows = slice(start, min(start + chunk_size, len(self)))
+            if created_at is None:
+                yield rows, None
+                continue
+            mask = np.ones(rows.stop - rows.start, dtype=bool)
+            if since is not None:
+                mask &= created_at[rows] >= since
+            if until is not None:
+                mask &= created_at[rows] < until
+            yield rows, mask
+
+    def style_counts(self, since=None, until=None, chunk_size=SCAN_CHUNK_SIZE):
+        """{style key: count} of the archived profiles created in [since, until)."""
+        style = self.column("style")
+        counts = np.zeros(len(disc_scoring.STYLE_KEYS), dtype=np.int64)
+        for rows, mask in self._selected(since, until, chunk_size):
+            codes = style[rows] if mask is None else style[rows][mask]
+            counts += np.bincount(codes, minlength=len(counts))
+        return {key: int(count) for key, count in zip(disc_scoring.STYLE_KEYS, counts) if count}
+
+    def mean_scores(self, since=None, until=None, chunk_size=SCAN_CHUNK_SIZE):
+        """Mean normalized D, I, S, C scores of the profiles created in [since, until) (None if none)."""
+        normalized = self.column("normalized")
+        total = np.zeros(len(disc_scoring.STYLES), dtype=np.float64)
+        count = 0
+        for rows, mask in self._selected(since, until, chunk_size):
+            block = normalized[rows] if mask is None else normalized[rows][mask]
+            total += block.sum(axis=0, dtype=np.float64)
+            count += len(block)
+        return disc_scoring.to_score_dict(total / count) if count else None
+
+    def iter_json(self, start=0, stop=None, chunk_size=10000):
+        """Yield archived rows as JSON-ready dicts, in the format of the score command plus store fields."""
+        stop = len(self) if stop is None else min(stop, len(self))
+        columns = {name: self.column(name) for name in self.layout}
+        for chunk_start in range(start, stop, chunk_size):
+            rows = slice(chunk_start, min(chunk_start + chunk_size, stop))
+            # Convert each column to Python values once instead of element by element
+            values = zip(
+                range(rows.start, rows.stop),
+                self.ids(rows.start, rows.stop),
+                columns["created_at"][rows].tolist(),
+                columns["answers"][rows],
+                columns["normalized"][rows].tolist(),
+                columns["angle"][rows].tolist(),
+                columns["magnitude"][rows].tolist(),
+                columns["style"][rows].tolist(),
+            )
+            for row, id_, created_at, answers, normalized, angle, magnitude, style in values:
+                yield {
+                    # Rows appended without an id are numbered by their position
+                    "id": row if id_ is None else id_,
+                    "created_at": created_at,
+                    "answers": {str(q): int(answers[q]) for q in np.flatnonzero(answers)},
+                    "normalized_score": dict(zip(disc_scoring.STYLES, normalized)),
+                    "resultant_angle": angle,
+                    "resultant_magnitude": magnitude,
+                    "style": disc_scoring.STYLE_KEYS[style],
+                }
+
+
+def _stored_profile(record):
+    # (angle, magnitude, style code) of a result's stored fields; raises ValueError if any is invalid
+    values = []
+    for field in STORED_FIELDS[:2]:
+        value = record[field]
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+            raise ValueError(f"{field} {value!r} is not a finite number")
+        values.append(float(value))
+    if record["style"] not in disc_scoring.STYLE_KEYS:
+        raise ValueError(f"style {record['style']!r} is not one of {', '.join(disc_scoring.STYLE_KEYS)}")
+    return values[0], values[1], disc_scoring.STYLE_KEYS.index(record["style"])
+
+
+def columns_from_json(records, n_questions, created_at=None, line_numbers=None):
+    """
+    Column arrays (for ColumnArchive.append_columns()) from JSON results.
+
+    Each record is either a result of `disc_cli.py score` / `export` (with
+    "normalized_score", and optionally "id", "answers", "created_at" and the
+    resultant angle, magnitude and style) or the app's JSON download (the
+    normalized scores). Missing resultants and styles are computed from the
+    normalized scores; missing timestamps default to `created_at`, or now.
+
+    Raises ValueError, naming the record by its entry in `line_numbers` (by
+    default its 1-based position), for the first malformed record or answer.
+    """
+    default_created_at = disc_store.now_ms() if created_at is None else created_at
+    records = list(records)
+    if line_numbers is None:
+        line_numbers = range(1, len(records) + 1)
+    normalized = np.zeros((len(records), len(disc_scoring.STYLES)), dtype=np.float64)
+    answers = np.zeros((len(records), n_questions), dtype=np.int8)
+    timestamps = np.full(len(records), default_created_at, dtype=np.int64)
+    stored = {}  # row -> (angle, magnitude, style code) of rows that carry their own
+    for n, (line_number, record) in enumerate(zip(line_numbers, records)):
+        try:
+            scores = record.get("normalized_score", record)
+            normalized[n] = [scores[style] for style in disc_scoring.STYLES]
+            for question, value in record.get("answers", {}).items():
+                col, answer = disc_scoring.checked_answer(question, value, n_questions)
+                answers[n, col] = answer
+            if "created_at" in record:
+                timestamps[n] = record["created_at"]
+            present = [field in record for field in STORED_FIELDS]
+            if all(present):
+                stored[n] = _stored_profile(record)
+            elif any(present):
+                raise ValueError(f"expected {', '.join(STORED_FIELDS)} together or none of them")
+        except (AttributeError, KeyError, TypeError):
+            raise ValueError(f'line {line_number}: expected {{"normalized_score": {{"D": .., "I": .., "S": .., "C": ..}}, ...}}') from None
+        except ValueError as e:
+            raise ValueError(f"line {line_number}: {e}") from None
+
+    angle, magnitude = disc_scoring.resultant(normalized)
+    style = disc_scoring.classify(normalized, angle)
+    # Keep stored values as they are, so archive -> JSON -> archive round-trips exactly
+    for n, (stored_angle, stored_magnitude, stored_style) in stored.items():
+        angle[n] = stored_angle
+        magnitude[n] = stored_magnitude
+        style[n] = stored_style
+    return {
+        "normalized": normalized,
+        "angle": angle,
+        "magnitude": magnitude,
+        "style": style,
+        "created_at": timestamps,
+        "answers": answers,
+        "ids": [record.get("id") for record in records],
+    }
@@ -0,0 +1,168 @@
+"""
+Content-addressed cache for rendered result artifacts (PNG, PDF, JSON).
+
+Artifacts are keyed by a hash of what they are rendered from (the normalized
+scores, the style description and the template version), so identical
+profiles and repeated reruns cost a dictionary lookup. The in-memory cache is
+an LRU bounded in bytes; evicted artifacts can optionally spill to a
+directory on disk, which is bounded in the same way. Spilled artifacts
+outlive the process: a new cache picks up what the spill directory holds,
+oldest first, within its own size limit.
+
+The process-wide cache is configured with environment variables:
+
+- DISC_ARTIFACT_CACHE_MB: in-memory size limit (default 64)
+- DISC_ARTIFACT_SPILL_DIR: directory for the on-disk spill (default: no spill)
+- DISC_ARTIFACT_SPILL_MB: on-disk size limit (default 512)
+
+Hits, misses and evictions are counted, and the cache sizes reported as
+gauges, through disc_metrics (artifact_cache_*).
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import disc_metrics
+
+# Spill file names are artifact keys (sha256 hex digests); anything else in the directory is left alone
+_KEY_PATTERN = re.compile(r"[0-9a-f]{64}")
+_SPILL_TMP_SUFFIX = ".tmp"
+
+
+def artifact_key(kind, normalized_score, style_description, template_version):
+    """Stable hash of everything an artifact is rendered from."""
+    payload = json.dumps(
+        [kind, normalized_score, style_description, template_version],
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ArtifactCache:
+    """Thread-safe LRU of bytes values bounded by total size, with optional disk spill."""
+
+    def __init__(self, max_bytes, spill_dir=None, max_spill_bytes=0):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.max_spill_bytes = max_spill_bytes
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._disk = OrderedDict()
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+            self._load_spill()
+
+    def get_or_create(self, key, factory):
+        """Return the cached bytes for `key`, calling `factory()` to render them on a miss."""
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                disc_metrics.inc("artifact_cache_hits")
+                return value
+            value = self._read_spill(key)
+            if value is not None:
+                disc_metrics.inc("artifact_cache_disk_hits")
+                self._store(key, value)
+                return value
+            disc_metrics.inc("artifact_cache_misses")
+
+        # Render outside the lock so other sessions are not blocked meanwhile
+        value = factory()
+        with self._lock:
+            self._store(key, value)
+        return value
+
+    def _store(self, key, value):
+        if key in self._memory:
+            return
+        self._memory[key] = value
+        self._memory_bytes += len(value)
+        while self._memory_bytes > self.max_bytes and self._memory:
+            old_key, old_value = self._memory.popitem(last=False)
+            self._memory_bytes -= len(old_value)
+            disc_metrics.inc("artifact_cache_evictions")
+            self._write_spill(old_key, old_value)
+        self._publish_sizes()
+
+    def _publish_sizes(self):
+        disc_metrics.set_gauge("artifact_cache_entries", len(self._memory))
+        disc_metrics.set_gauge("artifact_cache_bytes", self._memory_bytes)
+        disc_metrics.set_gauge("artifact_cache_spilled_entries", len(self._disk))
+        disc_metrics.set_gauge("artifact_cache_spilled_bytes", self._disk_bytes)
+
+    def _load_spill(self):
+        # Index the artifacts a previous process spilled, least recently written first
+        spilled = []
+        for entry in os.scandir(self.spill_dir):
+            if not entry.is_file():
+                continue
+            try:
+                if entry.name.endswith(_SPILL_TMP_SUFFIX) and _KEY_PATTERN.fullmatch(entry.name[: -len(_SPILL_TMP_SUFFIX)]):
+                    # A write that never completed
+                    os.remove(entry.path)
+                elif _KEY_PATTERN.fullmatch(entry.name):
+                    stat = entry.stat()
+                    spilled.append((stat.st_mtime_ns, entry.name, stat.st_size))
+            except OSError:
+                continue
+        for _, key, size in sorted(spilled):
+            self._disk[key] = size
+            self._disk_bytes += size
+        self._trim_spill()
+        self._publish_sizes()
+
+    def _trim_spill(self):
+        while self._disk_bytes > self.max_spill_bytes:
+            old_key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self._remove_spill(old_key)
+
+    def _spill_path(self, key):
+        return os.path.join(self.spill_dir, key)
+
+    def _read_spill(self, key):
+        if key not in self._disk:
+            return None
+        try:
+            with open(self._spill_path(key), "rb") as f:
+                value = f.read()
+        except OSError:
+            value = None
+        self._disk_bytes -= self._disk.pop(key)
+        self._remove_spill(key)
+        return value
+
+    def _write_spill(self, key, value):
+        if not self.spill_dir or len(value) > self.max_spill_bytes or key in self._disk:
+            return
+        # Written under a temporary name and renamed, so a crash never leaves a truncated artifact
+        tmp_path = self._spill_path(key) + _SPILL_TMP_SUFFIX
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(value)
+            os.replace(tmp_path, self._spill_path(key))
+        except OSError:
+            return
+        self._disk[key] = len(value)
+        self._disk_bytes += len(value)
+        self._trim_spill()
+
+    def _remove_spill(self, key):
+        try:
+            os.remove(self._spill_path(key))
+        except OSError:
+            pass
+
+
+artifact_cache = ArtifactCache(
+    max_bytes=int(float(os.environ.get("DISC_ARTIFACT_CACHE_MB", 64)) * 2**20),
+    spill_dir=os.environ.get("DISC_ARTIFACT_SPILL_DIR") or None,
+    max_spill_bytes=int(float(os.environ.get("DISC_ARTIFACT_SPILL_MB", 512)) * 2**20),
+)
@@ -0,0 +1,400 @@
+"""
+Command-line tools for working with DISC responses outside the Streamlit app.
+
+    python disc_cli.py score responses.jsonl -o results.jsonl --workers 4
+    python disc_cli.py reports results.jsonl -o reports.zip --workers 4
+    python disc_cli.py items responses.jsonl -o item_report.json --workers 4
+    python disc_cli.py stability --respondents 1000000 --workers 4 -o stability.json
+    python disc_cli.py import responses.jsonl --db results.db --cohort 2024-spring
+    python disc_cli.py export --db results.db --cohort 2024-spring -o history.jsonl
+    python disc_cli.py archive history.jsonl --archive history/
+    python disc_cli.py unarchive --archive history/ -o history.jsonl
+
+Input files hold one respondent per line/row, identified by question ids
+(the 0-based position of the question in questions.json):
+
+- JSONL: {"id": "alice", "answers": {"0": 4, "17": 2, ...}}, optionally with
+  forced-choice answers to streangths.json, {"strengths": {"0": "a", "5": "b", ...}},
+  in which case the top strengths are added to the results
+- CSV: a header of "id" followed by question ids, one row per respondent,
+  with an empty cell for questions the respondent was not asked.
+
+The reports command takes stored profiles: the output of the score command,
+or one app JSON download (the normalized scores) per line.
+
+stability runs the disc_stability Monte Carlo study of how often question
+sampling moves simulated respondents to another sector.
+
+import scores responses into a disc_store SQLite database chunk by chunk;
+export streams stored results back out as JSONL (which import accepts too).
+archive appends JSON results (the output of score or export, or app JSON
+downloads) to a disc_archive columnar archive; unarchive converts it back.
+"""
+import argparse
+import csv
+import itertools
+import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import disc_scoring
+import disc_strengths
+
+DEFAULT_CHUNK_SIZE = 10000
+# Answers that need no further checks (the common case, kept off the slow path)
+VALID_ANSWERS = frozenset(range(1, 6))
+VALID_ANSWER_CELLS = frozenset(str(answer) for answer in VALID_ANSWERS)
+
+
+def read_chunks(path, chunk_size):
+    """
+    Yield (format, header, lines, line numbers) chunks without ever reading the whole file.
+
+    Blank lines are skipped; line numbers are 1-based lines of the file, for error messages.
+    """
+    fmt = "csv" if path.lower().endswith(".csv") else "jsonl"
+    f = sys.stdin if path == "-" else open(path, "r", newline="")
+    try:
+        header = None
+        first_line = 1
+        if fmt == "csv":
+            header = next(csv.reader([f.readline()]))
+            first_line = 2
+        lines = ((n, line) for n, line in enumerate(f, first_line) if line.strip())
+        while True:
+            chunk = list(itertools.islice(lines, chunk_size))
+            if not chunk:
+                break
+            yield fmt, header, [line for _, line in chunk], [n for n, _ in chunk]
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def parse_chunk(fmt, header, lines, n_questions, line_numbers=None):
+    """
+    Parse a chunk of input lines into respondent ids, an int8 answer matrix and
+    the forced-choice strengths answers ({question id: "a" | "b"} per respondent,
+    or None when no respondent in the chunk has any).
+
+    Raises ValueError, naming the line, for the first line with an unknown
+    question id or an answer that is not an integer 1-5.
+    """
+    if line_numbers is None:
+        line_numbers = range(1, len(lines) + 1)
+    ids = []
+    strengths = []
+    answers = np.zeros((len(lines), n_questions), dtype=np.int8)
+    if fmt == "csv":
+        try:
+            columns = [disc_scoring.checked_answer(c, 1, n_questions)[0] for c in header[1:]]
+        except ValueError as e:
+            raise ValueError(f"line 1 (header): {e}") from None
+        for row, (line_number, values) in enumerate(zip(line_numbers, csv.reader(lines))):
+            ids.append(values[0])
+            try:
+                for col, value in zip(columns, values[1:]):
+                    if value in VALID_ANSWER_CELLS:
+                        answers[row, col] = int(value)
+                    elif value.strip():
+                        answers[row, col] = disc_scoring.checked_answer(col, value, n_questions)[1]
+            except ValueError as e:
+                raise ValueError(f"line {line_number}: {e}") from None
+    else:
+        for row, (line_number, line) in enumerate(zip(line_numbers, lines)):
+            try:
+                record = json.loads(line)
+                ids.append(record.get("id", None))
+                strengths.append(record.get("strengths"))
+                for question, value in record["answers"].items():
+                    col = int(question) if question.isdigit() else -1
+                    if not (0 <= col < n_questions and type(value) is int and value in VALID_ANSWERS):
+                        col, value = disc_scoring.checked_answer(question, value, n_questions)
+                    answers[row, col] = value
+            except (AttributeError, KeyError, TypeError):
+                raise ValueError(f'line {line_number}: expected {{"id": .., "answers": {{question id: 1-5, ...}}}}') from None
+            except ValueError as e:
+                raise ValueError(f"line {line_number}: {e}") from None
+    return ids, answers, (strengths if any(strengths) else None)
+
+
+def parse_records(lines, line_numbers):
+    """JSON records of input lines; raises ValueError naming the first line that is not JSON."""
+    records = []
+    for line_number, line in zip(line_numbers, lines):
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"line {line_number}: invalid JSON ({e.msg} at character {e.pos})") from None
+    return records
+
+
+def score_chunk(fmt, header, lines, line_numbers):
+    """Score one chunk and return it serialized as JSONL (runs in worker processes)."""
+    mapping = disc_scoring.load_mapping_matrix()
+    ids, answers, strengths = parse_chunk(fmt, header, lines, len(mapping), line_numbers)
+    scores = disc_scoring.score_answers(answers, mapping)
+
+    top = itertools.repeat(None)
+    if strengths is not None:
+        bank = disc_strengths.load_strengths_bank()
+        counts = disc_strengths.tally(disc_strengths.choices_matrix(strengths, len(bank.questions)), bank)
+        top = disc_strengths.strengths_results(counts, bank=bank)
+
+    # Convert the arrays to Python lists once instead of element by element
+    styles = disc_scoring.STYLES
+    rows = zip(
+        ids,
+        scores.normalized.tolist(),
+        scores.relative.tolist(),
+        scores.angle.tolist(),
+        scores.magnitude.tolist(),
+        scores.style.tolist(),
+        top,
+    )
+    out = []
+    for respondent_id, normalized, relative, angle, magnitude, style, respondent_strengths in rows:
+        result = {
+            "id": respondent_id,
+            "normalized_score": dict(zip(styles, normalized)),
+            "relative_percentages": dict(zip(styles, relative)),
+            "resultant_angle": angle,
+            "resultant_magnitude": magnitude,
+            "style": disc_scoring.STYLE_KEYS[style],
+        }
+        if respondent_strengths is not None:
+            result["strengths"] = respondent_strengths
+        out.append(json.dumps(result))
+    out.append("")
+    return len(ids), "\n".join(out)
+
+
+def report_progress(rows, started, done=False):
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    end = "\n" if done else ""
+    print(f"\rscored {rows} rows ({rows / elapsed:,.0f} rows/s)", end=end, file=sys.stderr, flush=True)
+
+
+def map_chunks(func, chunks, workers):
+    """Yield func(*chunk) for every chunk, in order, across `workers` processes."""
+    if workers <= 1:
+        for chunk in chunks:
+            yield func(*chunk)
+        return
+    # Keep at most two chunks per worker in flight so memory stays bounded
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(func, *chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def score_command(args):
+    out = sys.stdout if args.output == "-" else open(args.output, "w")
+    started = time.perf_counter()
+    rows = 0
+    try:
+        for n, text in map_chunks(score_chunk, read_chunks(args.input, args.chunk_size), args.workers):
+            out.write(text)
+            rows += n
+            report_progress(rows, started)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    report_progress(rows, started, done=True)
+
+
+def item_chunk(fmt, header, lines, line_numbers):
+    """Item statistics of one chunk (runs in worker processes)."""
+    import disc_items
+
+    mapping = disc_scoring.load_mapping_matrix()
+    _, answers, _ = parse_chunk(fmt, header, lines, len(mapping), line_numbers)
+    return disc_items.ItemStats(len(mapping)).update(answers, mapping)
+
+
+def items_command(args):
+    import disc_items
+
+    started = time.perf_counter()
+    stats = disc_items.ItemStats(len(disc_scoring.load_mapping_matrix()))
+    # Shards are merged exactly, so the result does not depend on --workers
+    for chunk_stats in map_chunks(item_chunk, read_chunks(args.input, args.chunk_size), args.workers):
+        stats.merge(chunk_stats)
+        report_progress(stats.respondents, started)
+    report_progress(stats.respondents, started, done=True)
+
+    report = stats.report()
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(disc_items.format_report(report, args.top))
+
+
+def stability_command(args):
+    import disc_stability
+
+    started = time.perf_counter()
+    stats = disc_stability.simulate(
+        args.respondents, args.replicates, args.subset_size, args.workers, args.seed, args.shard_size
+    )
+    elapsed = time.perf_counter() - started
+    report = stats.report()
+    print(f"simulated {report['sessions']} sessions in {elapsed:.1f} s "
+          f"({report['sessions'] / elapsed * 60:,.0f} sessions/min)", file=sys.stderr)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(disc_stability.format_report(report))
+
+
+def reports_command(args):
+    # Imported here so scoring does not pay for reportlab and matplotlib
+    import disc_report
+
+    writer = disc_report.ReportWriter(args.output)
+    try:
+        disc_report.generate_reports(
+            disc_report.read_profiles(args.input),
+            writer,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+        )
+    finally:
+        writer.close()
+
+
+def import_command(args):
+    import disc_store
+
+    mapping = disc_scoring.load_mapping_matrix()
+    started = time.perf_counter()
+    rows = 0
+    with disc_store.ResultStore(args.db) as store:
+        for fmt, header, lines, line_numbers in read_chunks(args.input, args.chunk_size):
+            ids, answers, _ = parse_chunk(fmt, header, lines, len(mapping), line_numbers)
+            rows += store.insert(ids, answers, disc_scoring.score_answers(answers, mapping), cohort=args.cohort)
+            report_progress(rows, started)
+        store.analyze()
+    report_progress(rows, started, done=True)
+
+
+def export_command(args):
+    import disc_store
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        with disc_store.ResultStore(args.db) as store:
+            count = store.export_jsonl(out, style=args.style, cohort=args.cohort, since=args.since, until=args.until)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"exported {count} results", file=sys.stderr)
+
+
+def archive_command(args):
+    import disc_archive
+
+    archive = disc_archive.ColumnArchive(args.archive)
+    started = time.perf_counter()
+    rows = 0
+    for _, _, lines, line_numbers in read_chunks(args.input, args.chunk_size):
+        rows += archive.append_json(parse_records(lines, line_numbers), line_numbers=line_numbers)
+        report_progress(rows, started)
+    report_progress(rows, started, done=True)
+
+
+def unarchive_command(args):
+    import disc_archive
+
+    archive = disc_archive.ColumnArchive(args.archive)
+    out = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        for result in archive.iter_json():
+            out.write(json.dumps(result) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"exported {len(archive)} results", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="DISC assessment command-line tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    score = subparsers.add_parser("score", help="Score a CSV/JSONL file of responses")
+    score.add_argument("input", help="CSV or JSONL file of responses ('-' for JSONL on stdin)")
+    score.add_argument("-o", "--output", default="-", help="JSONL file to write results to")
+    score.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Respondents scored per chunk")
+    score.add_argument("--workers", type=int, default=1, help="Number of worker processes")
+    score.set_defaults(func=score_command)
+
+    reports = subparsers.add_parser("reports", help="Render PDF reports for a JSONL file of stored profiles")
+    reports.add_argument("input", help="JSONL file of stored profiles")
+    reports.add_argument("-o", "--output", required=True, help="Zip file (*.zip) or directory to write the PDFs to")
+    reports.add_argument("--chunk-size", type=int, default=8, help="Reports rendered per worker task")
+    reports.add_argument("--workers", type=int, default=1, help="Number of worker processes")
+    reports.set_defaults(func=reports_command)
+
+    items = subparsers.add_parser("items", help="Item analysis of the item bank over a CSV/JSONL file of responses")
+    items.add_argument("input", help="CSV or JSONL file of responses ('-' for JSONL on stdin)")
+    items.add_argument("-o", "--output", help="JSON file to write the full report to")
+    items.add_argument("--top", type=int, default=20, help="Weakest items shown in the printed report")
+    items.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Respondents per shard")
+    items.add_argument("--workers", type=int, default=1, help="Number of worker processes")
+    items.set_defaults(func=items_command)
+
+    stability = subparsers.add_parser("stability", help="Simulate how stable styles are under question sampling")
+    stability.add_argument("--respondents", type=int, default=1000000, help="Synthetic respondents")
+    stability.add_argument("--replicates", type=int, default=10, help="Sessions (random subsets) per respondent")
+    stability.add_argument("--subset-size", type=int, default=30, help="Questions per session")
+    stability.add_argument("--shard-size", type=int, default=2000, help="Respondents per shard")
+    stability.add_argument("--workers", type=int, default=1, help="Number of worker processes")
+    stability.add_argument("--seed", type=int, default=0)
+    stability.add_argument("-o", "--output", help="JSON file to write the full report to")
+    stability.set_defaults(func=stability_command)
+
+    import_ = subparsers.add_parser("import", help="Score a CSV/JSONL file of responses into a results database")
+    import_.add_argument("input", help="CSV or JSONL file of responses ('-' for JSONL on stdin)")
+    import_.add_argument("--db", required=True, help="SQLite results database (created if missing)")
+    import_.add_argument("--cohort", help="Cohort label stored with every imported result")
+    import_.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Respondents stored per transaction")
+    import_.set_defaults(func=import_command)
+
+    export = subparsers.add_parser("export", help="Export stored results as JSONL")
+    export.add_argument("--db", required=True, help="SQLite results database")
+    export.add_argument("-o", "--output", default="-", help="JSONL file to write results to")
+    export.add_argument("--style", choices=disc_scoring.STYLE_KEYS, help="Only results of this style")
+    export.add_argument("--cohort", help="Only results of this cohort")
+    export.add_argument("--since", type=int, help="Only results stored at or after this unix time (ms)")
+    export.add_argument("--until", type=int, help="Only results stored before this unix time (ms)")
+    export.set_defaults(func=export_command)
+
+    archive = subparsers.add_parser("archive", help="Append JSONL results to a columnar archive")
+    archive.add_argument("input", help="JSONL file of results or app JSON downloads ('-' for stdin)")
+    archive.add_argument("--archive", required=True, help="Archive directory (created if missing)")
+    archive.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows appended at a time")
+    archive.set_defaults(func=archive_command)
+
+    unarchive = subparsers.add_parser("unarchive", help="Export a columnar archive as JSONL")
+    unarchive.add_argument("--archive", required=True, help="Archive directory")
+    unarchive.add_argument("-o", "--output", default="-", help="Output JSONL file ('-' for stdout)")
+    unarchive.set_defaults(func=unarchive_command)
+
+    args = parser.parse_args(argv)
+    try:
+        args.func(args)
+    except ValueError as e:
+        # Invalid input (the message names the line); no traceback
+        parser.exit(1, f"\n{parser.prog} {args.command}: error: {e}\n")
+
+
+if __name__ == "__main__":
+    main()
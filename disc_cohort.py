@@ -0,0 +1,155 @@
+"""
+Team and cohort analytics over many normalized profiles.
+
+Profiles are the {"D": .., "I": .., "S": .., "C": ..} dicts of normalized
+scores the app and the CLI produce, stacked into an (N x 4) matrix with
+profile_matrix(). From there:
+
+- style_distribution(): members per style (disc_scoring.STYLE_KEYS)
+- centroid(): mean normalized scores and the mean resultant vector on the
+  DISC wheel, i.e. where the team sits as a whole
+- similarity_matrix() / mean_similarity() / top_matches(): pairwise similarity of members,
+  1 - distance / MAX_DISTANCE between their normalized scores (1 for
+  identical profiles, 0 for opposite corners of the 0-100 score space)
+
+Pairwise work is done in tile_size x tile_size tiles, so memory stays
+bounded by the tile however large the cohort; only similarity_matrix(),
+which returns all N x N values, needs room for them (or an np.memmap `out`).
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+import disc_scoring
+
+# Distance between opposite corners of the [0, 100]^4 normalized score space
+MAX_DISTANCE = 200.0
+DEFAULT_TILE_SIZE = 2048
+
+
+class CohortSummary(NamedTuple):
+    size: int
+    style_counts: dict  # style key -> members
+    mean_scores: dict  # mean normalized D, I, S, C
+    centroid_angle: float  # angle (radians) of the mean resultant vector
+    centroid_magnitude: float  # magnitude of the mean resultant vector
+
+
+def profile_matrix(profiles):
+    """(N x 4) float64 matrix of normalized D, I, S, C scores from score dicts."""
+    return np.array([[profile[style] for style in disc_scoring.STYLES] for profile in profiles], dtype=np.float64)
+
+
+def style_distribution(normalized):
+    """Members per style code, an int64 array indexed like disc_scoring.STYLE_KEYS."""
+    normalized = np.atleast_2d(normalized)
+    angle, _ = disc_scoring.resultant(normalized)
+    codes = disc_scoring.classify(normalized, angle)
+    return np.bincount(codes, minlength=len(disc_scoring.STYLE_KEYS))
+
+
+def centroid(normalized):
+    """Mean normalized scores, and the angle and magnitude of the mean resultant vector."""
+    normalized = np.atleast_2d(normalized)
+    angle, magnitude = disc_scoring.resultant(normalized)
+    x = np.mean(magnitude * np.cos(angle))
+    y = np.mean(magnitude * np.sin(angle))
+    return normalized.mean(axis=0), float(np.arctan2(y, x)), float(np.hypot(x, y))
+
+
+def summarize(profiles):
+    """CohortSummary of a list of normalized score dicts (or an N x 4 matrix)."""
+    normalized = profiles if isinstance(profiles, np.ndarray) else profile_matrix(profiles)
+    counts = style_distribution(normalized)
+    mean_scores, angle, magnitude = centroid(normalized)
+    return CohortSummary(
+        size=len(normalized),
+        style_counts={key: int(count) for key, count in zip(disc_scoring.STYLE_KEYS, counts) if count},
+        mean_scores=disc_scoring.to_score_dict(mean_scores),
+        centroid_angle=angle,
+        centroid_magnitude=magnitude,
+    )
+
+
+def similarity(a, b):
+    """(len(a) x len(b)) float32 similarities between two sets of normalized profiles."""
+    a = np.atleast_2d(a).astype(np.float32)
+    b = np.atleast_2d(b).astype(np.float32)
+    # |a - b|^2 = |a|^2 + |b|^2 - 2 a.b, so the bulk of the work is one matrix product
+    squared = (a * a).sum(axis=1)[:, None] + (b * b).sum(axis=1)[None, :] - 2 * (a @ b.T)
+    np.maximum(squared, 0, out=squared)
+    return 1 - np.sqrt(squared, out=squared) / MAX_DISTANCE
+
+
+def similarity_tiles(normalized, tile_size=DEFAULT_TILE_SIZE):
+    """Yield (row start, column start, block) tiles covering the full similarity matrix."""
+    normalized = np.atleast_2d(normalized)
+    for i in range(0, len(normalized), tile_size):
+        rows = normalized[i:i + tile_size]
+        for j in range(0, len(normalized), tile_size):
+            yield i, j, similarity(rows, normalized[j:j + tile_size])
+
+
+def similarity_matrix(normalized, tile_size=DEFAULT_TILE_SIZE, out=None):
+    """
+    The full (N x N) float32 similarity matrix, filled tile by tile.
+
+    Pass an np.memmap as `out` for cohorts whose matrix does not fit in memory.
+    """
+    n = len(np.atleast_2d(normalized))
+    if out is None:
+        out = np.empty((n, n), dtype=np.float32)
+    for i, j, block in similarity_tiles(normalized, tile_size):
+        out[i:i + block.shape[0], j:j + block.shape[1]] = block
+    return out
+
+
+def mean_similarity(normalized, tile_size=DEFAULT_TILE_SIZE):
+    """Mean similarity over all pairs of distinct members (how alike the team is overall)."""
+    normalized = np.atleast_2d(normalized)
+    n = len(normalized)
+    if n < 2:
+        return float("nan")
+    total = sum(float(block.sum(dtype=np.float64)) for _, _, block in similarity_tiles(normalized, tile_size))
+    # Every member is fully similar (1) to themselves; leave those n pairs out
+    return (total - n) / (n * (n - 1))
+
+
+def top_matches(normalized, k=5, tile_size=DEFAULT_TILE_SIZE):
+    """
+    The k most similar other members of every member, most similar first.
+
+    Returns (N x k) member indices and their similarities. Only one row of
+    tiles is held at a time, so this scales to cohorts whose full matrix
+    would not fit in memory.
+    """
+    normalized = np.atleast_2d(normalized)
+    n = len(normalized)
+    k = min(k, n - 1)
+    indices = np.empty((n, k), dtype=np.int64)
+    scores = np.empty((n, k), dtype=np.float32)
+    if k <= 0:
+        return indices, scores
+    for i in range(0, n, tile_size):
+        rows = normalized[i:i + tile_size]
+        best_index = np.empty((len(rows), 0), dtype=np.int64)
+        best_score = np.empty((len(rows), 0), dtype=np.float32)
+        for j in range(0, n, tile_size):
+            block = similarity(rows, normalized[j:j + tile_size])
+            # A member is not their own match
+            own = np.arange(i, i + len(rows))
+            inside = (own >= j) & (own < j + block.shape[1])
+            block[np.flatnonzero(inside), own[inside] - j] = -np.inf
+
+            # Merge this tile's k best into the running k best of each row
+            candidates = np.argpartition(-block, min(k, block.shape[1]) - 1, axis=1)[:, :k]
+            best_index = np.concatenate([best_index, candidates + j], axis=1)
+            best_score = np.concatenate([best_score, np.take_along_axis(block, candidates, axis=1)], axis=1)
+            keep = np.argpartition(-best_score, min(k, best_score.shape[1]) - 1, axis=1)[:, :k]
+            best_index = np.take_along_axis(best_index, keep, axis=1)
+            best_score = np.take_along_axis(best_score, keep, axis=1)
+
+        order = np.argsort(-best_score, axis=1, kind="stable")
+        indices[i:i + len(rows)] = np.take_along_axis(best_index, order, axis=1)
+        scores[i:i + len(rows)] = np.take_along_axis(best_score, order, axis=1)
+    return indices, scores
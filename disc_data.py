@@ -0,0 +1,169 @@
+"""
+Process-wide, read-only cache of the item bank and the style descriptions.
+
+questions.json and disc_descriptions.json are parsed once per process and
+shared by every session, the CLI and the worker processes. Each access does a
+cheap os.stat(); when a file's mtime or size changes its content hash is
+checked and it is reloaded, so edits are picked up without a restart.
+"""
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from types import MappingProxyType
+from typing import NamedTuple
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+QUESTIONS_PATH = os.path.join(BASE_DIR, "questions.json")
+DESCRIPTIONS_PATH = os.path.join(BASE_DIR, "disc_descriptions.json")
+
+# Order of the style columns in the mapping matrix
+STYLES = ("D", "I", "S", "C")
+
+
+class ItemBank(NamedTuple):
+    questions: tuple  # question texts, in questions.json order
+    styles: tuple  # primary style of each question
+    mapping: np.ndarray  # read-only (questions x 4) int8 mapping matrix
+    index: MappingProxyType  # question text -> row in the mapping matrix
+    digest: str  # sha256 of questions.json
+
+
+class StyleDescription(NamedTuple):
+    title: str
+    description: str
+    strengths: str
+    challenges: str
+
+
+class _CacheEntry(NamedTuple):
+    signature: tuple  # (mtime_ns, size) of the file when it was loaded
+    digest: str
+    value: object
+    load_seconds: float
+    resident_bytes: int
+
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def build_mapping_matrix(questions):
+    """Stack the question mappings into a (questions x 4) int8 matrix."""
+    return np.array(
+        [[q["mapping"][style] for style in STYLES] for q in questions],
+        dtype=np.int8,
+    )
+
+
+def _deep_size(obj, seen=None):
+    # Approximate resident size of the cached structures
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        return sys.getsizeof(obj) + (0 if obj.base is None else obj.nbytes)
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (dict, MappingProxyType)):
+        size += sum(_deep_size(k, seen) + _deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (tuple, list)):
+        size += sum(_deep_size(item, seen) for item in obj)
+    return size
+
+
+def _parse_questions(data, digest):
+    questions = json.loads(data)
+    mapping = build_mapping_matrix(questions)
+    mapping.flags.writeable = False
+    texts = tuple(q["question"] for q in questions)
+    return ItemBank(
+        questions=texts,
+        styles=tuple(q["style"] for q in questions),
+        mapping=mapping,
+        index=MappingProxyType({text: i for i, text in enumerate(texts)}),
+        digest=digest,
+    )
+
+
+def _parse_descriptions(data, digest):
+    descriptions = json.loads(data)["single"]
+    return MappingProxyType({
+        key: StyleDescription(**description) for key, description in descriptions.items()
+    })
+
+
+def load_cached(path, parse):
+    """
+    parse(data, digest) of the file at `path`, cached per process until the file changes.
+
+    `parse` receives the raw bytes and their sha256 and must return an
+    immutable value, since it is shared by every caller.
+    """
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    entry = _cache.get(path)
+    if entry is not None and entry.signature == signature:
+        return entry.value
+
+    with _lock:
+        entry = _cache.get(path)
+        if entry is not None and entry.signature == signature:
+            return entry.value
+
+        started = time.perf_counter()
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        if entry is not None and entry.digest == digest:
+            # Touched but unchanged: keep the existing objects
+            _cache[path] = entry._replace(signature=signature)
+            return entry.value
+
+        value = parse(data, digest)
+        _cache[path] = _CacheEntry(
+            signature=signature,
+            digest=digest,
+            value=value,
+            load_seconds=time.perf_counter() - started,
+            resident_bytes=_deep_size(value),
+        )
+        return value
+
+
+def load_item_bank(path=QUESTIONS_PATH):
+    """The shared, read-only item bank parsed from questions.json."""
+    return load_cached(path, _parse_questions)
+
+
+def load_descriptions(path=DESCRIPTIONS_PATH):
+    """The shared, read-only style descriptions, keyed by style key (e.g. "DI")."""
+    return load_cached(path, _parse_descriptions)
+
+
+def cache_report():
+    """Load time and approximate resident size of every cached file."""
+    return [
+        {
+            "path": path,
+            "sha256": entry.digest,
+            "load_seconds": entry.load_seconds,
+            "resident_bytes": entry.resident_bytes,
+        }
+        for path, entry in _cache.items()
+    ]
+
+
+if __name__ == "__main__":
+    load_item_bank()
+    load_descriptions()
+    for row in cache_report():
+        print(
+            f"{os.path.basename(row['path'])}: loaded in {row['load_seconds'] * 1000:.2f} ms, "
+            f"~{row['resident_bytes'] / 1024:.1f} KiB resident"
+        )
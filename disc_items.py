@@ -0,0 +1,217 @@
+"""
+One-pass item analysis of the item bank over a corpus of responses.
+
+For every question of questions.json, and every DISC scale it is mapped to:
+
+- item mean and variance of the 1-5 answers
+- corrected item-total correlation: the correlation between the item's
+  contribution to the scale (answer weight x mapping weight) and the rest of
+  the respondent's raw score on that scale
+- Cronbach's alpha of each scale, and the alpha with each item left out
+
+Respondents only answer a subset of the bank, so correlations and the
+covariances behind alpha use every pair of answers available
+(pairwise-available-case).
+
+ItemStats accumulates everything from answer matrices chunk by chunk, so the
+corpus never has to fit in memory. The accumulators are exact integer sums
+(answers and raw scores are integers), so accumulators of parallel shards
+merge exactly by addition, whatever the order, and means and variances are
+computed from them in float64 only at the end.
+"""
+import numpy as np
+
+import disc_data
+import disc_scoring
+
+
+class ItemStats:
+    """Mergeable accumulator of item statistics; update() with answer matrices, merge() shards."""
+
+    def __init__(self, n_questions):
+        q, s = n_questions, len(disc_scoring.STYLES)
+        self.respondents = 0
+        # Per item: answer count and sums of the 1-5 answers and their squares
+        self.count = np.zeros(q, dtype=np.int64)
+        self.answer_sum = np.zeros(q, dtype=np.int64)
+        self.answer_sq_sum = np.zeros(q, dtype=np.int64)
+        # Per item pair, over respondents who answered both: count, sum of the
+        # first item's answer weight and sum of the weight products
+        self.pair_count = np.zeros((q, q), dtype=np.int64)
+        self.pair_sum = np.zeros((q, q), dtype=np.int64)
+        self.pair_product = np.zeros((q, q), dtype=np.int64)
+        # Per item and scale, over respondents who answered the item: sums of
+        # the raw scale score, its square and its product with the answer weight
+        self.total_sum = np.zeros((q, s), dtype=np.int64)
+        self.total_sq_sum = np.zeros((q, s), dtype=np.int64)
+        self.weight_total = np.zeros((q, s), dtype=np.int64)
+
+    def update(self, answers, mapping):
+        """Add an (N x questions) answer matrix (0 = not asked)."""
+        answers = np.atleast_2d(answers)
+        asked = (answers > 0).astype(np.float64)
+        weights = disc_scoring.ANSWER_WEIGHTS[answers].astype(np.float64)
+        totals = disc_scoring.raw_scores(answers, mapping).astype(np.float64)
+        values = answers.astype(np.float64)
+
+        # float64 BLAS products of small integers are exact well past any chunk size
+        def exact(x):
+            return np.rint(x).astype(np.int64)
+
+        self.respondents += len(answers)
+        self.count += exact(asked.sum(axis=0))
+        self.answer_sum += exact(values.sum(axis=0))
+        self.answer_sq_sum += exact((values * values).sum(axis=0))
+        self.pair_count += exact(asked.T @ asked)
+        self.pair_sum += exact(weights.T @ asked)
+        self.pair_product += exact(weights.T @ weights)
+        self.total_sum += exact(asked.T @ totals)
+        self.total_sq_sum += exact(asked.T @ (totals * totals))
+        self.weight_total += exact(weights.T @ totals)
+        return self
+
+    def merge(self, other):
+        """Add the accumulators of another shard."""
+        for name, value in vars(other).items():
+            setattr(self, name, getattr(self, name) + value)
+        return self
+
+    def item_means(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.answer_sum / self.count
+
+    def item_variances(self):
+        """Sample variance of each item's 1-5 answers."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return (self.answer_sq_sum - self.answer_sum ** 2 / self.count) / (self.count - 1)
+
+    def weight_covariance(self):
+        """(questions x questions) pairwise-available covariance of the answer weights."""
+        n = self.pair_count
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return (self.pair_product - self.pair_sum * self.pair_sum.T / n) / (n - 1)
+
+    def item_total_correlations(self, mapping):
+        """
+        (questions x 4) corrected item-total correlations per scale.
+
+        NaN where the item is not mapped to the scale or was never answered.
+        """
+        m = mapping.astype(np.float64)
+        n = self.count[:, None].astype(np.float64)
+        weight_sum = np.diag(self.pair_sum)[:, None]
+        weight_sq_sum = np.diag(self.pair_product)[:, None]
+
+        # Sums of the item's contribution c = w * m and of the rest R = total - c
+        c_sum = weight_sum * m
+        c_sq_sum = weight_sq_sum * m * m
+        ct_sum = self.weight_total * m
+        rest_sum = self.total_sum - c_sum
+        rest_sq_sum = self.total_sq_sum - 2 * ct_sum + c_sq_sum
+        c_rest_sum = ct_sum - c_sq_sum
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            covariance = c_rest_sum - c_sum * rest_sum / n
+            c_var = c_sq_sum - c_sum ** 2 / n
+            rest_var = rest_sq_sum - rest_sum ** 2 / n
+            correlation = covariance / np.sqrt(c_var * rest_var)
+        correlation[m == 0] = np.nan
+        return correlation
+
+    def cronbach_alpha(self, mapping):
+        """
+        Cronbach's alpha per scale, and per item the alpha of its scales without it.
+
+        Returns a length-4 array and a (questions x 4) array (NaN where the
+        item is not mapped to the scale).
+        """
+        covariance = self.weight_covariance()
+        alphas = np.full(len(disc_scoring.STYLES), np.nan)
+        alpha_without = np.full(mapping.shape, np.nan)
+        for s in range(len(disc_scoring.STYLES)):
+            items = np.flatnonzero(mapping[:, s])
+            m = mapping[items, s].astype(np.float64)
+            keyed = covariance[np.ix_(items, items)] * np.outer(m, m)
+            alphas[s] = _alpha(keyed)
+            for position, item in enumerate(items):
+                rest = np.delete(np.arange(len(items)), position)
+                alpha_without[item, s] = _alpha(keyed[np.ix_(rest, rest)])
+        return alphas, alpha_without
+
+    def report(self, mapping=None, item_bank=None):
+        """
+        Item quality report: scale alphas and one row per item, weakest items first.
+
+        Items are ranked by their corrected item-total correlation on their
+        primary scale (the "style" of the question in questions.json).
+        """
+        if item_bank is None:
+            item_bank = disc_data.load_item_bank()
+        if mapping is None:
+            mapping = item_bank.mapping
+        correlations = self.item_total_correlations(mapping)
+        alphas, alpha_without = self.cronbach_alpha(mapping)
+        means = self.item_means()
+        variances = self.item_variances()
+
+        items = []
+        for q, question in enumerate(item_bank.questions):
+            primary = disc_scoring.STYLES.index(item_bank.styles[q])
+            items.append({
+                "item": q,
+                "question": question,
+                "style": item_bank.styles[q],
+                "answers": int(self.count[q]),
+                "mean": _number(means[q]),
+                "variance": _number(variances[q]),
+                "item_total_correlation": _number(correlations[q, primary]),
+                "alpha_if_deleted": _number(alpha_without[q, primary]),
+                "scale_correlations": {
+                    style: _number(correlations[q, s])
+                    for s, style in enumerate(disc_scoring.STYLES)
+                    if mapping[q, s]
+                },
+            })
+        # Weakest first; items without a correlation yet go last
+        items.sort(key=lambda item: (item["item_total_correlation"] is None, item["item_total_correlation"] or 0))
+        return {
+            "respondents": self.respondents,
+            "alpha": {style: _number(alpha) for style, alpha in zip(disc_scoring.STYLES, alphas)},
+            "items": items,
+        }
+
+
+def _alpha(covariance):
+    k = len(covariance)
+    total = covariance.sum()
+    if k < 2 or not np.isfinite(total) or total <= 0:
+        return np.nan
+    return k / (k - 1) * (1 - np.trace(covariance) / total)
+
+
+def _number(value):
+    # NaN is not valid JSON
+    return None if not np.isfinite(value) else float(value)
+
+
+def format_report(report, limit=None):
+    """The report as a plain-text table, weakest items first."""
+    lines = [
+        f"{report['respondents']} respondents",
+        "Cronbach's alpha: " + ", ".join(
+            f"{style} {'n/a' if alpha is None else f'{alpha:.3f}'}" for style, alpha in report["alpha"].items()
+        ),
+        "",
+        f"{'item':>4}  {'style':<5} {'answers':>8} {'mean':>5} {'var':>5} {'r_it':>6} {'alpha-':>6}  question",
+    ]
+    for item in report["items"][:limit]:
+        def fmt(value, width, digits):
+            return f"{'n/a':>{width}}" if value is None else f"{value:{width}.{digits}f}"
+
+        lines.append(
+            f"{item['item']:>4}  {item['style']:<5} {item['answers']:>8} "
+            f"{fmt(item['mean'], 5, 2)} {fmt(item['variance'], 5, 2)} "
+            f"{fmt(item['item_total_correlation'], 6, 3)} {fmt(item['alpha_if_deleted'], 6, 3)}  "
+            f"{item['question'][:70]}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,167 @@
+"""
+Per-rerun timing spans and counters, exported in the Prometheus text format.
+
+    with disc_metrics.span("scoring"):
+        ...
+    disc_metrics.inc("completions")
+    disc_metrics.set_gauge("artifact_cache_bytes", size)
+
+Spans are aggregated per name into the disc_span_seconds histogram,
+counters into disc_<name>_total and gauges into disc_<name>. Metrics are off unless an exporter is
+configured with environment variables:
+
+- DISC_METRICS_FILE: file the metrics are rewritten to, e.g. for the node
+  exporter's textfile collector (*.prom)
+- DISC_METRICS_PORT: port of a local HTTP endpoint serving /metrics
+- DISC_METRICS_INTERVAL: seconds between metrics file writes (default 15)
+
+When disabled, span() returns a shared no-op context manager and inc() and
+set_gauge() return immediately, so instrumented code pays a function call and nothing
+else.
+"""
+import contextlib
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds (seconds) of the span histogram buckets, from a fast rerun to a PDF build
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS_FILE = os.environ.get("DISC_METRICS_FILE")
+METRICS_PORT = int(os.environ.get("DISC_METRICS_PORT", 0))
+METRICS_INTERVAL = float(os.environ.get("DISC_METRICS_INTERVAL", 15))
+enabled = bool(METRICS_FILE or METRICS_PORT)
+
+_NULL_SPAN = contextlib.nullcontext()
+_lock = threading.Lock()
+_histograms = {}  # span name -> [bucket counts..., +Inf count, sum]
+_counters = {}
+_gauges = {}
+_exporters_started = False
+
+
+def observe(name, seconds):
+    """Record one duration of the span `name`."""
+    if not enabled:
+        return
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = [0] * (len(BUCKETS) + 1) + [0.0]
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                histogram[i] += 1
+                break
+        else:
+            histogram[len(BUCKETS)] += 1
+        histogram[-1] += seconds
+
+
+@contextlib.contextmanager
+def _timed(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started)
+
+
+def span(name):
+    """Context manager timing its block into the span histogram `name`."""
+    if not enabled:
+        return _NULL_SPAN
+    return _timed(name)
+
+
+def inc(name, value=1):
+    """Add `value` to the counter `name`."""
+    if not enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def set_gauge(name, value):
+    """Set the gauge `name` to `value`."""
+    if not enabled:
+        return
+    with _lock:
+        _gauges[name] = value
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    with _lock:
+        histograms = {name: list(values) for name, values in _histograms.items()}
+        counters = dict(_counters)
+        gauges = dict(_gauges)
+
+    lines = []
+    for name, value in sorted(counters.items()):
+        metric = f"disc_{name}_total"
+        lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+    for name, value in sorted(gauges.items()):
+        metric = f"disc_{name}"
+        lines += [f"# TYPE {metric} gauge", f"{metric} {value}"]
+
+    lines.append("# HELP disc_span_seconds Duration of instrumented spans of the app.")
+    lines.append("# TYPE disc_span_seconds histogram")
+    for name, values in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(BUCKETS + ("+Inf",), values):
+            cumulative += count
+            lines.append(f'disc_span_seconds_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+        lines.append(f'disc_span_seconds_sum{{span="{name}"}} {values[-1]}')
+        lines.append(f'disc_span_seconds_count{{span="{name}"}} {cumulative}')
+    return "\n".join(lines) + "\n"
+
+
+def write_file(path=None):
+    """Atomically rewrite the metrics file (readers never see a partial file)."""
+    path = path or METRICS_FILE
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(render())
+    os.replace(tmp, path)
+
+
+def _write_periodically():
+    while True:
+        time.sleep(METRICS_INTERVAL)
+        try:
+            write_file()
+        except OSError:
+            pass  # e.g. the directory is gone; try again next interval
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # scrapes would otherwise be logged to stderr
+
+
+def start_exporters():
+    """Start the configured exporters once per process (cheap to call on every rerun)."""
+    global _exporters_started
+    if not enabled or _exporters_started:
+        return
+    with _lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+    if METRICS_FILE:
+        threading.Thread(target=_write_periodically, name="disc-metrics-file", daemon=True).start()
+    if METRICS_PORT:
+        server = ThreadingHTTPServer(("127.0.0.1", METRICS_PORT), _MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="disc-metrics-http", daemon=True).start()
@@ -0,0 +1,236 @@
+"""
+Nearest-neighbour index for "people with a similar profile" lookups.
+
+A uniform grid over the profile space: every profile falls into one cell,
+profiles are stored sorted by cell, and a query scans the cells in growing
+cubes around the query point until no unscanned cell can hold anything
+closer than the k best found so far. Results are exact, not approximate.
+Queries far from every indexed profile (or on a nearly empty index) would
+visit more cells than there are profiles, so once the cube of cells to visit
+would cost more than scanning every profile the query does that instead.
+
+Two spaces are provided:
+
+- profile_index(): the 4-D normalized D, I, S, C scores (0-100)
+- resultant_index(): the 2-D resultant vector (magnitude cos(angle),
+  magnitude sin(angle)) on the DISC wheel, for (angle, magnitude) queries
+
+Inserts go to a small unsorted buffer that queries scan directly; it is
+merged into the sorted grid once it grows past a fraction of the index, so
+inserting one profile at a time stays cheap.
+
+    index = disc_neighbors.profile_index()
+    index.insert(ids, normalized)
+    ids, distances = index.query([80, 60, 20, 30], k=10)
+    index.save("profiles.npz")
+"""
+import functools
+import itertools
+
+import numpy as np
+
+import disc_scoring
+
+DEFAULT_PROFILE_CELL = 3.0
+DEFAULT_RESULTANT_CELL = 0.01
+MIN_MERGE_SIZE = 4096
+# Visiting a grid cell costs about as much as scanning this many points
+CELL_SCAN_COST = 8
+
+
+@functools.lru_cache(maxsize=32)
+def _shell_offsets(dim, radius):
+    # Cell offsets at Chebyshev distance exactly `radius`, generated face by
+    # face: axis `axis` is at -radius or +radius, the axes before it strictly
+    # inside, the axes after it anywhere, so every offset comes up once
+    if radius == 0:
+        return np.zeros((1, dim), dtype=np.int64)
+    inside = np.arange(-radius + 1, radius)
+    anywhere = np.arange(-radius, radius + 1)
+    faces = []
+    for axis in range(dim):
+        axes = [inside] * axis + [np.array([-radius, radius])] + [anywhere] * (dim - axis - 1)
+        grid = np.meshgrid(*axes, indexing="ij")
+        faces.append(np.stack([g.ravel() for g in grid], axis=1))
+    return np.concatenate(faces).astype(np.int64)
+
+
+class GridIndex:
+    """Exact k-NN over points in a `dim`-dimensional box, bucketed into a uniform grid."""
+
+    def __init__(self, dim, low, high, cell_size):
+        self.dim = dim
+        self.low = np.broadcast_to(np.asarray(low, dtype=np.float64), (dim,)).copy()
+        self.high = np.broadcast_to(np.asarray(high, dtype=np.float64), (dim,)).copy()
+        self.cell_size = float(cell_size)
+        self.shape = np.maximum(np.ceil((self.high - self.low) / self.cell_size), 1).astype(np.int64)
+        self.strides = np.concatenate([np.cumprod(self.shape[::-1])[::-1][1:], [1]])
+        n_cells = int(np.prod(self.shape))
+
+        # Sorted part: points ordered by cell, cell c spans cell_start[c]:cell_start[c + 1]
+        self.points = np.empty((0, dim), dtype=np.float32)
+        self.ids = np.empty(0, dtype=np.int64)
+        self.cell_start = np.zeros(n_cells + 1, dtype=np.int64)
+        # Unsorted insert buffer
+        self._pending_points = []
+        self._pending_ids = []
+        self._pending_count = 0
+
+    def __len__(self):
+        return len(self.ids) + self._pending_count
+
+    def _cells(self, points):
+        coords = np.floor((points - self.low) / self.cell_size).astype(np.int64)
+        # Points on or beyond the upper bound belong to the last cell
+        return np.clip(coords, 0, self.shape - 1)
+
+    def insert(self, ids, points):
+        """Add points (rows) with their integer ids."""
+        points = np.atleast_2d(np.asarray(points, dtype=np.float32))
+        ids = np.atleast_1d(np.asarray(ids, dtype=np.int64))
+        if len(points) != len(ids):
+            raise ValueError("ids and points must have the same length")
+        self._pending_points.append(points)
+        self._pending_ids.append(ids)
+        self._pending_count += len(ids)
+        if self._pending_count >= max(MIN_MERGE_SIZE, len(self.ids) // 256):
+            self.merge()
+
+    def merge(self):
+        """Fold the insert buffer into the sorted grid."""
+        if not self._pending_count:
+            return
+        points = np.concatenate([self.points] + self._pending_points)
+        ids = np.concatenate([self.ids] + self._pending_ids)
+        cells = self._cells(points) @ self.strides
+        order = np.argsort(cells, kind="stable")
+        self.points = points[order]
+        self.ids = ids[order]
+        counts = np.bincount(cells, minlength=len(self.cell_start) - 1)
+        self.cell_start = np.concatenate([[0], np.cumsum(counts)])
+        self._pending_points, self._pending_ids, self._pending_count = [], [], 0
+
+    def _pending(self):
+        if len(self._pending_points) > 1:
+            self._pending_points = [np.concatenate(self._pending_points)]
+            self._pending_ids = [np.concatenate(self._pending_ids)]
+        if not self._pending_points:
+            return np.empty((0, self.dim), dtype=np.float32), np.empty(0, dtype=np.int64)
+        return self._pending_points[0], self._pending_ids[0]
+
+    def query(self, point, k=10):
+        """Ids and distances of the k points nearest to `point`, nearest first."""
+        if k < 1:
+            raise ValueError(f"k must be at least 1, got {k}")
+        point = np.asarray(point, dtype=np.float64).reshape(self.dim)
+        center = self._cells(point[None, :])[0]
+
+        # The insert buffer is small and scanned in full
+        pending_points, pending_ids = self._pending()
+        best_ids = pending_ids
+        best = np.sqrt(((pending_points - point) ** 2).sum(axis=1))
+
+        for radius in itertools.count():
+            # Visiting this many cells would cost more than a full scan: the
+            # query is far from the data (or the index nearly empty)
+            if radius and (2 * radius + 1) ** self.dim * CELL_SCAN_COST > len(self.ids):
+                return self.brute_force(point, k)
+            cells = center + _shell_offsets(self.dim, radius)
+            cells = cells[((cells >= 0) & (cells < self.shape)).all(axis=1)]
+            cell_ids = cells @ self.strides
+            starts = self.cell_start[cell_ids]
+            lengths = self.cell_start[cell_ids + 1] - starts
+            if lengths.any():
+                # Row numbers of every point in these cells, without a Python loop over cells
+                offsets = np.cumsum(lengths) - lengths
+                rows = np.repeat(starts - offsets, lengths) + np.arange(lengths.sum())
+                best = np.concatenate([best, np.sqrt(((self.points[rows] - point) ** 2).sum(axis=1))])
+                best_ids = np.concatenate([best_ids, self.ids[rows]])
+                if len(best) > k:
+                    keep = np.argpartition(best, k - 1)[:k]
+                    best, best_ids = best[keep], best_ids[keep]
+
+            # Everything unscanned lies outside the cube of cells scanned so far
+            cube_low = self.low + (center - radius) * self.cell_size
+            cube_high = self.low + (center + radius + 1) * self.cell_size
+            gaps = np.concatenate([
+                np.where(center - radius > 0, point - cube_low, np.inf),
+                np.where(center + radius < self.shape - 1, cube_high - point, np.inf),
+            ])
+            bound = gaps.min()
+            if np.isinf(bound) or (len(best) >= k and best.max() <= bound):
+                break
+
+        order = np.argsort(best, kind="stable")[:k]
+        return best_ids[order], best[order]
+
+    def brute_force(self, point, k=10):
+        """Ids and distances of the k nearest points by a full scan (for checks and benchmarks)."""
+        if k < 1:
+            raise ValueError(f"k must be at least 1, got {k}")
+        pending_points, pending_ids = self._pending()
+        points = np.concatenate([self.points, pending_points])
+        ids = np.concatenate([self.ids, pending_ids])
+        distances = np.sqrt(((points - np.asarray(point, dtype=np.float64)) ** 2).sum(axis=1))
+        k = min(k, len(ids))
+        if not k:
+            return ids[:0], distances[:0]
+        nearest = np.argpartition(distances, k - 1)[:k]
+        order = np.argsort(distances[nearest], kind="stable")
+        return ids[nearest[order]], distances[nearest[order]]
+
+    def save(self, path):
+        """Write the index to an .npz file."""
+        self.merge()
+        np.savez(
+            path,
+            dim=self.dim,
+            low=self.low,
+            high=self.high,
+            cell_size=self.cell_size,
+            points=self.points,
+            ids=self.ids,
+            cell_start=self.cell_start,
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Read an index written by save()."""
+        with np.load(path) as data:
+            index = cls(int(data["dim"]), data["low"], data["high"], float(data["cell_size"]))
+            index.points = data["points"]
+            index.ids = data["ids"]
+            index.cell_start = data["cell_start"]
+        return index
+
+
+def profile_index(cell_size=DEFAULT_PROFILE_CELL):
+    """An empty index over normalized D, I, S, C scores."""
+    return GridIndex(len(disc_scoring.STYLES), 0, 100, cell_size)
+
+
+def resultant_index(cell_size=DEFAULT_RESULTANT_CELL):
+    """An empty index over resultant vectors; insert and query with resultant_points()."""
+    # Normalized scores are 0-100, so the resultant stays within sqrt(2) of the center
+    return GridIndex(2, -np.sqrt(2), np.sqrt(2), cell_size)
+
+
+def resultant_points(angle, magnitude):
+    """(N x 2) x, y points of resultant angles and magnitudes, for resultant_index()."""
+    angle = np.atleast_1d(angle)
+    magnitude = np.atleast_1d(magnitude)
+    return np.stack([magnitude * np.cos(angle), magnitude * np.sin(angle)], axis=1)
+
+
+def index_store(store, chunk_size=100000, cell_size=DEFAULT_PROFILE_CELL):
+    """A profile index of every result in a disc_store.ResultStore, keyed by result row id."""
+    index = profile_index(cell_size)
+    cursor = store.connection.execute("SELECT id, d, i, s, c FROM results ORDER BY id")
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        rows = np.array(rows, dtype=np.float64)
+        index.insert(rows[:, 0].astype(np.int64), rows[:, 1:])
+    index.merge()
+    return index
@@ -0,0 +1,112 @@
+"""
+DISC wheel rendering.
+
+Figures are created with matplotlib.figure.Figure directly instead of
+pyplot, so they are never registered with pyplot's global figure manager and
+are freed as soon as the caller drops them.
+
+For the results page the static part of the wheel (ticks, sector lines,
+grid, facecolor, title) is drawn once per process and DPI and cached as a
+blitting background; each request only restores that background, draws the
+respondent's marker on top and encodes the PNG.
+"""
+import threading
+from io import BytesIO
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from PIL import Image
+
+CATEGORIES = ["D", "I", "S", "C"]
+CATEGORY_ANGLES = [7 * np.pi / 4, np.pi / 4, 3 * np.pi / 4, 5 * np.pi / 4]
+# Bump whenever the look of the wheel changes so cached renders are not reused
+TEMPLATE_VERSION = 2
+
+MARKER_STYLE = dict(markersize=24, color="#4CAF50", label="Your DISC Style")
+
+_wheels = {}
+_wheel_lock = threading.Lock()
+
+
+def _draw_wheel(fig):
+    # Static part of the DISC wheel, shared by every figure
+    ax = fig.add_subplot(projection="polar")
+    ax.set_theta_offset(np.pi / 2)
+    ax.set_theta_direction(-1)
+    ax.set_ylim(0, 1.01)
+
+    ax.set_xticks(CATEGORY_ANGLES)
+    ax.set_xticklabels(CATEGORIES, fontsize=14, fontweight="bold")
+
+    ax.axvline(x=0, color="gray", linestyle="--", alpha=0.7)
+    ax.axvline(x=np.pi, color="gray", linestyle="--", alpha=0.7)
+
+    ax.axvline(x=np.pi / 2, color="gray", linestyle="--", alpha=0.7)
+    ax.axvline(x=3 * np.pi / 2, color="gray", linestyle="--", alpha=0.7)
+
+    ax.set_yticklabels([])
+
+    ax.grid(True, alpha=0.3)
+    ax.spines["polar"].set_visible(False)
+    ax.set_facecolor("#f0f2f6")
+
+    ax.set_title("Your DISC Style Profile", fontsize=16, fontweight="bold", pad=20)
+    return ax
+
+
+def create_disc_plot(resultant_angle, resultant_magnitude):
+    """A standalone 10x10 inch DISC wheel figure with the respondent's marker."""
+    fig = Figure(figsize=(10, 10))
+    FigureCanvasAgg(fig)
+    ax = _draw_wheel(fig)
+    ax.plot(resultant_angle, resultant_magnitude, "o", **MARKER_STYLE)
+    return fig
+
+
+def _cached_wheel(dpi):
+    # One figure per DPI: the wheel is rendered once and its pixels kept as a
+    # background that every later render restores before drawing the marker
+    wheel = _wheels.get(dpi)
+    if wheel is None:
+        fig = Figure(figsize=(10, 10), dpi=dpi)
+        canvas = FigureCanvasAgg(fig)
+        ax = _draw_wheel(fig)
+        (marker,) = ax.plot([], [], "o", animated=True, **MARKER_STYLE)
+        canvas.draw()
+        background = canvas.copy_from_bbox(fig.bbox)
+
+        # Pixel box equivalent to savefig(bbox_inches="tight"), with the default 0.1 inch padding
+        tight = fig.get_tightbbox(canvas.get_renderer()).padded(0.1)
+        width, height = canvas.get_width_height()
+        left = max(int(tight.x0 * dpi), 0)
+        top = max(int(height - tight.y1 * dpi), 0)
+        crop_box = (
+            left,
+            top,
+            min(left + int(tight.width * dpi), width),
+            min(top + int(tight.height * dpi), height),
+        )
+        wheel = _wheels[dpi] = (canvas, ax, marker, background, crop_box)
+    return wheel
+
+
+def render_disc_png(resultant_angle, resultant_magnitude, dpi=200, tight=True):
+    """
+    PNG bytes of the DISC wheel with the respondent's marker, blitted onto the cached wheel.
+
+    The defaults match the image st.pyplot() used to show (200 dpi, cropped
+    like savefig(bbox_inches="tight")); tight=False keeps the full figure.
+    """
+    with _wheel_lock:
+        canvas, ax, marker, background, crop_box = _cached_wheel(dpi)
+        canvas.restore_region(background)
+        marker.set_data([resultant_angle], [resultant_magnitude])
+        ax.draw_artist(marker)
+        image = Image.frombuffer("RGBA", canvas.get_width_height(), canvas.buffer_rgba(), "raw", "RGBA", 0, 1)
+        if tight:
+            image = image.crop(crop_box)
+        buffer = BytesIO()
+        # Fast zlib level: the PNG is only shown in the browser, encode time matters more than size
+        image.save(buffer, format="PNG", compress_level=1)
+    return buffer.getvalue()
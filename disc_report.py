@@ -0,0 +1,376 @@
+"""
+PDF report generation, for a single profile (the Streamlit app) or a whole
+batch of stored profiles rendered in parallel across a process pool.
+
+The DISC wheel is drawn with reportlab vector graphics to the layout of
+disc_plot.create_disc_plot(), so reports need neither matplotlib nor a
+raster image. The stylesheet and the static part of the wheel are built once
+per process and shared by every report of a batch, so each worker pays for
+them only once.
+"""
+import functools
+import json
+import math
+import os
+import re
+import sys
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from reportlab.graphics.shapes import ArcPath, Circle, Drawing, Group, Line, String
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+import disc_data
+import disc_scoring
+
+# Bump whenever the PDF layout changes so cached reports are not reused
+REPORT_TEMPLATE_VERSION = 2
+
+# Layout of the wheel of disc_plot.create_disc_plot(), in points of its 10x10
+# inch figure, measured from the corner of its tight bounding box
+# (savefig(bbox_inches="tight"), which is what the report used to embed)
+WHEEL_WIDTH = 568.8
+WHEEL_HEIGHT = 601.04
+WHEEL_CENTER = (284.4, 284.4)
+WHEEL_RADIUS = 277.2  # the edge of the polar axes, r = 1.01
+WHEEL_LIMIT = 1.01
+WHEEL_CATEGORIES = [("D", 7 * math.pi / 4), ("I", math.pi / 4), ("S", 3 * math.pi / 4), ("C", 5 * math.pi / 4)]
+WHEEL_LABEL_RADIUS = 291.2
+WHEEL_TITLE_BASELINE = 581.6
+# Size of the wheel on the page, in points
+WHEEL_SIZE = 400
+
+
+@functools.lru_cache(maxsize=None)
+def report_styles():
+    """The report stylesheet, built once per process (and so once per worker)."""
+    styles = getSampleStyleSheet()
+
+    # Define custom styles for better formatting
+    styles.add(ParagraphStyle(name='Justify', alignment=4, leading=12))
+    styles.add(ParagraphStyle(name='Heading2Center', parent=styles['Heading2'], alignment=1))
+    styles.add(ParagraphStyle(name='BodyTextCenter', parent=styles['BodyText'], alignment=1))
+    return styles
+
+
+def _wheel_point(angle, r):
+    # Polar axes turned to put angle 0 at the top and run clockwise, like disc_plot
+    scale = WHEEL_RADIUS / WHEEL_LIMIT * r
+    return WHEEL_CENTER[0] + scale * math.sin(angle), WHEEL_CENTER[1] + scale * math.cos(angle)
+
+
+@functools.lru_cache(maxsize=None)
+def _wheel_background():
+    # Everything of the wheel but the marker, in matplotlib's drawing order;
+    # built once per process and shared by the drawings of every report
+    cx, cy = WHEEL_CENTER
+    grid = dict(strokeColor=colors.HexColor("#b0b0b0"), strokeWidth=0.8, strokeOpacity=0.3)
+    axis_line = dict(strokeColor=colors.HexColor("#808080"), strokeWidth=1.5, strokeOpacity=0.7,
+                     strokeDashArray=[5.55, 2.4])
+    label = dict(fontName="Helvetica-Bold", textAnchor="middle", fillColor=colors.black)
+
+    background = Group(Circle(cx, cy, WHEEL_RADIUS, fillColor=colors.HexColor("#f0f2f6"), strokeColor=None))
+    for r in (0.2, 0.4, 0.6, 0.8, 1.0):
+        background.add(Circle(cx, cy, WHEEL_RADIUS / WHEEL_LIMIT * r, fillColor=None, **grid))
+    for _, angle in WHEEL_CATEGORIES:
+        background.add(Line(cx, cy, *_wheel_point(angle, WHEEL_LIMIT), **grid))
+    for angle in (0, math.pi, math.pi / 2, 3 * math.pi / 2):
+        background.add(Line(cx, cy, *_wheel_point(angle, WHEEL_LIMIT), **axis_line))
+    for category, angle in WHEEL_CATEGORIES:
+        x = cx + WHEEL_LABEL_RADIUS * math.sin(angle)
+        y = cy + WHEEL_LABEL_RADIUS * math.cos(angle)
+        # Baseline that centers the capital letter on the label position
+        background.add(String(x, y - 0.36 * 14, category, fontSize=14, **label))
+    background.add(String(cx, WHEEL_TITLE_BASELINE, "Your DISC Style Profile", fontSize=16, **label))
+    return background
+
+
+def wheel_drawing(resultant_angle, resultant_magnitude, size=WHEEL_SIZE):
+    """
+    The DISC wheel with the respondent's marker as a size x size point reportlab Drawing.
+
+    Vector version of disc_plot.create_disc_plot(), scaled to fit (the
+    wheel keeps its aspect ratio and is centered horizontally).
+    """
+    scale = size / WHEEL_HEIGHT
+    wheel = Group(transform=(scale, 0, 0, scale, (size - WHEEL_WIDTH * scale) / 2, 0))
+    wheel.add(_wheel_background())
+
+    # Like matplotlib, clip the marker to the wheel: magnitudes can go past its edge
+    clip = ArcPath(strokeColor=None, fillColor=None)
+    clip.addArc(WHEEL_CENTER[0], WHEEL_CENTER[1], WHEEL_RADIUS, 0, 360, moveTo=True)
+    clip.closePath()
+    clip.isClipPath = 1
+    marker_color = colors.HexColor("#4CAF50")
+    x, y = _wheel_point(float(resultant_angle), float(resultant_magnitude))
+    wheel.add(Group(clip, Circle(x, y, 12, fillColor=marker_color, strokeColor=marker_color, strokeWidth=1)))
+
+    drawing = Drawing(size, size)
+    drawing.add(wheel)
+    return drawing
+
+
+# Function to create PDF report
+def create_pdf_report(normalized_score, relative_percentages, wheel, style_description):
+    """
+    Build the PDF report and return it in a BytesIO.
+
+    `wheel` is the DISC wheel flowable, 400 x 400 points, e.g.
+    wheel_drawing(angle, magnitude).
+    """
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=50, bottomMargin=50)
+    styles = report_styles()
+
+    story = []
+
+    # Title
+    story.append(Paragraph("DISC Personality Assessment Report", styles["Title"]))
+    story.append(Spacer(1, 20))
+
+    # Add Introduction
+    story.append(Paragraph("Thank you for completing the DISC Personality Assessment. This report provides insights into your personality style based on your responses.", styles['Justify']))
+    story.append(Spacer(1, 20))
+
+    # Add DISC Style Breakdown (Absolute Scores)
+    story.append(Paragraph("Your DISC Style Breakdown (Absolute Scores):", styles["Heading2"]))
+    story.append(Spacer(1, 10))
+    story.append(Paragraph("The following scores represent your absolute level in each DISC style on a scale from 0% to 100%. A higher percentage indicates a stronger tendency towards that style.", styles['Justify']))
+    story.append(Spacer(1, 10))
+
+    # Create a table for absolute scores
+    data = [['Style', 'Score (0-100%)']]
+    for style, score in normalized_score.items():
+        data.append([style, f"{score:.2f}%"])
+
+    table = Table(data, hAlign='LEFT', colWidths=[100, 150])
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('ALIGN', (1, 1), (-1, -1), 'CENTER'),
+    ]))
+    story.append(table)
+    story.append(Spacer(1, 20))
+
+    # Add DISC Style Breakdown (Relative Percentages)
+    story.append(Paragraph("Your DISC Style Breakdown (Relative Percentages):", styles["Heading2"]))
+    story.append(Spacer(1, 10))
+    story.append(Paragraph("These percentages represent the proportion of each DISC style relative to your overall personality profile. The total sums up to 100%.", styles['Justify']))
+    story.append(Spacer(1, 10))
+
+    # Create a table for relative percentages
+    data = [['Style', 'Relative Percentage']]
+    for style, score in relative_percentages.items():
+        data.append([style, f"{score:.2f}%"])
+
+    table = Table(data, hAlign='LEFT', colWidths=[100, 150])
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('ALIGN', (1, 1), (-1, -1), 'CENTER'),
+    ]))
+    story.append(table)
+    story.append(Spacer(1, 20))
+
+    # Explanation about the difference between Absolute Scores and Relative Percentages
+    story.append(Paragraph("Understanding Your Scores:", styles["Heading2"]))
+    story.append(Spacer(1, 10))
+    story.append(Paragraph(
+        "The absolute scores indicate how strongly you exhibit each DISC style on its own, without comparison to other styles. A higher score means you tend to display more behaviors associated with that style.\n\n"
+        "The relative percentages show how each style contributes to your overall personality profile compared to the other styles. These percentages sum up to 100% and help you understand which styles are most dominant in your personality.",
+        styles['Justify']
+    ))
+    story.append(Spacer(1, 100))
+
+    # Add the DISC wheel
+    story.append(Spacer(1, 10))
+    story.append(wheel)
+    story.append(Spacer(1, 20))
+
+    # Add personalized style description
+    story.append(Paragraph("Your Personalized DISC Style Description:", styles["Heading2"]))
+    story.append(Spacer(1, 10))
+    story.append(Paragraph(style_description.replace("###", ""), styles['Justify']))
+    story.append(Spacer(1, 50))
+
+    story.append(PageBreak())
+    # Add explanation about each DISC style
+    story.append(Paragraph("Understanding All DISC Styles:", styles["Heading2"]))
+    story.append(Spacer(1, 10))
+    styles_list = [
+        ('Dominance (D):', 'You tend to be direct, results-oriented, and assertive. You are motivated by challenges and achieving tangible results.'),
+        ('Influence (I):', 'You are typically outgoing, enthusiastic, and optimistic. You enjoy social interactions and persuading others.'),
+        ('Steadiness (S):', 'You are often patient, supportive, and team-oriented. You value cooperation and harmony in relationships.'),
+        ('Conscientiousness (C):', 'You tend to be analytical, precise, and detail-oriented. You focus on accuracy, quality, and expertise.')
+    ]
+    for title, description in styles_list:
+        story.append(Paragraph(f"<b>{title}</b> {description}", styles['Justify']))
+        story.append(Spacer(1, 5))
+    story.append(Spacer(1, 10))
+
+    # Add final remarks
+    story.append(
+        Paragraph(
+            "Remember, everyone has aspects of all four styles, but most people tend to gravitate towards one or two primary styles. "
+            "Your unique combination of styles influences how you communicate, make decisions, and interact with others.",
+            styles['Justify']
+        )
+    )
+    story.append(Spacer(1, 10))
+    story.append(
+        Paragraph(
+            "Use this insight to enhance your personal and professional relationships by recognizing and appreciating different styles in yourself and others.",
+            styles['Justify']
+        )
+    )
+
+    # Build the PDF
+    doc.build(story)
+
+    # Ensure we return the buffer to be used for downloading
+    buffer.seek(0)
+    return buffer
+
+
+def profile_report(normalized_score):
+    """Render the PDF report (bytes) for one stored profile of normalized scores."""
+    values = [normalized_score[style] for style in disc_scoring.STYLES]
+    angle, magnitude = disc_scoring.resultant(values)
+    style_key = disc_scoring.STYLE_KEYS[disc_scoring.classify(values, angle)]
+    style_description = disc_scoring.format_style_description(style_key, disc_data.load_descriptions())
+    return create_pdf_report(
+        normalized_score=normalized_score,
+        relative_percentages=disc_scoring.to_score_dict(disc_scoring.relative_percentages(values)),
+        wheel=wheel_drawing(angle, magnitude),
+        style_description=style_description,
+    ).getvalue()
+
+
+def _render_chunk(profiles):
+    # Runs in the worker processes
+    return [(name, profile_report(score)) for name, score in profiles]
+
+
+def _warm_up_worker():
+    # Build the per-worker stylesheet and wheel background before the first report
+    report_styles()
+    _wheel_background()
+
+
+def read_profiles(path):
+    """
+    Yield (report name, normalized_score) pairs from a JSONL file of stored profiles.
+
+    Each line is either a result of `disc_cli.py score` (with "id" and
+    "normalized_score") or the app's JSON download (the normalized scores).
+    """
+    with open(path, "r") as f:
+        for n, line in enumerate(f):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if "normalized_score" in record:
+                name, normalized_score = record.get("id", n), record["normalized_score"]
+            else:
+                name, normalized_score = n, record
+            # Ids become file names, keep them safe
+            yield re.sub(r"[^A-Za-z0-9_.-]", "_", str(name)), normalized_score
+
+
+class ReportWriter:
+    """
+    Write reports into a zip archive (path ending in .zip) or a directory.
+
+    Different ids can come out of read_profiles() as the same file name (for
+    example "a/b" and "a_b"). Repeats get a -2, -3, ... suffix rather than
+    overwriting the earlier report or adding a duplicate zip entry.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.archive = None
+        # Case-folded, since directories may be on a case-insensitive file system
+        self._names = set()
+        if path.lower().endswith(".zip"):
+            # PDFs are already compressed, store them as-is
+            self.archive = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED)
+        else:
+            os.makedirs(path, exist_ok=True)
+
+    def write(self, name, pdf_bytes):
+        """Write one report and return the file name it was written under."""
+        name = self._unique(str(name))
+        if self.archive is not None:
+            self.archive.writestr(f"{name}.pdf", pdf_bytes)
+        else:
+            with open(os.path.join(self.path, f"{name}.pdf"), "wb") as f:
+                f.write(pdf_bytes)
+        return f"{name}.pdf"
+
+    def _unique(self, name):
+        candidate, n = name, 1
+        while candidate.casefold() in self._names:
+            n += 1
+            candidate = f"{name}-{n}"
+        self._names.add(candidate.casefold())
+        return candidate
+
+    def close(self):
+        if self.archive is not None:
+            self.archive.close()
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def generate_reports(profiles, writer, workers=1, chunk_size=8, progress=True):
+    """
+    Render reports for (name, normalized_score) pairs and hand them to `writer`.
+
+    With workers > 1 chunks of profiles are rendered across a process pool,
+    with at most two chunks per worker in flight so memory stays bounded.
+    Returns the number of reports written.
+    """
+    started = time.perf_counter()
+    count = 0
+
+    def write_all(results):
+        nonlocal count
+        for name, pdf_bytes in results:
+            writer.write(name, pdf_bytes)
+            count += 1
+        if progress:
+            elapsed = max(time.perf_counter() - started, 1e-9)
+            print(f"\rrendered {count} reports ({count / elapsed:,.1f} reports/s)", end="", file=sys.stderr, flush=True)
+
+    if workers <= 1:
+        for chunk in _chunks(profiles, chunk_size):
+            write_all(_render_chunk(chunk))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_warm_up_worker) as pool:
+            pending = deque()
+            for chunk in _chunks(profiles, chunk_size):
+                pending.append(pool.submit(_render_chunk, chunk))
+                if len(pending) >= 2 * workers:
+                    write_all(pending.popleft().result())
+            while pending:
+                write_all(pending.popleft().result())
+    if progress:
+        print(file=sys.stderr)
+    return count
@@ -0,0 +1,265 @@
+"""
+Headless, vectorized DISC scoring engine.
+
+Everything in here works on NumPy arrays so that a single respondent (the
+Streamlit app) and hundreds of thousands of stored responses (offline
+re-scoring) go through exactly the same math. This module must never import
+streamlit.
+"""
+import functools
+from typing import NamedTuple
+
+import numpy as np
+
+import disc_data
+from disc_data import QUESTIONS_PATH, STYLES
+
+# Angles of the styles on the DISC wheel (same as the results page)
+STYLE_ANGLES = np.array([7 * np.pi / 4, np.pi / 4, 3 * np.pi / 4, 5 * np.pi / 4])
+
+# Angular ranges (in degrees) of the main styles and combinations, in the
+# order they are checked by describe_style()
+STYLE_RANGES = {
+    # D (Dominance)
+    "D": (315, 337.5),
+    "DC": (270, 315),
+    "DI": (337.5, 360),  # Also covers the 0 degree point
+    # I (Influence)
+    "I": (45, 67.5),
+    "ID": (0, 45),
+    "IS": (67.5, 90),
+    # S (Steadiness)
+    "S": (135, 157.5),
+    "SI": (90, 135),
+    "SC": (157.5, 180),
+    # C (Conscientiousness)
+    "C": (225, 247.5),
+    "CS": (180, 225),
+    "CD": (247.5, 270),
+}
+
+# Style codes are small integers indexing into STYLE_KEYS; the last code is
+# the balanced style, which has no entry in disc_descriptions.json
+STYLE_KEYS = tuple(STYLE_RANGES) + ("Balanced",)
+BALANCED = len(STYLE_KEYS) - 1
+
+# Sector lookup table: the ranges above sorted by start angle, with the code
+# of the style each sector belongs to. The trailing 360 boundary catches
+# angles that fall outside every range (e.g. exactly 360 degrees, or NaN),
+# which describe_style() has always treated as balanced.
+_sectors = sorted((start, code) for code, (start, _) in enumerate(STYLE_RANGES.values()))
+SECTOR_STARTS = np.array([start for start, _ in _sectors] + [360.0])
+SECTOR_CODES = np.array([code for _, code in _sectors] + [BALANCED], dtype=np.uint8)
+DI_CODE = STYLE_KEYS.index("DI")
+
+# Number of distinct question subsets whose normalization bounds are memoized
+SUBSET_CACHE_SIZE = 4096
+
+# Contribution of each answer on the 1-5 scale (0 = not asked) to the raw score
+ANSWER_WEIGHTS = np.array([0, -2, -1, 0, 1, 2], dtype=np.float32)
+
+
+class BatchScores(NamedTuple):
+    raw: np.ndarray  # (N, 4) raw scores
+    normalized: np.ndarray  # (N, 4) normalized scores, 0-100
+    relative: np.ndarray  # (N, 4) relative percentages, rows sum to 100
+    angle: np.ndarray  # (N,) resultant angle in radians
+    magnitude: np.ndarray  # (N,) resultant magnitude
+    style: np.ndarray  # (N,) uint8 style codes, see STYLE_KEYS
+
+
+def load_mapping_matrix(path=QUESTIONS_PATH):
+    """The shared (questions x 4) mapping matrix of questions.json."""
+    return disc_data.load_item_bank(path).mapping
+
+
+def load_question_index(path=QUESTIONS_PATH):
+    """Map each question text to its row in the mapping matrix."""
+    return disc_data.load_item_bank(path).index
+
+
+def checked_answer(question, value, n_questions):
+    """
+    (question index, answer) of one given answer, e.g. ("17", 4) from a JSON answers dict.
+
+    Raises ValueError unless the question id is a 0-based question of the
+    item bank and the answer an integer on the 1-5 scale.
+    """
+    if isinstance(value, bool):
+        raise ValueError(f"question {question!r}: answer {value!r} is not on the 1-5 scale")
+    try:
+        index = int(question)
+        answer = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"question {question!r}: expected an integer question id and answer, got {value!r}") from None
+    if isinstance(value, float) and value != answer:
+        raise ValueError(f"question {index}: answer {value!r} is not an integer")
+    if not 0 <= index < n_questions:
+        raise ValueError(f"question id {question!r} is not in 0-{n_questions - 1}")
+    if not 1 <= answer <= 5:
+        raise ValueError(f"question {index}: answer {value!r} is not on the 1-5 scale")
+    return index, answer
+
+
+def raw_scores(answers, mapping):
+    """
+    Raw scores for an (N x questions) answer matrix.
+
+    Answers are on the 1-5 scale; 0 marks a question the respondent was not
+    asked. Each answered question contributes mapping * (answer - 3).
+    """
+    # float32 keeps the product on the BLAS path and is exact for these small integers
+    centered = ANSWER_WEIGHTS[np.asarray(answers)]
+    return (centered @ mapping.astype(np.float32)).astype(np.int32)
+
+
+def score_bounds(asked, mapping):
+    """
+    Min/max possible raw scores for the questions flagged in `asked`.
+
+    A question can move a style by at most 2 * |mapping| in either direction,
+    so the bounds are symmetric around zero.
+    """
+    asked = np.asarray(asked, dtype=np.float32)
+    max_scores = (2 * (asked @ np.abs(mapping.astype(np.float32)))).astype(np.int32)
+    return -max_scores, max_scores
+
+
+def subset_key(indices, n_questions):
+    """Pack a set of question indices into the bytes of an n_questions-bit mask."""
+    mask = np.zeros(n_questions, dtype=bool)
+    mask[list(indices)] = True
+    return np.packbits(mask).tobytes()
+
+
+@functools.lru_cache(maxsize=SUBSET_CACHE_SIZE)
+def _cached_bounds(key, digest, path):
+    # The item bank digest is part of the key so edits to questions.json
+    # never hit stale bounds
+    mapping = load_mapping_matrix(path)
+    asked = np.unpackbits(np.frombuffer(key, dtype=np.uint8), count=len(mapping))
+    min_scores, max_scores = score_bounds(asked, mapping)
+    min_scores.flags.writeable = False
+    max_scores.flags.writeable = False
+    return min_scores, max_scores
+
+
+def subset_bounds(indices, path=QUESTIONS_PATH):
+    """
+    Min/max possible raw scores for a subset of questions.json, by row index.
+
+    Sessions draw a random subset of the item bank, so the bounds are memoized
+    per subset (as a packed bit mask, independent of question order) in a
+    bounded LRU cache. The returned arrays are read-only.
+    """
+    bank = disc_data.load_item_bank(path)
+    return _cached_bounds(subset_key(indices, len(bank.mapping)), bank.digest, path)
+
+
+def normalize_batch(raw, asked, mapping):
+    """
+    Normalize an (N x 4) raw score matrix given the (N x questions) asked mask.
+
+    Respondents that saw the same subset share one bounds computation: the
+    masks are packed to bytes, deduplicated, and the bounds of every distinct
+    subset are computed with a single matrix multiply.
+    """
+    packed = np.packbits(np.asarray(asked, dtype=bool), axis=1)
+    keys = np.ascontiguousarray(packed).view(np.dtype((np.void, packed.shape[1]))).ravel()
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    min_scores, max_scores = score_bounds(np.asarray(asked)[first], mapping)
+    inverse = inverse.ravel()
+    return normalize(raw, min_scores[inverse], max_scores[inverse])
+
+
+def normalize(raw, min_scores, max_scores):
+    """Rescale raw scores to 0-100 within their possible range (50 if there is none)."""
+    raw = np.asarray(raw, dtype=np.float64)
+    score = np.clip(raw, min_scores, max_scores)
+    score_range = (max_scores - min_scores).astype(np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        normalized = (score - min_scores) / score_range * 100
+    normalized = np.where(score_range == 0, 50.0, normalized)
+    return np.clip(normalized, 0, 100)
+
+
+def relative_percentages(normalized):
+    """Share of each style in the total of the normalized scores."""
+    normalized = np.asarray(normalized, dtype=np.float64)
+    total = normalized.sum(axis=-1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        relative = normalized / total * 100
+    return np.where(total == 0, 0.0, relative)
+
+
+def resultant(normalized):
+    """Resultant angle (radians) and magnitude of the style vectors on the DISC wheel."""
+    scaled = np.asarray(normalized, dtype=np.float64) / 100
+    total_x = (scaled * np.cos(STYLE_ANGLES)).sum(axis=-1)
+    total_y = (scaled * np.sin(STYLE_ANGLES)).sum(axis=-1)
+    return np.arctan2(total_y, total_x), np.sqrt(total_x**2 + total_y**2)
+
+
+def is_balanced(normalized):
+    """True for profiles whose four normalized scores are all equal."""
+    normalized = np.asarray(normalized)
+    return (normalized == normalized[..., :1]).all(axis=-1)
+
+
+def classify_angles(angle, balanced=False):
+    """
+    Style codes (see STYLE_KEYS) for an array of resultant angles in radians.
+
+    Sectors are half-open [start, end) ranges in degrees, looked up with a
+    binary search over SECTOR_STARTS. Exactly 0 degrees belongs to DI, which
+    also covers the 337.5-360 degree range; `balanced` overrides the angle.
+    """
+    degrees = np.degrees(angle)
+    degrees = np.where(degrees < 0, degrees + 360, degrees)
+    codes = SECTOR_CODES[np.searchsorted(SECTOR_STARTS, degrees, side="right") - 1]
+    codes = np.where(degrees == 0, np.uint8(DI_CODE), codes)
+    return np.where(balanced, np.uint8(BALANCED), codes)
+
+
+def classify(normalized, angle):
+    """Style codes (see STYLE_KEYS) for normalized scores and resultant angles."""
+    return classify_angles(angle, is_balanced(normalized))
+
+
+def format_style_description(style_key, descriptions):
+    """Plain-text description of a style key (see disc_data.load_descriptions())."""
+    if style_key == "Balanced":
+        return "Balanced Style"
+    description = descriptions[style_key]
+    return (
+        f"{description.title}\n\n{description.description}\n\n"
+        f"Strengths: {description.strengths}\n\nChallenges: {description.challenges}"
+    )
+
+
+def score_answers(answers, mapping=None):
+    """
+    Score an (N respondents x questions) answer matrix in one pass.
+
+    Columns follow the order of questions.json; 0 means the question was not
+    asked, so respondents that saw different subsets can share one matrix.
+    """
+    if mapping is None:
+        mapping = load_mapping_matrix()
+    answers = np.atleast_2d(answers)
+    raw = raw_scores(answers, mapping)
+    normalized = normalize_batch(raw, answers > 0, mapping)
+    angle, magnitude = resultant(normalized)
+    return BatchScores(
+        raw=raw,
+        normalized=normalized,
+        relative=relative_percentages(normalized),
+        angle=angle,
+        magnitude=magnitude,
+        style=classify(normalized, angle),
+    )
+
+
+def to_score_dict(row):
+    """Convert one row of a (N x 4) score array to the {"D": .., ...} dict used by the app."""
+    return {style: float(value) for style, value in zip(STYLES, row)}
@@ -0,0 +1,301 @@
+"""
+Local HTTP scoring service (asyncio, standard library only).
+
+    python disc_service.py --port 8000 --workers 2
+
+Endpoints (JSON in, JSON out unless noted):
+
+- POST /score: {"answers": {"0": 4, "17": 2, ...}}, question ids as in
+  disc_cli.py, returns the same fields as a line of `disc_cli.py score`
+- POST /classify: {"normalized_score": {"D": .., "I": .., "S": .., "C": ..}}
+  returns the resultant angle and magnitude, style key and description
+- POST /report: {"normalized_score": {...}} returns the PDF report
+  (application/pdf)
+- GET /health, GET /metrics (Prometheus text, see disc_metrics)
+
+Score requests that arrive within --batch-delay of each other are coalesced
+into one answer matrix and scored with a single disc_scoring pass. PDF
+rendering is CPU-bound, so it runs on a process pool with at most two
+reports per worker queued; the event loop only ever waits on it.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import multiprocessing
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http import HTTPStatus
+
+import numpy as np
+
+import disc_data
+import disc_metrics
+import disc_scoring
+
+MAX_BODY_BYTES = 1 << 20
+DEFAULT_MAX_BATCH = 512
+DEFAULT_BATCH_DELAY = 0.001
+
+logger = logging.getLogger(__name__)
+
+
+class BadRequest(Exception):
+    pass
+
+
+def parse_answers(answers, n_questions):
+    """An int8 answer row from {question id: 1-5}; raises BadRequest on invalid input."""
+    if not isinstance(answers, dict):
+        raise BadRequest("answers must map question ids (0-based) to 1-5 answers")
+    row = np.zeros(n_questions, dtype=np.int8)
+    try:
+        for question, value in answers.items():
+            index, answer = disc_scoring.checked_answer(question, value, n_questions)
+            row[index] = answer
+    except ValueError as e:
+        raise BadRequest(str(e))
+    return row
+
+
+def parse_profile(payload):
+    """D, I, S, C values of a {"normalized_score": {...}} payload; raises BadRequest on invalid input."""
+    try:
+        score = payload["normalized_score"]
+        values = [float(score[style]) for style in disc_scoring.STYLES]
+    except (KeyError, TypeError, ValueError):
+        raise BadRequest('expected {"normalized_score": {"D": .., "I": .., "S": .., "C": ..}}')
+    if not all(math.isfinite(value) for value in values):
+        raise BadRequest("normalized_score values must be finite numbers")
+    return values
+
+
+class ScoreBatcher:
+    """Coalesce concurrent score requests into one disc_scoring pass."""
+
+    def __init__(self, max_batch=DEFAULT_MAX_BATCH, delay=DEFAULT_BATCH_DELAY):
+        self.max_batch = max_batch
+        self.delay = delay
+        self.mapping = disc_scoring.load_mapping_matrix()
+        self._pending = []
+        self._timer = None
+
+    def submit(self, row):
+        """A future resolving to the result dict of one answer row."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((row, future))
+        if len(self._pending) >= self.max_batch:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.delay, self.flush)
+        return future
+
+    def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        with disc_metrics.span("service_score_batch"):
+            scores = disc_scoring.score_answers(np.stack([row for row, _ in batch]), self.mapping)
+            rows = zip(
+                scores.normalized.tolist(),
+                scores.relative.tolist(),
+                scores.angle.tolist(),
+                scores.magnitude.tolist(),
+                scores.style.tolist(),
+            )
+            for (_, future), (normalized, relative, angle, magnitude, style) in zip(batch, rows):
+                if not future.done():  # the client may have gone away
+                    future.set_result({
+                        "normalized_score": dict(zip(disc_scoring.STYLES, normalized)),
+                        "relative_percentages": dict(zip(disc_scoring.STYLES, relative)),
+                        "resultant_angle": angle,
+                        "resultant_magnitude": magnitude,
+                        "style": disc_scoring.STYLE_KEYS[style],
+                    })
+        disc_metrics.inc("service_score_batches")
+
+
+def classify_profile(values):
+    angle, magnitude = disc_scoring.resultant(values)
+    style_key = disc_scoring.STYLE_KEYS[disc_scoring.classify(values, angle)]
+    return {
+        "resultant_angle": float(angle),
+        "resultant_magnitude": float(magnitude),
+        "style": style_key,
+        "description": disc_scoring.format_style_description(style_key, disc_data.load_descriptions()),
+    }
+
+
+def _warm_up_renderer():
+    # Runs in the render processes; imported here so the service itself starts without reportlab
+    import disc_report
+
+    disc_report.report_styles()
+    disc_report.wheel_drawing(0, 0)
+
+
+def _render_report(normalized_score):
+    import disc_report
+
+    return disc_report.profile_report(normalized_score)
+
+
+class DiscService:
+    def __init__(self, workers=1, max_batch=DEFAULT_MAX_BATCH, batch_delay=DEFAULT_BATCH_DELAY):
+        self.batcher = ScoreBatcher(max_batch, batch_delay)
+        self.n_questions = len(self.batcher.mapping)
+        self.workers = workers
+        self.renderer = self._new_renderer()
+        # Bounds the reports queued on the pool; further requests wait here
+        self.render_slots = asyncio.Semaphore(2 * workers)
+
+    def _new_renderer(self):
+        # Spawned, not forked: workers must not inherit the listening socket, or
+        # they would keep the port open if this process died without close()
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_warm_up_renderer,
+        )
+
+    async def score(self, payload):
+        if not isinstance(payload, dict) or "answers" not in payload:
+            raise BadRequest('expected {"answers": {question id: 1-5, ...}}')
+        return await self.batcher.submit(parse_answers(payload["answers"], self.n_questions))
+
+    async def classify(self, payload):
+        return classify_profile(parse_profile(payload))
+
+    async def report(self, payload):
+        values = parse_profile(payload)
+        async with self.render_slots:
+            with disc_metrics.span("service_report"):
+                loop = asyncio.get_running_loop()
+                renderer = self.renderer
+                try:
+                    return await loop.run_in_executor(renderer, _render_report, disc_scoring.to_score_dict(values))
+                except BrokenProcessPool:
+                    # This request fails; later ones get a fresh pool
+                    if self.renderer is renderer:
+                        self.renderer = self._new_renderer()
+                        renderer.shutdown(wait=False)
+                    raise
+
+    async def dispatch(self, method, path, body):
+        """(status, content type, body bytes) of one request."""
+        routes = {"/score": self.score, "/classify": self.classify, "/report": self.report}
+        if method == "GET" and path == "/health":
+            return HTTPStatus.OK, "application/json", b'{"status": "ok"}'
+        if method == "GET" and path == "/metrics":
+            return HTTPStatus.OK, "text/plain; version=0.0.4", disc_metrics.render().encode()
+        if path not in routes:
+            return HTTPStatus.NOT_FOUND, "application/json", b'{"error": "not found"}'
+        if method != "POST":
+            return HTTPStatus.METHOD_NOT_ALLOWED, "application/json", b'{"error": "use POST"}'
+        try:
+            result = await routes[path](json.loads(body))
+            if isinstance(result, bytes):
+                return HTTPStatus.OK, "application/pdf", result
+            return HTTPStatus.OK, "application/json", json.dumps(result, allow_nan=False).encode()
+        except (BadRequest, json.JSONDecodeError, UnicodeDecodeError) as e:
+            return HTTPStatus.BAD_REQUEST, "application/json", json.dumps({"error": str(e)}).encode()
+        except Exception:
+            # A failed render (or a broken render pool) still gets a response
+            logger.exception("%s %s failed", method, path)
+            disc_metrics.inc("service_errors")
+            return HTTPStatus.INTERNAL_SERVER_ERROR, "application/json", b'{"error": "internal error"}'
+
+    async def handle_connection(self, reader, writer):
+        # Minimal HTTP/1.1 with keep-alive and Content-Length bodies
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    break
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                method, path, version = request_line.split(" ", 2)
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = headers.get("content-length", "0")
+                # Digits only: int() would also take a sign, underscores and non-ASCII digits
+                if not (length.isascii() and length.isdigit()):
+                    error = json.dumps({"error": f"invalid Content-Length {length!r}"}).encode()
+                    status, content_type, body = HTTPStatus.BAD_REQUEST, "application/json", error
+                    keep_alive = False
+                elif int(length) > MAX_BODY_BYTES:
+                    status, content_type, body = HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "application/json", b"{}"
+                    keep_alive = False
+                else:
+                    status, content_type, body = await self.dispatch(
+                        method, path.split("?")[0], await reader.readexactly(int(length))
+                    )
+                    keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+
+                writer.write(
+                    f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1")
+                    + body
+                )
+                await writer.drain()
+                disc_metrics.inc("service_requests")
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def close(self):
+        self.renderer.shutdown(cancel_futures=True)
+
+
+async def serve(host, port, workers, max_batch, batch_delay):
+    service = DiscService(workers, max_batch, batch_delay)
+    server = await asyncio.start_server(service.handle_connection, host, port, backlog=1024)
+    # SIGTERM (e.g. from a process manager) and Ctrl-C stop the server and the render workers
+    stopped = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stopped.set)
+    print(f"DISC service listening on http://{host}:{port}", flush=True)
+    try:
+        async with server:
+            await stopped.wait()
+    finally:
+        service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local DISC scoring HTTP service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1, help="Processes rendering PDF reports")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH, help="Max score requests per batch")
+    parser.add_argument(
+        "--batch-delay",
+        type=float,
+        default=DEFAULT_BATCH_DELAY,
+        help="Seconds a score request waits for others to batch with",
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.max_batch, args.batch_delay))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
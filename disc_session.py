@@ -0,0 +1,88 @@
+"""
+Compact per-session assessment state.
+
+A session only stores what is specific to the respondent; the question texts
+and mappings live in the shared item bank (disc_data.load_item_bank()):
+
+- item_indices: int16 array of the drawn questions' rows in the item bank
+- answers: bytearray with one 1-5 answer per drawn question (0 = unanswered)
+- raw_score: int32 array of the D, I, S, C raw scores of the answers so far
+- bound_score: int32 array of the D, I, S, C max possible raw scores of the
+  questions answered so far (the min is its negative)
+
+raw_score and bound_score are updated in O(1) per answer by record_answer(),
+so results, or a provisional profile mid-test, never need a rescan.
+
+This module has no Streamlit dependency.
+"""
+import random
+
+import numpy as np
+
+import disc_data
+import disc_scoring
+
+QUESTIONS_PER_SESSION = 30
+# Questions shown together in the app's multi-question page mode
+QUESTIONS_PER_PAGE = 5
+
+
+def draw_items(count=QUESTIONS_PER_SESSION, bank_size=None, rng=random):
+    """Randomly draw `count` distinct item bank rows for a new session."""
+    if bank_size is None:
+        bank_size = len(disc_data.load_item_bank().questions)
+    return np.array(rng.sample(range(bank_size), count), dtype=np.int16)
+
+
+def new_answers(count=QUESTIONS_PER_SESSION):
+    """An empty answer vector (0 means the question has not been answered yet)."""
+    return bytearray(count)
+
+
+def new_raw_score():
+    return np.zeros(len(disc_scoring.STYLES), dtype=np.int32)
+
+
+def new_bound_score():
+    return np.zeros(len(disc_scoring.STYLES), dtype=np.int32)
+
+
+def record_answer(item_indices, answers, raw_score, bound_score, position, answer):
+    """
+    Store the answer to the question at `position` and update the running scores in place.
+
+    Changing an earlier answer applies the difference between the old and the
+    new answer; the bounds only grow the first time a question is answered.
+    """
+    mapping = disc_scoring.load_mapping_matrix()[item_indices[position]].astype(np.int32)
+    previous = answers[position]
+    raw_score += mapping * int(disc_scoring.ANSWER_WEIGHTS[answer] - disc_scoring.ANSWER_WEIGHTS[previous])
+    if previous == 0:
+        bound_score += 2 * np.abs(mapping)
+    answers[position] = answer
+
+
+def provisional_profile(raw_score, bound_score):
+    """
+    Normalized scores, resultant angle/magnitude and style code of the answers so far.
+
+    At the end of the test this is the final profile.
+    """
+    normalized = disc_scoring.normalize(raw_score, -bound_score, bound_score)
+    angle, magnitude = disc_scoring.resultant(normalized)
+    return normalized, angle, magnitude, disc_scoring.classify(normalized, angle)
+
+
+def answer_row(item_indices, answers, bank_size):
+    """Scatter a session's answers into a 1 x bank_size row for disc_scoring."""
+    row = np.zeros((1, bank_size), dtype=np.int8)
+    answered = np.frombuffer(bytes(answers), dtype=np.uint8)
+    # Adaptive sessions leave unused positions at -1, only scatter answered ones
+    row[0, np.asarray(item_indices)[answered > 0]] = answered[answered > 0]
+    return row
+
+
+def score_session(item_indices, answers):
+    """Score one session with the batch engine (BatchScores with a single row)."""
+    mapping = disc_scoring.load_mapping_matrix()
+    return disc_scoring.score_answers(answer_row(item_indices, answers, len(mapping)), mapping)
@@ -0,0 +1,185 @@
+"""
+Monte Carlo study of how stable a style is under the app's question sampling.
+
+Each session asks a random 30 of the item bank, and the items carry uneven
+mapping weights, so the same person can land in a different sector of the
+DISC wheel depending on which items they drew. This module quantifies that:
+
+- synthetic respondents with known latent D, I, S, C traits answer the
+  whole item bank once (disc_synthetic), so their answers stay fixed
+- every respondent then takes `replicates` sessions, each a different random
+  subset of those answers, scored and classified exactly like the app does
+- each session is compared with the respondent's full-bank result (what
+  subset choice alone changes) and with the noise-free full-bank result of
+  their latent traits (subset choice plus answer noise)
+
+Everything is vectorized per shard; shards are seeded from one SeedSequence,
+so the result depends on the seed and the shard size, never on how many
+processes run them. StabilityStats of shards merge by addition.
+
+    stats = disc_stability.simulate(1_000_000, replicates=10, workers=4, seed=0)
+    print(disc_stability.format_report(stats.report()))
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import disc_scoring
+import disc_session
+import disc_synthetic
+
+DEFAULT_REPLICATES = 10
+# Respondents per shard; small enough that the (respondents x replicates x
+# questions) arrays of a shard stay around 20 MB and are reused by the
+# allocator, which more than halves the run time of larger shards
+DEFAULT_SHARD_SIZE = 2000
+
+
+class StabilityStats:
+    """Mergeable per-sector tallies of simulated sessions against their reference sectors."""
+
+    def __init__(self):
+        n_styles = len(disc_scoring.STYLE_KEYS)
+        self.respondents = 0
+        # Sessions by full-bank sector (rows) and session sector (columns)
+        self.confusion = np.zeros((n_styles, n_styles), dtype=np.int64)
+        # Sessions whose sector differs from the noise-free latent sector, by full-bank sector
+        self.latent_misses = np.zeros(n_styles, dtype=np.int64)
+        # By full-bank sector: respondents, and sums over respondents of the
+        # circular variance of their session angles and over sessions of the
+        # squared angle (radians) away from the full-bank angle
+        self.sector_respondents = np.zeros(n_styles, dtype=np.int64)
+        self.circular_variance_sum = np.zeros(n_styles, dtype=np.float64)
+        self.angle_sq_error_sum = np.zeros(n_styles, dtype=np.float64)
+
+    def merge(self, other):
+        """Add the tallies of another shard."""
+        for name, value in vars(other).items():
+            setattr(self, name, getattr(self, name) + value)
+        return self
+
+    def report(self):
+        """Per-sector and overall misclassification rates and angle spread."""
+        sessions = self.confusion.sum(axis=1)
+        misses = sessions - np.diag(self.confusion)
+        sectors = []
+        for code, key in enumerate(disc_scoring.STYLE_KEYS):
+            if not self.sector_respondents[code]:
+                continue
+            sectors.append({
+                "style": key,
+                "respondents": int(self.sector_respondents[code]),
+                "sessions": int(sessions[code]),
+                "misclassification": float(misses[code] / sessions[code]),
+                "latent_misclassification": float(self.latent_misses[code] / sessions[code]),
+                "circular_variance": float(self.circular_variance_sum[code] / self.sector_respondents[code]),
+                "angle_rms_degrees": float(np.degrees(np.sqrt(self.angle_sq_error_sum[code] / sessions[code]))),
+                "landed_in": {
+                    disc_scoring.STYLE_KEYS[other]: int(count)
+                    for other, count in enumerate(self.confusion[code])
+                    if count and other != code
+                },
+            })
+        total = int(sessions.sum())
+        return {
+            "respondents": self.respondents,
+            "sessions": total,
+            "misclassification": float(misses.sum() / total) if total else None,
+            "latent_misclassification": float(self.latent_misses.sum() / total) if total else None,
+            "circular_variance": float(self.circular_variance_sum.sum() / self.respondents) if self.respondents else None,
+            "angle_rms_degrees": float(np.degrees(np.sqrt(self.angle_sq_error_sum.sum() / total))) if total else None,
+            "sectors": sectors,
+        }
+
+
+def _score(weights, asked, abs_mapping, mapping):
+    # disc_scoring.score_answers() without the per-subset bounds deduplication:
+    # simulated subsets are practically all distinct, so one matrix product
+    # for the bounds of every row is cheaper than finding the few repeats
+    raw = weights @ mapping
+    max_scores = 2 * (asked @ abs_mapping)
+    normalized = disc_scoring.normalize(raw, -max_scores, max_scores)
+    angle, _ = disc_scoring.resultant(normalized)
+    return angle, disc_scoring.classify(normalized, angle)
+
+
+def simulate_shard(seed, respondents, replicates=DEFAULT_REPLICATES, subset_size=disc_session.QUESTIONS_PER_SESSION,
+                   mapping=None):
+    """StabilityStats of `respondents` synthetic respondents taking `replicates` sessions each."""
+    if mapping is None:
+        mapping = disc_scoring.load_mapping_matrix()
+    rng = np.random.default_rng(seed)
+    bank_size = len(mapping)
+    mapping = mapping.astype(np.float32)
+    abs_mapping = np.abs(mapping)
+
+    latent = disc_synthetic.latent_traits(respondents, rng)
+    weights = disc_scoring.ANSWER_WEIGHTS[disc_synthetic.simulate_answers(latent, mapping, rng)]
+    everything = np.ones((respondents, bank_size), dtype=np.float32)
+    full_angle, full_style = _score(weights, everything, abs_mapping, mapping)
+    latent_weights = disc_scoring.ANSWER_WEIGHTS[disc_synthetic.simulate_answers(latent, mapping, rng, noise=0)]
+    _, latent_style = _score(latent_weights, everything, abs_mapping, mapping)
+
+    # Uniform random subsets: the subset_size items with the smallest random keys
+    keys = rng.random((respondents * replicates, bank_size))
+    cutoff = np.partition(keys, subset_size - 1, axis=1)[:, subset_size - 1:subset_size]
+    asked = (keys <= cutoff).astype(np.float32)
+    angle, style = _score(np.repeat(weights, replicates, axis=0) * asked, asked, abs_mapping, mapping)
+    angle = angle.reshape(respondents, replicates)
+    style = style.reshape(respondents, replicates)
+
+    stats = StabilityStats()
+    n_styles = len(disc_scoring.STYLE_KEYS)
+    stats.respondents = respondents
+    reference = np.repeat(full_style[:, None], replicates, axis=1).astype(np.int64)
+    stats.confusion += np.bincount(
+        (reference * n_styles + style).ravel(), minlength=n_styles * n_styles
+    ).reshape(n_styles, n_styles)
+    stats.latent_misses += np.bincount(
+        full_style, weights=(style != latent_style[:, None]).sum(axis=1), minlength=n_styles
+    ).astype(np.int64)
+    stats.sector_respondents += np.bincount(full_style, minlength=n_styles)
+    # Circular variance 1 - |mean unit vector| of each respondent's session angles
+    circular_variance = 1 - np.abs(np.exp(1j * angle).mean(axis=1))
+    stats.circular_variance_sum += np.bincount(full_style, weights=circular_variance, minlength=n_styles)
+    # Angle difference wrapped to [-pi, pi)
+    error = (angle - full_angle[:, None] + np.pi) % (2 * np.pi) - np.pi
+    stats.angle_sq_error_sum += np.bincount(full_style, weights=(error * error).sum(axis=1), minlength=n_styles)
+    return stats
+
+
+def simulate(respondents, replicates=DEFAULT_REPLICATES, subset_size=disc_session.QUESTIONS_PER_SESSION, workers=1,
+             seed=0, shard_size=DEFAULT_SHARD_SIZE):
+    """Run the study over `respondents` respondents in seeded shards across `workers` processes."""
+    counts = [min(shard_size, respondents - start) for start in range(0, respondents, shard_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(counts))
+    stats = StabilityStats()
+    if workers <= 1:
+        for shard_seed, count in zip(seeds, counts):
+            stats.merge(simulate_shard(shard_seed, count, replicates, subset_size))
+        return stats
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for shard in pool.map(simulate_shard, seeds, counts, [replicates] * len(counts), [subset_size] * len(counts)):
+            stats.merge(shard)
+    return stats
+
+
+def format_report(report):
+    """The report as a plain-text table, least stable sectors first."""
+    lines = [
+        f"{report['respondents']} respondents, {report['sessions']} sessions",
+        f"misclassified vs full bank: {report['misclassification']:.2%}, "
+        f"vs latent traits: {report['latent_misclassification']:.2%}, "
+        f"angle RMS {report['angle_rms_degrees']:.1f} deg, circular variance {report['circular_variance']:.4f}",
+        "",
+        f"{'style':<9} {'respondents':>11} {'vs bank':>8} {'vs latent':>9} {'RMS deg':>8} {'circ var':>8}  most often landed in",
+    ]
+    for sector in sorted(report["sectors"], key=lambda sector: -sector["misclassification"]):
+        landed = sorted(sector["landed_in"].items(), key=lambda item: -item[1])[:3]
+        lines.append(
+            f"{sector['style']:<9} {sector['respondents']:>11} {sector['misclassification']:>8.2%} "
+            f"{sector['latent_misclassification']:>9.2%} {sector['angle_rms_degrees']:>8.1f} "
+            f"{sector['circular_variance']:>8.4f}  "
+            + ", ".join(f"{key} {count / sector['sessions']:.1%}" for key, count in landed)
+        )
+    return "\n".join(lines)
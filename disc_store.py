@@ -0,0 +1,194 @@
+"""
+Persistent SQLite store of scored results.
+
+One row per completed assessment: the respondent's answers (an int8 row over
+questions.json, as a blob), raw and normalized D, I, S, C scores, resultant
+angle/magnitude, style code (see disc_scoring.STYLE_KEYS), an optional
+cohort label and the time it was stored (unix milliseconds).
+
+    store = ResultStore("results.db")
+    store.insert(ids, answers, disc_scoring.score_answers(answers), cohort="2024-spring")
+    store.style_counts(cohort="2024-spring")
+
+The app stores every completed assessment in the database at
+DISC_STORE_PATH when that environment variable is set.
+
+The database runs in WAL mode, so the app, the CLI and readers can use it at
+the same time. Inserts are batched with executemany() in one transaction per
+batch, and import/export stream in chunks, so memory stays bounded at
+millions of rows.
+"""
+import json
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+import disc_scoring
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    respondent TEXT,
+    cohort TEXT,
+    created_at INTEGER NOT NULL,
+    answers BLOB NOT NULL,
+    raw_d INTEGER NOT NULL,
+    raw_i INTEGER NOT NULL,
+    raw_s INTEGER NOT NULL,
+    raw_c INTEGER NOT NULL,
+    d REAL NOT NULL,
+    i REAL NOT NULL,
+    s REAL NOT NULL,
+    c REAL NOT NULL,
+    angle REAL NOT NULL,
+    magnitude REAL NOT NULL,
+    style INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_style ON results (style, created_at);
+CREATE INDEX IF NOT EXISTS results_created_at ON results (created_at, style);
+CREATE INDEX IF NOT EXISTS results_cohort ON results (cohort, created_at, style);
+"""
+
+INSERT = """
+INSERT INTO results (
+    respondent, cohort, created_at, answers,
+    raw_d, raw_i, raw_s, raw_c, d, i, s, c, angle, magnitude, style
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+COLUMNS = (
+    "id, respondent, cohort, created_at, answers, "
+    "raw_d, raw_i, raw_s, raw_c, d, i, s, c, angle, magnitude, style"
+)
+
+EXPORT_CHUNK_SIZE = 10000
+
+STORE_PATH = os.environ.get("DISC_STORE_PATH")
+
+
+def now_ms():
+    return time.time_ns() // 1_000_000
+
+
+class ResultStore:
+    """A results database; one instance per thread (sqlite3 connections are not shared)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        # WAL with NORMAL sync is durable across application crashes, and much faster
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        # Lets SQLite refresh the index statistics its query planner relies on
+        self.connection.execute("PRAGMA optimize")
+        self.connection.close()
+
+    def analyze(self):
+        """Refresh the query planner statistics, e.g. after a bulk import."""
+        self.connection.execute("ANALYZE")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def insert(self, ids, answers, scores, cohort=None, created_at=None):
+        """
+        Store a batch of scored respondents in one transaction.
+
+        `answers` is the (N x questions) int8 answer matrix that was scored into
+        `scores` (disc_scoring.BatchScores). Returns the number of rows stored.
+        """
+        answers = np.ascontiguousarray(np.atleast_2d(answers), dtype=np.int8)
+        created_at = now_ms() if created_at is None else created_at
+        rows = zip(
+            (None if respondent is None else str(respondent) for respondent in ids),
+            (answer.tobytes() for answer in answers),
+            scores.raw.astype(np.int64).tolist(),
+            scores.normalized.tolist(),
+            scores.angle.tolist(),
+            scores.magnitude.tolist(),
+            scores.style.tolist(),
+        )
+        with self.connection:
+            self.connection.executemany(INSERT, (
+                (respondent, cohort, created_at, blob, *raw, *normalized, angle, magnitude, style)
+                for respondent, blob, raw, normalized, angle, magnitude, style in rows
+            ))
+        return len(answers)
+
+    def _where(self, style=None, cohort=None, since=None, until=None):
+        clauses, params = [], []
+        if style is not None:
+            clauses.append("style = ?")
+            params.append(disc_scoring.STYLE_KEYS.index(style) if isinstance(style, str) else int(style))
+        if cohort is not None:
+            clauses.append("cohort = ?")
+            params.append(cohort)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(until)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def count(self, **filters):
+        """Number of stored results matching the filters (style, cohort, since, until)."""
+        where, params = self._where(**filters)
+        return self.connection.execute(f"SELECT COUNT(*) FROM results{where}", params).fetchone()[0]
+
+    def style_counts(self, cohort=None, since=None, until=None):
+        """{style key: count} of the stored results matching the filters."""
+        where, params = self._where(cohort=cohort, since=since, until=until)
+        rows = self.connection.execute(f"SELECT style, COUNT(*) FROM results{where} GROUP BY style", params)
+        return {disc_scoring.STYLE_KEYS[style]: count for style, count in rows}
+
+    def mean_scores(self, **filters):
+        """Mean normalized D, I, S, C scores of the results matching the filters (None if none match)."""
+        where, params = self._where(**filters)
+        row = self.connection.execute(f"SELECT AVG(d), AVG(i), AVG(s), AVG(c) FROM results{where}", params).fetchone()
+        return None if row[0] is None else disc_scoring.to_score_dict(row)
+
+    def iter_results(self, chunk_size=EXPORT_CHUNK_SIZE, **filters):
+        """Yield stored results as dicts, fetched `chunk_size` rows at a time."""
+        where, params = self._where(**filters)
+        cursor = self.connection.execute(f"SELECT {COLUMNS} FROM results{where} ORDER BY id", params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            for row in rows:
+                yield result_dict(row)
+
+    def export_jsonl(self, f, **filters):
+        """Stream the results matching the filters to a text file as JSONL; returns the row count."""
+        count = 0
+        for result in self.iter_results(**filters):
+            f.write(json.dumps(result) + "\n")
+            count += 1
+        return count
+
+
+def result_dict(row):
+    """One row of COLUMNS as a JSON-ready dict, in the format of the score command plus store fields."""
+    (result_id, respondent, cohort, created_at, answers,
+     raw_d, raw_i, raw_s, raw_c, d, i, s, c, angle, magnitude, style) = row
+    answers = np.frombuffer(answers, dtype=np.int8)
+    return {
+        "id": respondent if respondent is not None else result_id,
+        "cohort": cohort,
+        "created_at": created_at,
+        "answers": {str(q): int(answers[q]) for q in np.flatnonzero(answers)},
+        "raw_score": dict(zip(disc_scoring.STYLES, (raw_d, raw_i, raw_s, raw_c))),
+        "normalized_score": dict(zip(disc_scoring.STYLES, (d, i, s, c))),
+        "resultant_angle": angle,
+        "resultant_magnitude": magnitude,
+        "style": disc_scoring.STYLE_KEYS[style],
+    }
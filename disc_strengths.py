@@ -0,0 +1,139 @@
+"""
+Compiled forced-choice strengths engine for streangths.json.
+
+streangths.json is a Python literal (`questions = [...]`) of forced-choice
+questions: each has an option_a and an option_b, and each option is aligned
+with a list of traits. It is parsed once per process (through disc_data's
+cache, so edits are picked up) into:
+
+- a sorted trait vocabulary
+- a (2 options x questions x traits) incidence matrix, 1 where an option is
+  aligned with a trait
+
+Answer sheets are (respondents x questions) int8 matrices of choices:
+0 for option_a, 1 for option_b and -1 for unanswered. Tallying any number of
+sheets is then two matrix products instead of walking trait string lists.
+"""
+import ast
+import os
+from typing import NamedTuple
+
+import numpy as np
+
+import disc_data
+
+STRENGTHS_PATH = os.path.join(disc_data.BASE_DIR, "streangths.json")
+OPTIONS = ("option_a", "option_b")
+UNANSWERED = -1
+
+
+class StrengthsBank(NamedTuple):
+    questions: tuple  # question texts
+    options: tuple  # (option_a, option_b) texts per question
+    traits: tuple  # sorted trait vocabulary
+    incidence: np.ndarray  # read-only (2 x questions x traits) float32 incidence matrix
+    digest: str  # sha256 of streangths.json
+
+
+def _parse_strengths(data, digest):
+    source = data.decode("utf-8")
+    # Only the literal after "questions =" is evaluated, never executed as code
+    questions = ast.literal_eval(source[source.index("=") + 1:].strip())
+
+    traits = tuple(sorted({
+        trait for q in questions for option in OPTIONS for trait in q["alignment"][option]
+    }))
+    trait_index = {trait: i for i, trait in enumerate(traits)}
+
+    # Mostly zeros, but at ~180 KB a dense BLAS product is much faster than
+    # sparse gathers over the few non-zeros
+    incidence = np.zeros((len(OPTIONS), len(questions), len(traits)), dtype=np.float32)
+    for q, question in enumerate(questions):
+        for o, option in enumerate(OPTIONS):
+            for trait in question["alignment"][option]:
+                incidence[o, q, trait_index[trait]] += 1
+    incidence.flags.writeable = False
+
+    return StrengthsBank(
+        questions=tuple(q["question"] for q in questions),
+        options=tuple((q["option_a"], q["option_b"]) for q in questions),
+        traits=traits,
+        incidence=incidence,
+        digest=digest,
+    )
+
+
+def load_strengths_bank(path=STRENGTHS_PATH):
+    """The shared, compiled strengths bank."""
+    return disc_data.load_cached(path, _parse_strengths)
+
+
+def tally(choices, bank=None):
+    """(respondents x traits) int32 trait counts for a (respondents x questions) choice matrix."""
+    if bank is None:
+        bank = load_strengths_bank()
+    choices = np.atleast_2d(np.asarray(choices))
+    counts = (choices == 0).astype(np.float32) @ bank.incidence[0]
+    counts += (choices == 1).astype(np.float32) @ bank.incidence[1]
+    # float32 counts are exact far beyond the number of questions
+    return counts.astype(np.int32)
+
+
+def top_strengths(counts, k=5):
+    """
+    Indices of the k most chosen traits per respondent, highest count first.
+
+    Ties within the top k keep vocabulary order; which of several traits tied
+    at the cut-off makes it in is unspecified.
+    """
+    counts = np.atleast_2d(counts)
+    k = min(k, counts.shape[1])
+    if k < counts.shape[1]:
+        top = np.argpartition(-counts, k - 1, axis=1)[:, :k]
+    else:
+        top = np.broadcast_to(np.arange(k), counts.shape).copy()
+    # Order the k picks by count, then by vocabulary position
+    top.sort(axis=1)
+    order = np.argsort(-np.take_along_axis(counts, top, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(top, order, axis=1)
+
+
+def strengths_results(counts, k=5, bank=None):
+    """
+    The top-k strengths of every respondent as [{"trait": ..., "count": ...}] lists.
+
+    Traits that were never chosen are left out.
+    """
+    if bank is None:
+        bank = load_strengths_bank()
+    counts = np.atleast_2d(counts)
+    top = top_strengths(counts, k)
+    top_counts = np.take_along_axis(counts, top, axis=1)
+    return [
+        [{"trait": bank.traits[i], "count": c} for i, c in zip(row, row_counts) if c > 0]
+        for row, row_counts in zip(top.tolist(), top_counts.tolist())
+    ]
+
+
+def choices_matrix(answer_sheets, n_questions):
+    """
+    (respondents x questions) int8 choice matrix from {question id: "a" | "b"} answer sheets.
+
+    Question ids are 0-based positions in streangths.json; a sheet may be None
+    when the respondent answered no forced-choice questions. Raises ValueError
+    for any other question id or option.
+    """
+    choices = np.full((len(answer_sheets), n_questions), UNANSWERED, dtype=np.int8)
+    for row, answers in enumerate(answer_sheets):
+        for question, option in (answers or {}).items():
+            if option not in ("a", "b"):
+                raise ValueError('Strengths answers must be "a" or "b"')
+            try:
+                col = int(question)
+            except (TypeError, ValueError):
+                col = -1
+            # Negative ids would otherwise index from the end
+            if not 0 <= col < n_questions:
+                raise ValueError(f"Strengths question id {question!r} is not in 0-{n_questions - 1}")
+            choices[row, col] = option == "b"
+    return choices
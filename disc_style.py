@@ -1,16 +1,19 @@
 import streamlit as st
 import numpy as np
-import matplotlib.pyplot as plt
-import random
 import json
 import base64
-from io import BytesIO
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table, TableStyle, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from io import StringIO
-import math
+import disc_adaptive
+import disc_artifacts
+import disc_data
+import disc_metrics
+import disc_scoring
+import disc_session
+import disc_store
+import disc_warmup
+
+# disc_plot and disc_report pull in matplotlib and reportlab, so they are only
+# imported on the results page (and warmed up in the background before that)
 
 
 st.set_page_config(
@@ -64,10 +67,15 @@ if "uploaded_file" not in st.session_state:
     st.session_state.uploaded_file = None
 
 if "raw_score" not in st.session_state:
-    st.session_state.raw_score = {"D": 0, "I": 0, "S": 0, "C": 0}
+    st.session_state.raw_score = disc_session.new_raw_score()
+
+if "bound_score" not in st.session_state:
+    st.session_state.bound_score = disc_session.new_bound_score()
 
-if "score" not in st.session_state:
-    st.session_state.score = {"D": 0, "I": 0, "S": 0, "C": 0}
+# Timing spans and counters are no-ops unless DISC_METRICS_FILE or DISC_METRICS_PORT is set
+disc_metrics.start_exporters()
+# Full script runs only: answering a question reruns just the question page fragment
+disc_metrics.inc("reruns")
 
 # If the user hasn't started the assessment yet
 if not st.session_state.started:
@@ -91,8 +99,19 @@ if not st.session_state.started:
     # Create layout for buttons
     c1, c2, c3 = st.columns([1, 2, 1])
 
+    # Adaptive mode picks each question from the answers so far and stops once the style is clear
+    adaptive_mode = c2.checkbox("Adaptive mode (fewer questions)")
+    # Adaptive mode needs each answer before it can pick the next question
+    multi_question_pages = c2.checkbox(
+        f"Show {disc_session.QUESTIONS_PER_PAGE} questions per page", disabled=adaptive_mode
+    )
+
     # Handle the "Let's Begin" button press
     if c1.button("Let's Begin"):
+        st.session_state.adaptive_mode = adaptive_mode
+        st.session_state.questions_per_page = (
+            disc_session.QUESTIONS_PER_PAGE if multi_question_pages and not adaptive_mode else 1
+        )
         st.session_state.started = True
         st.session_state.submitted = False
         st.rerun()  # Rerun the script to move to the next stage
@@ -122,55 +141,13 @@ if not st.session_state.started:
                 st.session_state.show_results = True
                 st.session_state.submitted = True
                 st.write("File uploaded and processed successfully!")
+                disc_metrics.inc("uploads")
                 st.rerun()  # Rerun to process the results
 
             except json.JSONDecodeError as e:
                 st.error(f"Error decoding JSON: {e}")
 
 
-# Updated plot function
-def create_disc_plot(resultant_angle, resultant_magnitude):
-    # Reduce the size of the figure by modifying figsize
-    fig, ax = plt.subplots(
-        figsize=(10, 10), subplot_kw={"projection": "polar"}
-    )  # Reduce size from 10x10 to 6x6
-
-    # The rest of your plotting code remains unchanged
-    ax.set_theta_offset(np.pi / 2)
-    ax.set_theta_direction(-1)
-    ax.set_ylim(0, 1.01)
-
-    ax.plot(
-        resultant_angle,
-        resultant_magnitude,
-        "o",
-        markersize=24,
-        color="#4CAF50",
-        label="Your DISC Style",
-    )
-
-    categories = ["D", "I", "S", "C"]
-    angles = [7 * np.pi / 4, np.pi / 4, 3 * np.pi / 4, 5 * np.pi / 4]
-    ax.set_xticks(angles)
-    ax.set_xticklabels(categories, fontsize=14, fontweight="bold")
-
-    ax.axvline(x=0, color="gray", linestyle="--", alpha=0.7)
-    ax.axvline(x=np.pi, color="gray", linestyle="--", alpha=0.7)
-
-    ax.axvline(x=np.pi / 2, color="gray", linestyle="--", alpha=0.7)
-    ax.axvline(x=3 * np.pi / 2, color="gray", linestyle="--", alpha=0.7)
-
-    ax.set_yticklabels([])
-
-    ax.grid(True, alpha=0.3)
-    ax.spines["polar"].set_visible(False)
-    ax.set_facecolor("#f0f2f6")
-
-    plt.title("Your DISC Style Profile", fontsize=16, fontweight="bold", pad=20)
-
-    return fig
-
-
 # Function to download JSON data
 def get_json_download_link(normalized_score):
     json_str = json.dumps(normalized_score, indent=2)
@@ -179,17 +156,25 @@ def get_json_download_link(normalized_score):
     return href
 
 
+# Bump whenever the JSON download's format changes so cached downloads are not reused
+JSON_TEMPLATE_VERSION = 1
+
+
 def get_json_download_button(normalized_score):
-    # Convert the normalized score dictionary into a JSON string
-    json_str = json.dumps(normalized_score, indent=2)
+    with disc_metrics.span("download_encoding"):
+        # Convert the normalized score dictionary into a JSON string (cached per profile)
+        json_str = disc_artifacts.artifact_cache.get_or_create(
+            disc_artifacts.artifact_key("json", normalized_score, None, JSON_TEMPLATE_VERSION),
+            lambda: json.dumps(normalized_score, indent=2).encode(),
+        )
 
-    # Create a downloadable button using the JSON data
-    st.download_button(
-        label="Download JSON Results",
-        data=json_str,
-        file_name="disc_results.json",
-        mime="application/json",
-    )
+        # Create a downloadable button using the JSON data
+        st.download_button(
+            label="Download JSON Results",
+            data=json_str,
+            file_name="disc_results.json",
+            mime="application/json",
+        )
 
 
 # Function to download PDF report
@@ -200,247 +185,162 @@ def get_pdf_download_link(pdf_buffer):
     return href
 
 
-def get_pdf_download_button(pdf_buffer):
-    # Encode the PDF buffer in base64
-    b64 = base64.b64encode(pdf_buffer.getvalue()).decode()
-
-    # Convert base64 PDF into a downloadable button
-    st.download_button(
-        label="Download PDF Report",
-        data=pdf_buffer.getvalue(),
-        file_name="disc_report.pdf",
-        mime="application/pdf",
-    )
+def get_pdf_download_button(pdf_bytes):
+    # Streamlit serves the bytes directly, no base64 encoding needed
+    with disc_metrics.span("download_encoding"):
+        st.download_button(
+            label="Download PDF Report",
+            data=pdf_bytes,
+            file_name="disc_report.pdf",
+            mime="application/pdf",
+        )
 
 
 def describe_style(normalized_score, resultant_angle):
     """
-    Determine the user's DISC style based on the resultant vector (angle and magnitude) on the DISC wheel.
+    Display the user's DISC style based on the resultant vector on the DISC wheel.
+    Classification itself is done by disc_scoring.classify(); this only renders it.
     Args:
         normalized_score: Dictionary of normalized scores for D, I, S, C styles.
         resultant_angle: The resultant angle in radians.
-        resultant_magnitude: The resultant magnitude (how strongly the traits are combined).
 
     Returns:
         A string description of the DISC style.
     """
+    values = [normalized_score[style] for style in disc_scoring.STYLES]
+    style_key = disc_scoring.STYLE_KEYS[disc_scoring.classify(values, resultant_angle)]
 
-    # Convert the resultant angle from radians to degrees
-    resultant_degrees = math.degrees(resultant_angle)
-    if resultant_degrees < 0:
-        resultant_degrees += 360  # Convert negative angles to positive
-
-    # Define the angular ranges for main styles and combinations
-    style_ranges = {
-        # D (Dominance)
-        "D": (315, 337.5),
-        "DC": (270, 315),
-        "DI": (337.5, 360),  # Also covers the 0 degree point
-        
-        # I (Influence)
-        "I": (45, 67.5),
-        "ID": (0, 45),
-        "IS": (67.5, 90),
-        
-        # S (Steadiness)
-        "S": (135, 157.5),
-        "SI": (90, 135),
-        "SC": (157.5, 180),
-        
-        # C (Conscientiousness)
-        "C": (225, 247.5),
-        "CS": (180, 225),
-        "CD": (247.5, 270)
-    }
-
-    # Check if all normalized scores are equal (balanced style)
-    if all(score == list(normalized_score.values())[0] for score in normalized_score.values()):
+    if style_key == "Balanced":
         st.markdown("### Balanced Style")
         st.markdown(
             "Your responses indicate a balanced personality, where you do not show a clear preference for any specific DISC style."
         )
         return "Balanced Style"
 
-    # Determine which range the resultant angle falls into
-    for style, (start_angle, end_angle) in style_ranges.items():
-        if start_angle <= resultant_degrees < end_angle or (start_angle == 337.5 and resultant_degrees == 0):
-            # If it's a combination style, look up the combination description
-            description = disc_descriptions["single"][style]
-            
-            # Display the result
-            st.markdown(f"{description['title']}\n\n{description['description']}")
-            st.markdown(f"**Strengths:** {description['strengths']}")
-            st.markdown(f"**Challenges:** {description['challenges']}")
-            return f"{description['title']}\n\n{description['description']}\n\nStrengths: {description['strengths']}\n\nChallenges: {description['challenges']}"
-    
-    # Default fallback if no match is found
-    st.markdown("### Balanced Style")
-    st.markdown(
-        "Your responses indicate a balanced personality without a clear preference for any specific DISC style."
+    description = disc_descriptions[style_key]
+
+    # Display the result
+    st.markdown(f"{description.title}\n\n{description.description}")
+    st.markdown(f"**Strengths:** {description.strengths}")
+    st.markdown(f"**Challenges:** {description.challenges}")
+    return disc_scoring.format_style_description(style_key, disc_descriptions)
+
+
+def normalize_scores(raw_score, item_indices):
+    # Bounds of the raw scores for the questions that were asked (cached per subset)
+    # Adaptive sessions leave unused positions at -1
+    min_possible_scores, max_possible_scores = disc_scoring.subset_bounds(
+        item_indices[item_indices >= 0].tolist()
     )
-    return "Balanced Style"
+    normalized_scores = disc_scoring.normalize(raw_score, min_possible_scores, max_possible_scores)
+    return disc_scoring.to_score_dict(normalized_scores)
 
 
+ANSWER_OPTIONS = [
+    "Select an option",
+    "1 - Completely Disagree",
+    "2 - Somehow Disagree",
+    "3 - Neutral",
+    "4 - Somehow Agree",
+    "5 - Completely Agree",
+]
 
-def normalize_scores(scores, questions):
-    max_possible_scores = {style: 0.0 for style in ["D", "I", "S", "C"]}
-    min_possible_scores = {style: 0.0 for style in ["D", "I", "S", "C"]}
 
-    for q in questions:
-        for style in ["D", "I", "S", "C"]:
-            mapping = q["mapping"][style]
-            if mapping >= 0:
-                max_contribution = mapping * 2  # Max when (answer - 3) = +2
-                min_contribution = mapping * (-2)  # Min when (answer - 3) = -2
-            else:
-                max_contribution = mapping * (-2)  # Max when (answer - 3) = -2
-                min_contribution = mapping * 2  # Min when (answer - 3) = +2
-
-            max_possible_scores[style] += max_contribution
-            min_possible_scores[style] += min_contribution
-
-    print(f"Max possible scores: {max_possible_scores}")
-    print(f"Min possible scores: {min_possible_scores}")
-
-    normalized_scores = {}
-    for style in ["D", "I", "S", "C"]:
-        # Ensure the raw score is within the possible range
-        score = max(min(scores[style], max_possible_scores[style]), min_possible_scores[style])
-        score_range = max_possible_scores[style] - min_possible_scores[style]
-        if score_range == 0:
-            normalized_scores[style] = 50.0  # Neutral score if no variation is possible
+def submit_page(start, end):
+    """
+    Form callback of the question page: record the page's answers.
+
+    Callbacks run before the rerun the submit triggers, so that rerun
+    already shows the next page (one rerun per page instead of two).
+    """
+    selected_options = [st.session_state[f"radio_{i}"] for i in range(start, end)]
+    if ANSWER_OPTIONS[0] in selected_options:
+        st.session_state.missing_answer = True
+        return
+
+    with disc_metrics.span("scoring"):
+        for i, selected_option in zip(range(start, end), selected_options):
+            # Update the running raw score and bounds with this answer only;
+            # option n of ANSWER_OPTIONS is the answer n on the 1-5 scale
+            disc_session.record_answer(
+                st.session_state.item_indices,
+                st.session_state.answers,
+                st.session_state.raw_score,
+                st.session_state.bound_score,
+                i,
+                ANSWER_OPTIONS.index(selected_option),
+            )
+        if st.session_state.get("adaptive_mode", False):
+            # Pick the next question, or end the test as the page's button announced
+            has_next = disc_adaptive.advance(
+                st.session_state.item_indices,
+                st.session_state.raw_score,
+                st.session_state.bound_score,
+                start,
+                st.session_state.adaptive_ends,
+                np.random.default_rng(),
+            )
         else:
-            normalized_scores[style] = ((score - min_possible_scores[style]) / score_range) * 100
-            # Ensure the normalized score is within 0 to 100
-            normalized_scores[style] = max(0, min(normalized_scores[style], 100))
-    return normalized_scores
-
-
-# Function to create PDF report
-def create_pdf_report(normalized_score, relative_percentages, fig, style_description):
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=50, bottomMargin=50)
-    styles = getSampleStyleSheet()
-    
-    # Define custom styles for better formatting
-    styles.add(ParagraphStyle(name='Justify', alignment=4, leading=12))
-    styles.add(ParagraphStyle(name='Heading2Center', parent=styles['Heading2'], alignment=1))
-    styles.add(ParagraphStyle(name='BodyTextCenter', parent=styles['BodyText'], alignment=1))
-    
-    story = []
-
-    # Title
-    story.append(Paragraph("DISC Personality Assessment Report", styles["Title"]))
-    story.append(Spacer(1, 20))
-
-    # Add Introduction
-    story.append(Paragraph("Thank you for completing the DISC Personality Assessment. This report provides insights into your personality style based on your responses.", styles['Justify']))
-    story.append(Spacer(1, 20))
-
-    # Add DISC Style Breakdown (Absolute Scores)
-    story.append(Paragraph("Your DISC Style Breakdown (Absolute Scores):", styles["Heading2"]))
-    story.append(Spacer(1, 10))
-    story.append(Paragraph("The following scores represent your absolute level in each DISC style on a scale from 0% to 100%. A higher percentage indicates a stronger tendency towards that style.", styles['Justify']))
-    story.append(Spacer(1, 10))
-
-    # Create a table for absolute scores
-    data = [['Style', 'Score (0-100%)']]
-    for style, score in normalized_score.items():
-        data.append([style, f"{score:.2f}%"])
-
-    table = Table(data, hAlign='LEFT', colWidths=[100, 150])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('ALIGN', (1, 1), (-1, -1), 'CENTER'),
-    ]))
-    story.append(table)
-    story.append(Spacer(1, 20))
-
-    # Add DISC Style Breakdown (Relative Percentages)
-    story.append(Paragraph("Your DISC Style Breakdown (Relative Percentages):", styles["Heading2"]))
-    story.append(Spacer(1, 10))
-    story.append(Paragraph("These percentages represent the proportion of each DISC style relative to your overall personality profile. The total sums up to 100%.", styles['Justify']))
-    story.append(Spacer(1, 10))
-
-    # Create a table for relative percentages
-    data = [['Style', 'Relative Percentage']]
-    for style, score in relative_percentages.items():
-        data.append([style, f"{score:.2f}%"])
-
-    table = Table(data, hAlign='LEFT', colWidths=[100, 150])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('ALIGN', (1, 1), (-1, -1), 'CENTER'),
-    ]))
-    story.append(table)
-    story.append(Spacer(1, 20))
-
-    # Explanation about the difference between Absolute Scores and Relative Percentages
-    story.append(Paragraph("Understanding Your Scores:", styles["Heading2"]))
-    story.append(Spacer(1, 10))
-    story.append(Paragraph(
-        "The absolute scores indicate how strongly you exhibit each DISC style on its own, without comparison to other styles. A higher score means you tend to display more behaviors associated with that style.\n\n"
-        "The relative percentages show how each style contributes to your overall personality profile compared to the other styles. These percentages sum up to 100% and help you understand which styles are most dominant in your personality.",
-        styles['Justify']
-    ))
-    story.append(Spacer(1, 100))
-
-    # Add the plot as an image
-    img_buffer = BytesIO()
-    fig.savefig(img_buffer, format="png", dpi=300, bbox_inches="tight")
-    img_buffer.seek(0)
-    img = Image(img_buffer, width=400, height=400)
-    story.append(Spacer(1, 10))
-    story.append(img)
-    story.append(Spacer(1, 20))
-
-    # Add personalized style description
-    story.append(Paragraph("Your Personalized DISC Style Description:", styles["Heading2"]))
-    story.append(Spacer(1, 10))
-    story.append(Paragraph(style_description.replace("###", ""), styles['Justify']))
-    story.append(Spacer(1, 50))
-
-    story.append(PageBreak())
-    # Add explanation about each DISC style
-    story.append(Paragraph("Understanding All DISC Styles:", styles["Heading2"]))
-    story.append(Spacer(1, 10))
-    styles_list = [
-        ('Dominance (D):', 'You tend to be direct, results-oriented, and assertive. You are motivated by challenges and achieving tangible results.'),
-        ('Influence (I):', 'You are typically outgoing, enthusiastic, and optimistic. You enjoy social interactions and persuading others.'),
-        ('Steadiness (S):', 'You are often patient, supportive, and team-oriented. You value cooperation and harmony in relationships.'),
-        ('Conscientiousness (C):', 'You tend to be analytical, precise, and detail-oriented. You focus on accuracy, quality, and expertise.')
-    ]
-    for title, description in styles_list:
-        story.append(Paragraph(f"<b>{title}</b> {description}", styles['Justify']))
-        story.append(Spacer(1, 5))
-    story.append(Spacer(1, 10))
-
-    # Add final remarks
-    story.append(
-        Paragraph(
-            "Remember, everyone has aspects of all four styles, but most people tend to gravitate towards one or two primary styles. "
-            "Your unique combination of styles influences how you communicate, make decisions, and interact with others.",
-            styles['Justify']
+            has_next = end < len(st.session_state.item_indices)
+    if has_next:
+        st.session_state.page_number += 1
+    else:
+        # Set flags to show results and indicate submission
+        st.session_state.show_results = True
+        st.session_state.submitted = False  # Ensure this is reset
+        disc_metrics.inc("completions")
+
+
+@st.fragment
+def question_page(item_bank):
+    """
+    The current page of questions.
+
+    Runs as a fragment: submitting a page reruns only this function, not the
+    whole script (page setup, session checks, data loading). The full script
+    only runs again once the assessment is complete, to show the results.
+    """
+    if st.session_state.show_results:
+        # The last page was just submitted
+        st.rerun()
+    disc_metrics.inc("question_page_runs")
+
+    questions_per_page = st.session_state.get("questions_per_page", 1)
+    total_questions = len(st.session_state.item_indices)
+    total_pages = (total_questions + questions_per_page - 1) // questions_per_page  # Ceiling division
+    start = st.session_state.page_number * questions_per_page
+    end = min(start + questions_per_page, total_questions)
+    last_page = st.session_state.page_number >= total_pages - 1
+
+    # Calculate progress
+    if st.session_state.get("adaptive_mode", False):
+        # The test ends once the style is stable, usually before the last question
+        # Whether this answer ends the test is decided here, once, and honored on submit
+        progress, st.session_state.adaptive_ends = disc_adaptive.outlook(
+            st.session_state.item_indices, st.session_state.answers, np.random.default_rng()
         )
-    )
-    story.append(Spacer(1, 10))
-    story.append(
-        Paragraph(
-            "Use this insight to enhance your personal and professional relationships by recognizing and appreciating different styles in yourself and others.",
-            styles['Justify']
+        st.progress(progress)
+        last_page = last_page or st.session_state.adaptive_ends
+    else:
+        st.progress(start / total_questions)
+
+    with disc_metrics.span("question_render"), st.form(key=f"form_{st.session_state.page_number}"):
+        for i in range(start, end):
+            question = item_bank.questions[st.session_state.item_indices[i]]
+            st.markdown(f"#### {i + 1}) {question}")
+            st.radio(
+                "Choose your response",
+                options=ANSWER_OPTIONS,
+                index=0,
+                key=f"radio_{i}",
+                horizontal=True,
+            )
+        st.form_submit_button(
+            "**Show My DISC Style**" if last_page else "Next", on_click=submit_page, args=(start, end)
         )
-    )
 
-    # Build the PDF
-    doc.build(story)
-
-    # Ensure we return the buffer to be used for downloading
-    buffer.seek(0)
-    return buffer
+    if st.session_state.pop("missing_answer", False):
+        st.warning("Please select a response to every question to proceed.")
 
 
 # If the user has started the test, proceed with the questions
@@ -450,11 +350,6 @@ if st.session_state.started:
     if "page_number" not in st.session_state:
         st.session_state.page_number = 0
 
-    if "score" not in st.session_state:
-        st.session_state.score = {"D": 0, "I": 0, "S": 0, "C": 0}
-
-    if "answers" not in st.session_state:
-        st.session_state.answers = {}
 
     if "show_results" not in st.session_state:
         st.session_state.show_results = False
@@ -462,97 +357,48 @@ if st.session_state.started:
     if "submitted" not in st.session_state:
         st.session_state.submitted = False
 
-    if "questions" not in st.session_state:
-        questions = json.load(open("questions.json", "r"))
-        random.shuffle(questions)
-        st.session_state.questions = questions[:30]  # Use the first 30 questions
+    # Item bank and descriptions are parsed once per process and shared by all sessions
+    item_bank = disc_data.load_item_bank()
 
-    questions_per_page = 1  # Show one question at a time
-    total_questions = len(st.session_state.questions)
-    total_pages = (
-        total_questions + questions_per_page - 1
-    ) // questions_per_page  # Ceiling division
+    # Sessions only keep indices into the shared item bank and a compact answer vector
+    if "item_indices" not in st.session_state:
+        if st.session_state.get("adaptive_mode", False):
+            st.session_state.item_indices = disc_adaptive.new_adaptive_items()
+        else:
+            st.session_state.item_indices = disc_session.draw_items(bank_size=len(item_bank.questions))
 
-    # Load DISC descriptions
-    disc_descriptions = json.load(open("disc_descriptions.json", "r"))
+    if "answers" not in st.session_state:
+        st.session_state.answers = disc_session.new_answers(len(st.session_state.item_indices))
 
     if not st.session_state.show_results:
-        start = st.session_state.page_number * questions_per_page
-        end = start + questions_per_page
+        # Import and warm up the results page dependencies while the questions are answered
+        disc_warmup.start()
 
-        # Calculate progress
-        progress = (st.session_state.page_number) / total_questions
+        question_page(item_bank)
+    else:
+        import disc_plot
+        import disc_report
 
-        # Display progress bar outside the form
-        st.progress(progress)
-        
-        with st.form(key=f"form_{st.session_state.page_number}"):
-            i = start
-            if i < total_questions:
-                q = st.session_state.questions[i]
-                n = i + 1
-                st.markdown(f"#### {n}) {q['question']}")
-                options = [
-                    "Select an option",
-                    "1 - Completely Disagree",
-                    "2 - Somehow Disagree",
-                    "3 - Neutral",
-                    "4 - Somehow Agree",
-                    "5 - Completely Agree",
-                ]
-                selected_option = st.radio(
-                    "Choose your response",
-                    options=options,
-                    index=0,
-                    key=f"radio_{i}",
-                    horizontal=True,
-                )
-                if st.session_state.page_number < total_pages - 1:
-                    submit_button = st.form_submit_button("Next")
-                else:
-                    submit_button = st.form_submit_button("**Show My DISC Style**")
-            else:
-                submit_button = st.form_submit_button("**Show My DISC Style**")
+        # Load DISC descriptions
+        disc_descriptions = disc_data.load_descriptions()
 
-        if submit_button:
-            if selected_option == "Select an option":
-                st.warning("Please select a response to proceed.")
-            else:
-                # Map the selected option to a score
-                score_mapping = {
-                    "1 - Completely Disagree": 1,
-                    "2 - Somehow Disagree": 2,
-                    "3 - Neutral": 3,
-                    "4 - Somehow Agree": 4,
-                    "5 - Completely Agree": 5,
-                }
-                st.session_state.answers[i] = score_mapping[selected_option]
-                if st.session_state.page_number < total_pages - 1:
-                    st.session_state.page_number += 1
-                    st.rerun()
-                else:
-                    # Set flags to show results and indicate submission
-                    st.session_state.show_results = True
-                    st.session_state.submitted = False  # Ensure this is reset
-                    st.rerun()
-    else:
         # After the user has completed the assessment or uploaded results
         if not st.session_state.submitted:
-            # Reset the scores before calculating
-            st.session_state.score = {"D": 0, "I": 0, "S": 0, "C": 0}
-            # Calculate raw scores
-            for i in range(total_questions):
-                q = st.session_state.questions[i]
-                answer = st.session_state.answers[i]
-                for style in ["D", "I", "S", "C"]:
-                    st.session_state.score[style] += q["mapping"][style] * (answer - 3)
-            print(f'Raw score: {st.session_state.score}')
-            st.session_state.raw_score = st.session_state.score.copy()
-
-            # Normalize the scores
-            normalized_score = normalize_scores(st.session_state.score, st.session_state.questions)
-            print(f'Normalized score: {normalized_score}')
+            # The running scores are already complete, only normalization is left
+            with disc_metrics.span("normalization"):
+                normalized, _, _, _ = disc_session.provisional_profile(
+                    st.session_state.raw_score, st.session_state.bound_score
+                )
+                normalized_score = disc_scoring.to_score_dict(normalized)
             st.session_state.normalized_score = normalized_score
+
+            # Keep a server-side history of completed assessments when a store is configured
+            if disc_store.STORE_PATH:
+                answers = disc_session.answer_row(
+                    st.session_state.item_indices, st.session_state.answers, len(item_bank.questions)
+                )
+                with disc_store.ResultStore(disc_store.STORE_PATH) as store:
+                    store.insert([None], answers, disc_scoring.score_answers(answers))
             st.session_state.submitted = True  # Set to True to avoid recalculation
         
         
@@ -561,56 +407,35 @@ if st.session_state.started:
             if 'normalized_score' in st.session_state:
                 normalized_score = st.session_state.normalized_score
             else:
-                # If not, recalculate it from st.session_state.score
-                normalized_score = normalize_scores(st.session_state.score, st.session_state.questions)
+                # If not, recalculate it from st.session_state.raw_score
+                with disc_metrics.span("normalization"):
+                    normalized_score = normalize_scores(
+                        st.session_state.raw_score, st.session_state.item_indices
+                    )
                 st.session_state.normalized_score = normalized_score
 
-        print(f'Normalized score: {normalized_score}')
-        
-        # Define the categories and their positions
-        categories = ["D", "I", "S", "C"]
+        # Prepare the values in the D, I, S, C order used by the scoring engine
+        values = [normalized_score[cat] for cat in disc_scoring.STYLES]
 
-        # Angles for the styles
-        angles = [7 * np.pi / 4, np.pi / 4, 3 * np.pi / 4, 5 * np.pi / 4]
-
-        # Prepare the values
-        values = [normalized_score[cat] for cat in categories]
-        
-        # Divide Each Normalized Score by 100:
-        scaled_scores = {style: score / 100 for style, score in normalized_score.items()}
-
-        # Compute x and y components of the style vectors
-        x_components = []
-        y_components = []
-        for style in categories:
-            angle = angles[categories.index(style)]
-            magnitude = scaled_scores[style]
-            x_components.append(magnitude * np.cos(angle))
-            y_components.append(magnitude * np.sin(angle))
-
-        # Sum the components
-        total_x = sum(x_components)
-        total_y = sum(y_components)
-
-        # Compute the resultant vector
-        resultant_magnitude = np.sqrt(total_x**2 + total_y**2)
-        resultant_angle = np.arctan2(total_y, total_x)
-        
-        print(f"Resultant magnitude: {resultant_magnitude}")
+        # Compute the resultant vector of the style vectors on the DISC wheel
+        resultant_angle, resultant_magnitude = disc_scoring.resultant(values)
 
         # Ensure the magnitude does not exceed 1
         # resultant_magnitude = min(resultant_magnitude, 1.0)
 
-        # Create the updated plot
-        fig = create_disc_plot(resultant_angle, resultant_magnitude)
-
         # Use Streamlit columns to control the figure width
         col1, col2, col3 = st.columns(
             [1, 2, 1]
         )  # Adjust the middle column width (2/4 of the page width)
 
         with col2:  # Display the plot in the middle column
-            st.pyplot(fig)
+            # Only the marker is drawn per new profile; the wheel itself is cached per process
+            with disc_metrics.span("plot"):
+                wheel_png = disc_artifacts.artifact_cache.get_or_create(
+                    disc_artifacts.artifact_key("png", normalized_score, None, disc_plot.TEMPLATE_VERSION),
+                    lambda: disc_plot.render_disc_png(resultant_angle, resultant_magnitude),
+                )
+            st.image(wheel_png)
 
         # Personalized Style Descriptions
         st.markdown("## Your Personalized DISC Style")
@@ -632,13 +457,9 @@ if st.session_state.started:
         #         # Display the score as a percentage
         #         st.text(f"{score_value:.2f}%")
                 
-        total_normalized = sum(normalized_score.values())
-        relative_percentages = {}
-        for style, score in normalized_score.items():
-            if total_normalized == 0:
-                relative_percentages[style] = 0
-            else:
-                relative_percentages[style] = (score / total_normalized) * 100
+        relative_percentages = disc_scoring.to_score_dict(
+            disc_scoring.relative_percentages(values)
+        )
         
         st.markdown("## Your DISC Style Breakdown")
         st.write("Relative Percentages")
@@ -659,13 +480,20 @@ if st.session_state.started:
         with col1:
             get_json_download_button(normalized_score)
         with col2:
-            pdf_buffer = create_pdf_report(
-                            normalized_score=normalized_score,
-                            relative_percentages=relative_percentages,
-                            fig=fig,
-                            style_description=style_description
-                        )
-            get_pdf_download_button(pdf_buffer)
+            # The report is only built once per distinct profile, not on every rerun
+            with disc_metrics.span("pdf"):
+                pdf_bytes = disc_artifacts.artifact_cache.get_or_create(
+                    disc_artifacts.artifact_key(
+                        "pdf", normalized_score, style_description, disc_report.REPORT_TEMPLATE_VERSION
+                    ),
+                    lambda: disc_report.create_pdf_report(
+                        normalized_score=normalized_score,
+                        relative_percentages=relative_percentages,
+                        wheel=disc_report.wheel_drawing(resultant_angle, resultant_magnitude),
+                        style_description=style_description,
+                    ).getvalue(),
+                )
+            get_pdf_download_button(pdf_bytes)
 
         # Explanation about DISC styles
         st.markdown("""---""")
@@ -684,11 +512,12 @@ if st.session_state.started:
         )
 
         if st.button("Restart"):
-            st.session_state.pop("page_number")
-            st.session_state.pop("score")
-            st.session_state.pop("answers")
-            st.session_state.pop("show_results")
-            st.session_state.pop("questions")
+            st.session_state.pop("page_number", None)
+            st.session_state.pop("raw_score", None)
+            st.session_state.pop("bound_score", None)
+            st.session_state.pop("answers", None)
+            st.session_state.pop("show_results", None)
+            st.session_state.pop("item_indices", None)
             st.rerun()
 
 
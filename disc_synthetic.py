@@ -0,0 +1,45 @@
+"""
+Seeded synthetic respondents for simulations and benchmarks.
+
+Each respondent has a latent D, I, S, C trait vector. Their answer to a
+question follows the question's mapping: the agreement leans towards 5 when
+the mapping points the same way as the traits and towards 1 when it points
+the other way, plus response noise, rounded and clipped to the 1-5 scale.
+"""
+import numpy as np
+
+import disc_scoring
+
+# How strongly the latent traits drive the answers, and the answer noise
+TRAIT_SCALE = 0.6
+ANSWER_NOISE = 0.8
+
+
+def latent_traits(count, rng):
+    """(count x 4) latent D, I, S, C trait vectors."""
+    return rng.standard_normal((count, len(disc_scoring.STYLES)))
+
+
+def simulate_answers(latent, mapping, rng, noise=ANSWER_NOISE):
+    """(respondents x questions) int8 answers to every question of the item bank."""
+    agreement = 3 + TRAIT_SCALE * (latent @ mapping.T.astype(np.float64))
+    if noise:
+        agreement += noise * rng.standard_normal(agreement.shape)
+    return np.clip(np.rint(agreement), 1, 5).astype(np.int8)
+
+
+def random_subsets(count, bank_size, subset_size, rng):
+    """(count x bank_size) boolean masks of random question subsets, like the app draws."""
+    order = np.argsort(rng.random((count, bank_size)), axis=1)
+    asked = np.zeros((count, bank_size), dtype=bool)
+    np.put_along_axis(asked, order[:, :subset_size], True, axis=1)
+    return asked
+
+
+def synthetic_answers(count, rng, subset_size=30, mapping=None):
+    """Answer matrix of `count` respondents who each answered a random subset of the bank."""
+    if mapping is None:
+        mapping = disc_scoring.load_mapping_matrix()
+    answers = simulate_answers(latent_traits(count, rng), mapping, rng)
+    answers[~random_subsets(count, len(mapping), subset_size, rng)] = 0
+    return answers
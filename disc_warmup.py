@@ -0,0 +1,47 @@
+"""
+Background warm-up of the results page.
+
+The app only imports disc_plot and disc_report (matplotlib and reportlab) on
+the results page, so the welcome page and the questions render without them.
+start() does that import on a daemon thread while the respondent is still
+answering, and also draws the cached DISC wheel backgrounds and builds the
+report stylesheet, so the results page usually finds everything ready.
+
+Set DISC_WARM_UP=0 to turn the background warm-up off.
+"""
+import os
+import threading
+
+enabled = os.environ.get("DISC_WARM_UP", "1") != "0"
+
+# Set once the warm-up has finished (successfully or not)
+done = threading.Event()
+
+_lock = threading.Lock()
+_started = False
+
+
+def _warm_up():
+    try:
+        import disc_plot
+        import disc_report
+
+        disc_plot.render_disc_png(0, 0)
+        disc_report.report_styles()
+        disc_report.wheel_drawing(0, 0)
+    except Exception:
+        pass  # Best effort only: the results page imports and builds all of this itself
+    finally:
+        done.set()
+
+
+def start():
+    """Start the warm-up once per process (cheap to call on every rerun)."""
+    global _started
+    if not enabled or _started:
+        return
+    with _lock:
+        if _started:
+            return
+        _started = True
+    threading.Thread(target=_warm_up, name="disc-warm-up", daemon=True).start()
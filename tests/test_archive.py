@@ -0,0 +1,57 @@
+"""
+disc_archive.columns_from_json() on stored results, valid and malformed.
+"""
+import math
+
+import pytest
+
+import disc_archive
+import disc_scoring
+
+N_QUESTIONS = 10
+SCORES = {"D": 80.0, "I": 60.0, "S": 30.0, "C": 40.0}
+STORED = {"resultant_angle": 0.5, "resultant_magnitude": 0.25, "style": "ID"}
+
+
+def result(**fields):
+    return dict({"id": "r0", "normalized_score": SCORES, "answers": {"3": 4}}, **fields)
+
+
+def test_stored_fields_are_kept():
+    columns = disc_archive.columns_from_json([result(**STORED)], N_QUESTIONS, created_at=0)
+    assert columns["angle"][0] == 0.5
+    assert columns["magnitude"][0] == 0.25
+    assert disc_scoring.STYLE_KEYS[columns["style"][0]] == "ID"
+    assert columns["ids"] == ["r0"]
+
+
+def test_missing_stored_fields_are_computed():
+    columns = disc_archive.columns_from_json([result()], N_QUESTIONS, created_at=0)
+    angle, magnitude = disc_scoring.resultant([SCORES[style] for style in disc_scoring.STYLES])
+    assert math.isclose(columns["angle"][0], angle)
+    assert math.isclose(columns["magnitude"][0], magnitude)
+
+
+@pytest.mark.parametrize(
+    "fields, message",
+    [
+        ({"resultant_angle": 0.5, "style": "ID"}, "together or none"),
+        ({"style": "ID"}, "together or none"),
+        (dict(STORED, style="X"), "style 'X' is not one of"),
+        (dict(STORED, style=["ID"]), "is not one of"),
+        (dict(STORED, resultant_angle="0.5"), "resultant_angle '0.5' is not a finite number"),
+        (dict(STORED, resultant_magnitude=math.nan), "resultant_magnitude nan is not a finite number"),
+        (dict(STORED, resultant_angle=math.inf), "resultant_angle inf is not a finite number"),
+        (dict(STORED, resultant_angle=True), "is not a finite number"),
+    ],
+)
+def test_malformed_stored_fields_name_the_line(fields, message):
+    records = [result(), result(**fields)]
+    with pytest.raises(ValueError, match=f"^line 12: .*{message}"):
+        disc_archive.columns_from_json(records, N_QUESTIONS, created_at=0, line_numbers=[11, 12])
+
+
+@pytest.mark.parametrize("answers", [{"-1": 4}, {str(N_QUESTIONS): 4}, {"3": 6}, {"3": "x"}])
+def test_invalid_answers_name_the_line(answers):
+    with pytest.raises(ValueError, match="^line 1: "):
+        disc_archive.columns_from_json([result(answers=answers)], N_QUESTIONS, created_at=0)
@@ -0,0 +1,36 @@
+"""
+disc_neighbors.GridIndex.query() against a full scan, and its k validation.
+"""
+import numpy as np
+import pytest
+
+import disc_neighbors
+
+
+@pytest.fixture(scope="module")
+def index():
+    rng = np.random.default_rng(0)
+    index = disc_neighbors.profile_index()
+    index.insert(np.arange(20_000), rng.uniform(0, 100, (20_000, 4)))
+    index.merge()
+    # Left in the insert buffer, which query() scans as well
+    index.insert(np.arange(20_000, 20_010), rng.uniform(0, 100, (10, 4)))
+    return index
+
+
+@pytest.mark.parametrize("k", [1, 10, 25])
+@pytest.mark.parametrize("point", [[50, 50, 50, 50], [0, 100, 0, 100], [99, 1, 42, 7]])
+def test_query_matches_brute_force(index, point, k):
+    ids, distances = index.query(point, k)
+    expected_ids, expected_distances = index.brute_force(point, k)
+    assert len(ids) == k
+    np.testing.assert_allclose(distances, expected_distances)
+    assert set(ids) == set(expected_ids)
+
+
+@pytest.mark.parametrize("k", [0, -1])
+def test_k_below_one_is_rejected(index, k):
+    with pytest.raises(ValueError, match="k must be at least 1"):
+        index.query([50, 50, 50, 50], k)
+    with pytest.raises(ValueError, match="k must be at least 1"):
+        index.brute_force([50, 50, 50, 50], k)
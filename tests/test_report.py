@@ -0,0 +1,39 @@
+"""
+disc_report.ReportWriter with respondent ids that sanitize to the same file name.
+"""
+import json
+import os
+import zipfile
+
+import pytest
+
+import disc_report
+
+SCORES = {"D": 80.0, "I": 60.0, "S": 30.0, "C": 40.0}
+IDS = ["a/b", "a_b", "a b", "A_B", "a_b-2", "c"]
+EXPECTED = ["a_b.pdf", "a_b-2.pdf", "a_b-3.pdf", "A_B-4.pdf", "a_b-2-2.pdf", "c.pdf"]
+
+
+def write_reports(tmp_path, output):
+    results = tmp_path / "results.jsonl"
+    results.write_text("".join(json.dumps({"id": id_, "normalized_score": SCORES}) + "\n" for id_ in IDS))
+    writer = disc_report.ReportWriter(str(output))
+    try:
+        # Each report's bytes name the respondent, to check none was overwritten
+        return [writer.write(name, id_.encode()) for id_, (name, _) in zip(IDS, disc_report.read_profiles(str(results)))]
+    finally:
+        writer.close()
+
+
+@pytest.mark.parametrize("output", ["reports", "reports.zip"])
+def test_colliding_names_get_a_suffix(tmp_path, output):
+    output = tmp_path / output
+    assert write_reports(tmp_path, output) == EXPECTED
+
+    if zipfile.is_zipfile(output):
+        with zipfile.ZipFile(output) as archive:
+            contents = {name: archive.read(name) for name in archive.namelist()}
+        assert len(contents) == len(archive.namelist())
+    else:
+        contents = {name: (output / name).read_bytes() for name in os.listdir(output)}
+    assert contents == {name: id_.encode() for name, id_ in zip(EXPECTED, IDS)}
@@ -0,0 +1,108 @@
+"""
+disc_scoring.classify_angles() against the per-profile lookup it replaced.
+
+reference_style() is the angle lookup of the original describe_style(),
+copied as it was, ranges included, so that the vectorized sector search is
+checked against the old behavior rather than against itself.
+"""
+import math
+
+import numpy as np
+import pytest
+
+import disc_scoring
+
+BASELINE_RANGES = {
+    "D": (315, 337.5),
+    "DC": (270, 315),
+    "DI": (337.5, 360),
+    "I": (45, 67.5),
+    "ID": (0, 45),
+    "IS": (67.5, 90),
+    "S": (135, 157.5),
+    "SI": (90, 135),
+    "SC": (157.5, 180),
+    "C": (225, 247.5),
+    "CS": (180, 225),
+    "CD": (247.5, 270),
+}
+
+
+def reference_style(resultant_angle):
+    resultant_degrees = math.degrees(resultant_angle)
+    if resultant_degrees < 0:
+        resultant_degrees += 360
+    for style, (start_angle, end_angle) in BASELINE_RANGES.items():
+        if start_angle <= resultant_degrees < end_angle or (start_angle == 337.5 and resultant_degrees == 0):
+            return style
+    return "Balanced"
+
+
+def vectorized_styles(angles):
+    return [disc_scoring.STYLE_KEYS[code] for code in disc_scoring.classify_angles(np.asarray(angles, dtype=float))]
+
+
+def sector_edges():
+    """Every sector boundary in radians, with its neighbouring floats on both sides."""
+    edges = []
+    for start, end in BASELINE_RANGES.values():
+        for degrees in (start, end):
+            for radians in (math.radians(degrees), math.radians(degrees - 360)):
+                edges += [np.nextafter(radians, -np.inf), radians, np.nextafter(radians, np.inf)]
+    return edges
+
+
+@pytest.mark.parametrize(
+    "angles",
+    [
+        pytest.param(sector_edges(), id="sector edges"),
+        pytest.param([0.0, 2 * math.pi, -2 * math.pi, math.pi, -math.pi, 1e-300, -1e-300], id="wraparound"),
+        pytest.param([-0.0, -1e-15, -5e-324, 1e-15], id="signed zero and tiny negatives"),
+        pytest.param([math.nan, math.inf, -math.inf], id="non-finite"),
+    ],
+)
+def test_classify_angles_matches_reference(angles):
+    assert vectorized_styles(angles) == [reference_style(angle) for angle in angles]
+
+
+def test_zero_degrees_is_dominance_influence():
+    assert vectorized_styles([0.0, -0.0]) == ["DI", "DI"]
+
+
+@pytest.mark.parametrize(
+    "angle, degrees, style",
+    [
+        (-1e-15, 359.99999999999994, "DI"),
+        # Close enough to zero that adding 360 rounds to exactly 360.0, outside every half-open range
+        (-1e-16, 360.0, "Balanced"),
+    ],
+)
+def test_tiny_negative_angles(angle, degrees, style):
+    assert math.degrees(angle) + 360 == degrees
+    assert vectorized_styles([angle]) == [reference_style(angle)] == [style]
+
+
+def test_nan_is_balanced():
+    assert vectorized_styles([math.nan]) == ["Balanced"]
+
+
+def test_random_angles_match_reference():
+    rng = np.random.default_rng(0)
+    # Boundaries as arctan2() returns them, in (-180, 180] degrees, where rounding decides the sector
+    boundaries = np.radians(np.array([start for start, _ in BASELINE_RANGES.values()]))
+    boundaries = np.where(boundaries > math.pi, boundaries - 2 * math.pi, boundaries)
+    angles = np.concatenate([
+        rng.uniform(-math.pi, math.pi, 200_000),
+        rng.choice(boundaries, 20_000) * (1 + rng.normal(0, 1e-15, 20_000)),
+    ])
+    assert vectorized_styles(angles) == [reference_style(angle) for angle in angles.tolist()]
+
+
+def test_balanced_overrides_angle():
+    angles = np.array([0.0, 1.0, -2.0])
+    balanced = np.array([True, False, True])
+    assert [disc_scoring.STYLE_KEYS[code] for code in disc_scoring.classify_angles(angles, balanced)] == [
+        "Balanced",
+        reference_style(1.0),
+        "Balanced",
+    ]
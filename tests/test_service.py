@@ -0,0 +1,108 @@
+"""
+disc_service.py: shutting down on SIGTERM without leaking render workers, and
+rejecting malformed request heads.
+"""
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import pytest
+
+import disc_service
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def children(pid):
+    """Pids of the live child processes of `pid`."""
+    found = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The fields after the parenthesized command name: state, ppid, ...
+                state, ppid = f.read().rsplit(")", 1)[1].split()[:2]
+        except OSError:
+            continue
+        if int(ppid) == pid and state != "Z":
+            found.append(int(entry))
+    return found
+
+
+def alive(pid):
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except OSError:
+        return False
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc"), reason="child processes are looked up in /proc")
+def test_sigterm_stops_the_service_and_its_render_workers():
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "disc_service.py"), "--port", str(port), "--workers", "2"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        assert b"listening" in process.stdout.readline()
+        # A report request starts the render workers
+        request = urllib.request.Request(
+            f"http://127.0.0.1:{port}/report",
+            data=json.dumps({"normalized_score": {"D": 80, "I": 60, "S": 30, "C": 40}}).encode(),
+        )
+        with urllib.request.urlopen(request, timeout=60) as response:
+            assert response.read().startswith(b"%PDF")
+        workers = children(process.pid)
+        assert workers
+
+        process.terminate()
+        assert process.wait(timeout=30) == 0
+        deadline = time.monotonic() + 10
+        while any(alive(pid) for pid in workers) and time.monotonic() < deadline:
+            time.sleep(0.1)
+        assert not [pid for pid in workers if alive(pid)]
+
+        # Nothing holds the port any more
+        with socket.socket() as s:
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            s.bind(("127.0.0.1", port))
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+
+@pytest.mark.parametrize(
+    "length, status",
+    [("-5", b"400"), ("abc", b"400"), ("+5", b"400"), ("1_0", b"400"), ("", b"400"), ("2000000", b"413"), ("2", b"200")],
+)
+def test_content_length_is_validated(length, status):
+    async def request():
+        service = disc_service.DiscService(1, disc_service.DEFAULT_MAX_BATCH, disc_service.DEFAULT_BATCH_DELAY)
+        server = await asyncio.start_server(service.handle_connection, "127.0.0.1", 0)
+        try:
+            reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+            writer.write(f"GET /health HTTP/1.1\r\nContent-Length: {length}\r\nConnection: close\r\n\r\n{{}}".encode())
+            response = await asyncio.wait_for(reader.read(), timeout=10)
+            writer.close()
+            return response
+        finally:
+            server.close()
+            service.close()
+
+    response = asyncio.run(request())
+    assert response.split(b" ")[1] == status